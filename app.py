@@ -1,11 +1,33 @@
 # app.py
+import os
+import threading
+import time
 from pathlib import Path
-import gradio as gr
-from namegen import NGramTrie, NGramGenerator
+from namegen import MultiOrderTrie, NGramGenerator, ModelCache, GenerationStats
+from namegen.datasets import load_many, load_names
+from namegen.pool import RequestPool, PoolBusy
 
 PROJECT_DIR = Path(__file__).parent
 DATA_DIR = PROJECT_DIR / "data"
 
+# Highest n-gram order offered by the UI; every dataset is trained once up to it.
+MAX_ORDER = 10
+# Initial UI settings; these are also the models warmed at startup.
+DEFAULT_DATASET = "Female (female.txt)"
+DEFAULT_ORDER = 3
+
+# Trained models shared by all requests, keyed on (dataset, files + mtimes, normalize_case).
+MODEL_CACHE = ModelCache(maxsize=int(os.environ.get("NAMEGEN_MODEL_CACHE_SIZE", "16")))
+
+# Model building and generation run here rather than in Gradio's handler
+# threads: bounded, with a per-request time limit, and identical in-flight
+# requests share one job.
+REQUEST_POOL = RequestPool(
+    max_workers=int(os.environ.get("NAMEGEN_WORKERS", "4")),
+    max_pending=int(os.environ.get("NAMEGEN_MAX_PENDING", "32")),
+    timeout=float(os.environ.get("NAMEGEN_REQUEST_TIMEOUT", "30")),
+)
+
 DATASETS = {
     "Female (female.txt)": {
         "files": [DATA_DIR / "female.txt"],
@@ -75,61 +97,228 @@ DATASETS = {
     },
 }
 
-def _read_txt(path: Path):
-    if not path.exists():
-        return []
-    txt = path.read_text(encoding="utf-8", errors="ignore")
-    return [line.strip() for line in txt.splitlines() if line.strip()]
-
-def load_names_by_choice(choice: str):
-    entry = DATASETS.get(choice)
-    if not entry:
-        return [], f"Unknown dataset choice: {choice}"
-
-    files = [p if isinstance(p, Path) else Path(p) for p in entry["files"]]
+# Dropdown entry that reads its files and weights from the "custom mix" box.
+CUSTOM_MIX = "Custom mix (see below)"
+
+def parse_mix(text):
+    """Parse a custom mix such as "female:2, pokemon" into (file, weight) pairs.
+
+    Each part names a file in DATA_DIR by its stem, optionally followed by
+    ":weight" (default 1). The weight multiplies that file's counts.
+
+    Raises:
+        ValueError: If the mix is empty, names an unknown file or has a bad weight.
+    """
+    available = {p.stem: p for p in DATA_DIR.glob("*.txt")}
+    sources = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        stem, _, weight = part.partition(":")
+        stem = stem.strip()
+        if stem not in available:
+            raise ValueError(f"Unknown file '{stem}' in custom mix. Available: {', '.join(sorted(available))}")
+        try:
+            w = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            raise ValueError(f"Bad weight '{weight.strip()}' for '{stem}' in custom mix.") from None
+        if not w > 0:
+            raise ValueError(f"Weight for '{stem}' must be > 0.")
+        sources.append((available[stem], w))
+    if not sources:
+        raise ValueError("Custom mix is empty. Example: female:2, pokemon:1")
+    return sources
+
+def load_names_by_choice(choice: str, mix: str = ""):
+    if choice == CUSTOM_MIX:
+        try:
+            files = [p for p, _ in parse_mix(mix)]
+        except ValueError as e:
+            return [], str(e)
+        desc = "Custom mix: " + mix.strip()
+    else:
+        entry = DATASETS.get(choice)
+        if not entry:
+            return [], f"Unknown dataset choice: {choice}"
+        files = [p if isinstance(p, Path) else Path(p) for p in entry["files"]]
+        desc = entry.get("desc", "")
 
     missing = [p for p in files if not p.exists()]
     if missing:
         miss_str = "\n".join(f"- {p}" for p in missing)
         return [], f"Missing dataset file(s):\n{miss_str}"
 
-    names = []
-    for p in files:
-        txt = p.read_text(encoding="utf-8", errors="ignore")
-        names.extend(line.strip() for line in txt.splitlines() if line.strip())
-
-    seen, deduped = set(), []
-    for n in names:
-        if n not in seen:
-            seen.add(n)
-            deduped.append(n)
+    # Per-file lists are parsed once per (path, size, mtime) and shared by
+    # every dataset that includes the file.
+    names = load_many(files)
 
     info = " + ".join(str(p) for p in files)
-    desc = entry.get("desc", "")
-    return deduped, f"{info}\n\n{desc}"
-
-def generate_ui(dataset_choice, order, target_len, max_len, min_len, stop_prob, count, retries, normalize, capitalize):
-    
-    names, src_info = load_names_by_choice(dataset_choice)
-    if not names:
-        return f"No names loaded.\n{src_info}", ""
-    
+    return names, f"{info}\n\n{desc}"
+
+def get_file_model(path, normalize):
+    """Return the frozen all-orders model of a single dataset file, training it only on a cache miss."""
+    key = ("file", ModelCache.key_for([path], MAX_ORDER, normalize))
+    return MODEL_CACHE.get_or_build(key, lambda: MultiOrderTrie(
+        load_names(path), order=MAX_ORDER, normalize_case=bool(normalize)).freeze())
+
+def get_model(dataset_choice, order, normalize, backoff=False, mix=""):
+    """Return (model, names, src_info) for a dataset, training it only on a cache miss.
+
+    Every dataset is trained once for all orders up to MAX_ORDER
+    (`MultiOrderTrie`); the requested order and backoff setting are a view
+    of it, so moving the order slider does not retrain. Multi-file datasets
+    and custom mixes are composed from the cached single-file models
+    (`NGramTrie.combine`) instead of being retrained on the concatenated
+    files.
+    """
+    if dataset_choice == CUSTOM_MIX:
+        sources = parse_mix(mix)
+        # Equal weights are an unweighted combination: exactly the model trained on all files.
+        weights = None if len({w for _, w in sources}) == 1 else tuple(w for _, w in sources)
+        files = [p for p, _ in sources]
+    else:
+        entry = DATASETS.get(dataset_choice)
+        files = entry["files"] if entry else []
+        weights = None
+    key = (dataset_choice, ModelCache.key_for(files, MAX_ORDER, normalize), weights)
+
+    def build():
+        names, src_info = load_names_by_choice(dataset_choice, mix)
+        if not names:
+            raise ValueError(f"No names loaded.\n{src_info}")
+        models = [get_file_model(p, normalize) for p in files]
+        model = models[0] if len(models) == 1 else MultiOrderTrie.combine(models, weights).freeze()
+        return model, names, src_info
+
+    model, names, src_info = MODEL_CACHE.get_or_build(key, build)
+    return model.view(int(order), bool(backoff)), names, src_info
+
+def prewarm_choices(spec):
+    """Parse NAMEGEN_PREWARM: "default", "all", "none", or comma-separated dataset names.
+
+    Returns:
+        list[str]: Datasets to warm, the default dataset first.
+
+    Raises:
+        ValueError: If a name is not one of DATASETS.
+    """
+    spec = spec.strip()
+    if spec.lower() in ("", "none", "off", "0"):
+        return []
+    if spec.lower() == "default":
+        return [DEFAULT_DATASET]
+    if spec.lower() == "all":
+        choices = list(DATASETS)
+    else:
+        choices = [c.strip() for c in spec.split(",") if c.strip()]
+        unknown = [c for c in choices if c not in DATASETS]
+        if unknown:
+            raise ValueError(f"NAMEGEN_PREWARM: unknown dataset(s) {', '.join(unknown)}")
+    return sorted(dict.fromkeys(choices), key=lambda c: c != DEFAULT_DATASET)
+
+class Prewarmer:
+    """Train dataset models on a background thread so first requests find them cached.
+
+    Models are built through `get_model` with the UI's initial settings, so a
+    request for a dataset that is still being trained joins that build in
+    MODEL_CACHE instead of starting its own.
+
+    Attributes:
+        choices (list[str]): Datasets to warm, in order.
+        done (int): Datasets finished (including failures).
+        current (str | None): Dataset being trained.
+        failed (list[str]): "dataset: error" for datasets that could not be built.
+    """
+
+    def __init__(self, choices):
+        self.choices = list(choices)
+        self.done = 0
+        self.current = None
+        self.failed = []
+        self._elapsed = None
+        self._thread = None
+        self._finished = threading.Event()
+        if not self.choices:
+            self._finished.set()
+
+    def start(self):
+        """Start warming in a daemon thread (once); returns self."""
+        if self._thread is None and not self._finished.is_set():
+            self._thread = threading.Thread(target=self._run, name="namegen-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            for choice in self.choices:
+                self.current = choice
+                try:
+                    get_model(choice, DEFAULT_ORDER, True)
+                except Exception as e:  # keep warming the others; the UI reports it
+                    self.failed.append(f"{choice}: {e}")
+                self.done += 1
+        finally:
+            self.current = None
+            self._elapsed = time.perf_counter() - t0
+            self._finished.set()
+
+    @property
+    def ready(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Block until warming finishes; returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def status(self):
+        """One-line readiness message for the UI."""
+        if not self.choices:
+            return "Models are trained on first use."
+        if self._thread is None and not self.ready:
+            return "Models are trained on first use (warm-up not started)."
+        if not self.ready:
+            return (f"⏳ Warming models {self.done}/{len(self.choices)}: {self.current or '…'}. "
+                    "You can generate already; datasets not yet warm are trained on request.")
+        warmed = self.done - len(self.failed)
+        msg = f"✅ Models ready ({warmed} dataset{'s' if warmed != 1 else ''} warmed in {self._elapsed:.1f} s)."
+        if self.failed:
+            msg += " Failed: " + "; ".join(self.failed)
+        return msg
+
+    def watch(self, interval=0.5):
+        """Yield `status()` until warming finishes (a streaming Gradio load event)."""
+        yield self.status()
+        while not self.wait(interval):
+            yield self.status()
+        yield self.status()
+
+# Datasets warmed in the background when the app starts: NAMEGEN_PREWARM is
+# "default" (the default dataset), "all", "none", or comma-separated dataset
+# names.
+PREWARM = Prewarmer(prewarm_choices(os.environ.get("NAMEGEN_PREWARM", "default")))
+
+def run_generation(token, dataset_choice, order, target_len, max_len, min_len, stop_prob, count, retries, normalize,
+                   capitalize, backoff=False, prefix="", suffix="", pattern="", temperature=1.0, top_k=0,
+                   top_p=1.0, mix="", guided=False):
+    """Build (or fetch) the model and generate one batch; stops when `token` is cancelled."""
+
     try:
-        model = NGramTrie(names, order=int(order), normalize_case=bool(normalize))
+        model, names, src_info = get_model(dataset_choice, order, normalize, backoff, mix)
     except ValueError as e:
-        return str(e), ""
+        return str(e), "", ""
 
 
-    generator = NGramGenerator(model)
+    stats = GenerationStats()
+    generator = NGramGenerator(model, stats=stats)
 
     order_int = int(order)
     avg_len = sum(len(n) for n in names) / len(names) if names else 0.0
     order_hint = ""
-    if order_int > 1 and avg_len and (order_int - 1) > avg_len * 0.6:
+    if not backoff and order_int > 1 and avg_len and (order_int - 1) > avg_len * 0.6:
         order_hint = (
             f"\n\n⚠️ Tip: average name length ≈ {avg_len:.1f}. "
             f"With order={order_int}, many contexts may be rare or missing. "
-            f"If generation stalls or repeats, try a lower order (e.g. {max(1, order_int - 1)})."
+            f"If generation stalls or repeats, try a lower order (e.g. {max(1, order_int - 1)}) "
+            f"or enable backoff."
         )
 
 
@@ -139,34 +328,64 @@ def generate_ui(dataset_choice, order, target_len, max_len, min_len, stop_prob,
     min_len = int(min_len)
 
     if exact is not None and exact > max_len:
-        return "Error: exact length cannot exceed max length.", ""
+        return "Error: exact length cannot exceed max length.", "", ""
 
     if exact is None:
         if min_len < 1:
-            return "Error: min length must be at least 1.", ""
+            return "Error: min length must be at least 1.", "", ""
         if min_len > max_len:
-            return "Error: min length cannot exceed max length.", ""
+            return "Error: min length cannot exceed max length.", "", ""
+
+    # Length-guided sampling only pays off when a length has to be reached.
+    guided = bool(guided) and (exact is not None or min_len > 1)
 
     results = []
     for _ in range(int(count)):
-        s = generator.generate(
-            target_len=exact,
-            max_len=max_len,
-            min_len=min_len if exact is None else 1, 
-            stop_prob=float(stop_prob),
-            retries=int(retries),
-            capitalize=bool(capitalize),
-        )
+        token.check()
+        try:
+            s = generator.generate(
+                target_len=exact,
+                max_len=max_len,
+                min_len=min_len if exact is None else 1,
+                stop_prob=float(stop_prob),
+                retries=int(retries),
+                capitalize=bool(capitalize),
+                guided=guided,
+                prefix=prefix.strip() or None,
+                suffix=suffix.strip() or None,
+                pattern=pattern.strip() or None,
+                temperature=float(temperature),
+                top_k=int(top_k),
+                top_p=float(top_p),
+            )
+        except ValueError as e:
+            return f"Error: {e}", "", ""
         results.append(s or "")
 
     preview = "\n".join(names[:8])
+    cache = MODEL_CACHE.stats()
     return (
         f"Using dataset(s): {src_info}\n"
-        f"Total names: {len(names)}\n\nPreview:\n{preview}{order_hint}",
+        f"Total names: {len(names)}\n"
+        f"Model cache: {cache['hits']} hits / {cache['misses']} misses "
+        f"({cache['size']}/{cache['maxsize']} models)\n\nPreview:\n{preview}{order_hint}",
         "\n".join(results),
+        stats.summary(),
     )
 
+async def generate_ui(*args):
+    """Gradio handler: run the request on the shared pool and wait for it."""
+    try:
+        return await REQUEST_POOL.run_async(args, run_generation, *args)
+    except TimeoutError:
+        return (f"Request timed out after {REQUEST_POOL.timeout:g} s. "
+                "Try fewer names, fewer retries or a lower order."), "", ""
+    except PoolBusy:
+        return "Server busy: too many requests in progress. Please try again shortly.", "", ""
+
 def build_demo():
+    import gradio as gr
+
     with gr.Blocks(title="Trie-backed n-gram name generator") as demo:
         gr.Markdown(
             "## Trie-backed n-gram name generator\n\n"
@@ -176,10 +395,11 @@ def build_demo():
             "  - Order **2** = uses the **last 1** character (bigrams), order **3** = last **2** chars (trigrams), etc.\n"
             "- *(Note: n-gram order n corresponds to Markov order n − 1. Same idea, just different numbering.)*\n"
             "- **Avoid setting order too high on small datasets.** Many long contexts never appear in training, which can cause\n"
-            "  stalls or repetitive outputs. If you get blanks or repeats, lower the order.\n"
+            "  stalls or repetitive outputs. If you get blanks or repeats, lower the order or enable **backoff**.\n"
             "- **Exact length vs variable:** Set *exact length* > 0 to force a fixed length; otherwise the generator may stop early\n"
             "  (controlled by *stop probability*). Use **Min length** to prevent ultra-short names in variable mode.\n"
         )
+        readiness = gr.Markdown(PREWARM.status())
 
         gr.Markdown(
             "**Controls reference:**\n"
@@ -189,19 +409,32 @@ def build_demo():
             "- **stop probability** – per-step chance to stop once `len ≥ min_len`.\n"
             "- **retries per name** – attempts before giving up (helps avoid dead ends/duplicates).\n"
             "- **how many to generate** – number of names to produce in one batch.\n"
+            "- **back off to shorter contexts** – when a context never appeared in training, continue from its longest\n"
+            "  known suffix instead of stopping.\n"
+            "- **steer toward the length limits** – pick only letters from which *exact length* or *min length* can\n"
+            "  still be reached, instead of retrying names that dead-end too early.\n"
+            "- **starts with / ends with / pattern** – only generate names that satisfy these. The pattern must match\n"
+            "  the whole name and supports `.`, `[a-z]`, `[^aeiou]`, `(a|b)`, `*`, `+`, `?` and `{m,n}`.\n"
+            "- **temperature / top-k / top-p** – below 1 favours common letter sequences, above 1 rarer ones; top-k\n"
+            "  keeps only the k likeliest next letters (0 = all), top-p the likeliest ones covering that share of the\n"
+            "  probability. They do not apply while a name is being steered to its exact length.\n"
+            "- **custom mix** – with *Custom mix* selected, combine data files by name, each optionally weighted\n"
+            "  (e.g. `female:2, pokemon:1`; the weight multiplies that file's counts). Combined datasets are built\n"
+            "  from the cached single-file models, so switching between them does not retrain.\n"
 
         )
 
         with gr.Row():
             with gr.Column():
                 dataset_choice = gr.Dropdown(
-                    choices=list(DATASETS.keys()),
-                    value="Female (female.txt)",
+                    choices=list(DATASETS.keys()) + [CUSTOM_MIX],
+                    value=DEFAULT_DATASET,
                     label="Dataset"
                 )
+                mix = gr.Textbox(label="custom mix (file:weight, ...)", placeholder="e.g. female:2, pokemon:1")
 
                 with gr.Row():
-                    order = gr.Slider(1, 10, value=3, step=1, label="n-gram order")
+                    order = gr.Slider(1, MAX_ORDER, value=DEFAULT_ORDER, step=1, label="n-gram order")
                     target_len = gr.Slider(0, 50, value=0, step=1, label="exact length (0 = variable)")
                     max_len = gr.Slider(1, 50, value=20, step=1, label="max length")
 
@@ -215,21 +448,47 @@ def build_demo():
 
                 normalize = gr.Checkbox(True, label="case-insensitive training")
                 capitalize = gr.Checkbox(True, label="capitalize output")
+                backoff = gr.Checkbox(False, label="back off to shorter contexts")
+                guided = gr.Checkbox(False, label="steer toward the length limits")
 
-                btn = gr.Button("Generate")
+                with gr.Row():
+                    prefix = gr.Textbox(label="starts with", placeholder="e.g. Ma")
+                    suffix = gr.Textbox(label="ends with", placeholder="e.g. ina")
+                    pattern = gr.Textbox(label="pattern", placeholder="e.g. [^aeiou]*a.*")
+
+                with gr.Row():
+                    temperature = gr.Slider(0.1, 3, value=1.0, step=0.05, label="temperature")
+                    top_k = gr.Slider(0, 30, value=0, step=1, label="top-k (0 = off)")
+                    top_p = gr.Slider(0.05, 1, value=1.0, step=0.05, label="top-p")
+
+                with gr.Row():
+                    btn = gr.Button("Generate")
+                    stop_btn = gr.Button("Stop")
 
             with gr.Column():
                 src_info = gr.Textbox(label="Dataset info", lines=10, interactive=False)
                 results = gr.Textbox(label="Generated names", lines=16)
+                batch_stats = gr.Textbox(label="Batch stats", lines=5, interactive=False)
 
-        btn.click(
+        gen_event = btn.click(
             fn=generate_ui,
-            inputs=[dataset_choice, order, target_len, max_len, min_len, stop_prob, count, retries, normalize, capitalize],
-            outputs=[src_info, results],
+            inputs=[dataset_choice, order, target_len, max_len, min_len, stop_prob, count, retries, normalize, capitalize,
+                    backoff, prefix, suffix, pattern, temperature, top_k, top_p, mix,
+                    guided],
+            outputs=[src_info, results, batch_stats],
+            api_name="generate",
+            # Handlers only wait on REQUEST_POOL, which bounds the real work.
+            concurrency_limit=None,
         )
+        # Cancelling the handler releases its pool job, which stops at the next name.
+        stop_btn.click(fn=None, cancels=[gen_event])
+        # Streams warm-up progress to each page until the models are ready.
+        demo.load(fn=PREWARM.watch, outputs=readiness)
 
     return demo
 
 if __name__ == "__main__":
+    # Train in the background while Gradio loads and serves; the page shows progress.
+    PREWARM.start()
     demo = build_demo()
     demo.launch()
\ No newline at end of file
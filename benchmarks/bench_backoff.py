@@ -0,0 +1,70 @@
+"""Wasted attempts and latency per accepted name: plain model vs. stupid backoff.
+
+Usage:
+    python benchmarks/bench_backoff.py [--names 300]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from namegen import NGramTrie, NGramGenerator
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DATASETS = ["pokemon.txt", "male.txt"]
+ORDERS = range(5, 11)
+PARAMS = dict(max_len=20, min_len=4, stop_prob=0.20)
+
+
+def _modes(order):
+    # (label, generate() kwargs): variable length, and an exact length just
+    # above the start context so every order can reach it.
+    return [("variable", PARAMS), (f"len={order + 2}", dict(PARAMS, target_len=order + 2))]
+
+
+class CountingGenerator(NGramGenerator):
+    """NGramGenerator that counts generation attempts."""
+
+    attempts = 0
+
+    def _attempt(self, *args, **kwargs):
+        self.attempts += 1
+        return super()._attempt(*args, **kwargs)
+
+
+def _read_names(path):
+    txt = path.read_text(encoding="utf-8", errors="ignore")
+    return [line.strip() for line in txt.splitlines() if line.strip()]
+
+
+def _run(model, count, kwargs):
+    gen = CountingGenerator(model, rng=random.Random(0))
+    ok = 0
+    t0 = time.perf_counter()
+    for _ in range(count):
+        ok += gen.generate(retries=500, **kwargs) is not None
+    dt = time.perf_counter() - t0
+    return (gen.attempts - ok) / max(ok, 1), 1000 * dt / max(ok, 1), ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    print(f"{'dataset':<12} {'ord':>3} {'mode':<9} {'wasted attempts/name':>24} {'ms/name':>18} {'accepted':>18}")
+    print(f"{'':<12} {'':>3} {'':<9} {'plain':>11} {'backoff':>12} {'plain':>8} {'backoff':>9} {'plain':>8} {'backoff':>9}")
+    for fname in DATASETS:
+        names = _read_names(DATA_DIR / fname)
+        for order in ORDERS:
+            plain = NGramTrie(names, order=order).freeze()
+            backoff = NGramTrie(names, order=order, backoff=True).freeze()
+            for label, kwargs in _modes(order):
+                w_p, ms_p, ok_p = _run(plain, args.names, kwargs)
+                w_b, ms_b, ok_b = _run(backoff, args.names, kwargs)
+                print(f"{fname:<12} {order:>3} {label:<9} {w_p:>11.1f} {w_b:>12.2f} "
+                      f"{ms_p:>8.2f} {ms_b:>9.3f} {ok_p:>8} {ok_b:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Names/sec of vectorized `generate_batch` vs. repeated scalar `generate`.
+
+Usage:
+    python benchmarks/bench_batch.py [--n 100000] [--orders 2 3 5]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from namegen import NGramTrie, NGramGenerator
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DATASETS = ["US_names.txt", "finnish_words.txt"]
+PARAMS = dict(min_len=3, max_len=12, stop_prob=0.35, capitalize=False)
+
+
+def _read_names(path):
+    txt = path.read_text(encoding="utf-8", errors="ignore")
+    return [line.strip() for line in txt.splitlines() if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, nargs="+", default=[2, 3, 5])
+    args = parser.parse_args(argv)
+
+    print(f"{'dataset':<20} {'order':>5} {'scalar names/s':>15} {'batch names/s':>14} {'speedup':>8}")
+    for fname in DATASETS:
+        names = _read_names(DATA_DIR / fname)
+        for order in args.orders:
+            model = NGramTrie(names, order=order).freeze()
+            gen = NGramGenerator(model, rng=random.Random(0))
+            gen.generate_batch(1)  # compile the array tables outside the timing
+
+            t0 = time.perf_counter()
+            for _ in range(args.n):
+                gen.generate(**PARAMS)
+            scalar = args.n / (time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            gen.generate_batch(args.n, **PARAMS)
+            batch = args.n / (time.perf_counter() - t0)
+            print(f"{fname:<20} {order:>5} {scalar:>15,.0f} {batch:>14,.0f} {batch / scalar:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
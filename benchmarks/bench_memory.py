@@ -0,0 +1,66 @@
+"""Memory of the dict-backed trie vs. the compact array backend.
+
+Each configuration is trained in a fresh subprocess so the RSS delta is not
+polluted by earlier runs.
+
+Usage:
+    python benchmarks/bench_memory.py [--orders 2 3 5]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+CORPUS = ["finnish_words.txt", "US_names.txt"]
+
+
+def _rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _child(order, backend):
+    from namegen import NGramTrie
+
+    names = []
+    for fname in CORPUS:
+        txt = (DATA_DIR / fname).read_text(encoding="utf-8", errors="ignore")
+        names.extend(line.strip() for line in txt.splitlines() if line.strip())
+    gc.collect()
+    before = _rss_bytes()
+    model = NGramTrie(names, order=order)
+    if backend == "compact":
+        model.compact()
+    gc.collect()
+    report = model.memory_report()
+    report["rss_delta"] = _rss_bytes() - before
+    print(json.dumps(report))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(int(args.child[0]), args.child[1])
+        return
+
+    print(f"{'order':>5} {'backend':>8} {'nodes':>9} {'model MB':>9} {'B/node':>7} {'RSS delta MB':>13}")
+    for order in args.orders:
+        for backend in ("dict", "compact"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", str(order), backend],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out)
+            print(f"{order:>5} {backend:>8} {r['nodes']:>9,} {r['bytes'] / 2**20:>9.1f} "
+                  f"{r['bytes_per_node']:>7.1f} {r['rss_delta'] / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""One multi-order model vs. a separately trained model per order.
+
+Compares a `MultiOrderTrie` trained once up to the highest order with one
+`NGramTrie` per order (what the app's order slider used to train), on:
+
+    memory    memory_report() bytes and RSS growth of holding every order
+    latency   time to serve a sweep over all orders from cold, and the cost
+              of a single order switch once the model is loaded
+
+Each memory measurement runs in a fresh subprocess so the RSS delta is not
+polluted by earlier runs.
+
+Usage:
+    python benchmarks/bench_orders.py [--max-order 10] [--backoff]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from namegen import MultiOrderTrie, NGramTrie
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DATASETS = ["male.txt", "US_names.txt", "finnish_words.txt"]
+
+
+def _rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _read_names(fname):
+    txt = (DATA_DIR / fname).read_text(encoding="utf-8", errors="ignore")
+    return [line.strip() for line in txt.splitlines() if line.strip()]
+
+
+def _child(fname, kind, max_order, backoff):
+    names = _read_names(fname)
+    gc.collect()
+    before = _rss_bytes()
+    if kind == "multi":
+        multi = MultiOrderTrie(names, order=max_order).freeze()
+        views = [multi.view(n, backoff) for n in range(1, max_order + 1)]
+        model_bytes = multi.memory_report()["bytes"]
+    else:
+        views = [NGramTrie(names, order=n, backoff=backoff).freeze() for n in range(1, max_order + 1)]
+        model_bytes = sum(m.memory_report()["bytes"] for m in views)
+    gc.collect()
+    print(json.dumps({"bytes": model_bytes, "rss_delta": _rss_bytes() - before, "models": len(views)}))
+
+
+def _sweep(names, max_order, backoff):
+    t0 = time.perf_counter()
+    for n in range(1, max_order + 1):
+        NGramTrie(names, order=n, backoff=backoff).freeze()
+    separate = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    multi = MultiOrderTrie(names, order=max_order).freeze()
+    trained = time.perf_counter() - t0
+    for n in range(1, max_order + 1):
+        multi.view(n, backoff)
+    swept = time.perf_counter() - t0
+
+    # One order switch on a warm model: a new view, then a cached one.
+    multi = MultiOrderTrie(names, order=max_order).freeze()
+    t0 = time.perf_counter()
+    multi.view(max_order // 2, backoff)
+    first_view = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    multi.view(max_order // 2, backoff)
+    cached_view = time.perf_counter() - t0
+    fit_one = min(_timed(lambda: NGramTrie(names, order=max_order // 2, backoff=backoff).freeze())
+                  for _ in range(3))
+    return separate, trained, swept, fit_one, first_view, cached_view
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-order", type=int, default=10)
+    parser.add_argument("--backoff", action="store_true", help="compare backoff models")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(args.child[0], args.child[1], args.max_order, args.backoff)
+        return
+
+    print(f"orders 1..{args.max_order}, backoff={args.backoff}\n")
+    print(f"{'dataset':<18} {'kind':>9} {'model MB':>9} {'RSS delta MB':>13}")
+    for fname in DATASETS:
+        for kind in ("separate", "multi"):
+            cmd = [sys.executable, __file__, "--child", fname, kind, "--max-order", str(args.max_order)]
+            if args.backoff:
+                cmd.append("--backoff")
+            r = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+            print(f"{fname:<18} {kind:>9} {r['bytes'] / 2**20:>9.1f} {r['rss_delta'] / 2**20:>13.1f}")
+
+    print(f"\n{'dataset':<18} {'sweep: fits':>12} {'multi fit':>10} {'+ views':>8} "
+          f"{'switch: fit':>12} {'new view':>9} {'cached':>8}")
+    for fname in DATASETS:
+        separate, trained, swept, fit_one, first_view, cached_view = _sweep(
+            _read_names(fname), args.max_order, args.backoff)
+        print(f"{fname:<18} {separate:>11.2f}s {trained:>9.2f}s {swept:>7.2f}s "
+              f"{1000 * fit_one:>10.1f}ms {1000 * first_view:>7.2f}ms {1e6 * cached_view:>6.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Attempts and latency per accepted name: rejection loop vs. guided sampling.
+
+Usage:
+    python benchmarks/bench_reachability.py [--names 300]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from namegen import NGramTrie, NGramGenerator
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+CASES = [
+    # dataset, order, generate() kwargs
+    ("pokemon.txt", 3, dict(target_len=9, max_len=20)),
+    ("pokemon.txt", 4, dict(target_len=8, max_len=20)),  # unreachable: guided gives up at once
+    ("male.txt", 4, dict(target_len=8, max_len=20)),
+    ("US_names.txt", 5, dict(target_len=9, max_len=20)),
+    ("finnish_words.txt", 4, dict(target_len=12, max_len=20)),
+    ("US_names.txt", 4, dict(min_len=8, max_len=15, stop_prob=0.35)),
+]
+
+
+class CountingGenerator(NGramGenerator):
+    """NGramGenerator that counts generation attempts."""
+
+    attempts = 0
+
+    def _attempt(self, *args, **kwargs):
+        self.attempts += 1
+        return super()._attempt(*args, **kwargs)
+
+
+def _read_names(path):
+    txt = path.read_text(encoding="utf-8", errors="ignore")
+    return [line.strip() for line in txt.splitlines() if line.strip()]
+
+
+def _run(model, count, guided, kwargs):
+    gen = CountingGenerator(model, rng=random.Random(0))
+    ok = 0
+    t0 = time.perf_counter()
+    for _ in range(count):
+        ok += gen.generate(retries=5000, guided=guided, **kwargs) is not None
+    dt = time.perf_counter() - t0
+    return gen.attempts / max(ok, 1), 1000 * dt / max(ok, 1), ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    print(f"{'dataset':<18} {'ord':>3} {'constraint':<18} {'attempts/name':>22} {'ms/name':>18}")
+    print(f"{'':<18} {'':>3} {'':<18} {'reject':>10} {'guided':>11} {'reject':>8} {'guided':>9}")
+    for fname, order, kwargs in CASES:
+        model = NGramTrie(_read_names(DATA_DIR / fname), order=order).freeze()
+        NGramGenerator(model).generate(guided=True, **kwargs)  # build the tables outside the timing
+        a_rej, ms_rej, _ = _run(model, args.names, False, kwargs)
+        a_gui, ms_gui, _ = _run(model, args.names, True, kwargs)
+        label = (f"len={kwargs['target_len']}" if "target_len" in kwargs
+                 else f"len {kwargs['min_len']}..{kwargs['max_len']}")
+        print(f"{fname:<18} {order:>3} {label:<18} {a_rej:>10.1f} {a_gui:>11.2f} {ms_rej:>8.2f} {ms_gui:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
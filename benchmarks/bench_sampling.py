@@ -0,0 +1,48 @@
+"""Characters/sec of generation with raw counts vs. frozen samplers.
+
+Usage:
+    python benchmarks/bench_sampling.py [--attempts 20000] [--order 3]
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+from namegen import NGramTrie, NGramGenerator
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+DATASETS = ["US_names.txt", "finnish_words.txt"]
+
+
+def _read_names(path):
+    txt = path.read_text(encoding="utf-8", errors="ignore")
+    return [line.strip() for line in txt.splitlines() if line.strip()]
+
+
+def chars_per_sec(model, attempts, seed=0):
+    gen = NGramGenerator(model, rng=random.Random(seed))
+    chars = 0
+    t0 = time.perf_counter()
+    for _ in range(attempts):
+        chars += len(gen.generate_once(None, 20, 1, 0.2))
+    return chars / (time.perf_counter() - t0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=20000)
+    parser.add_argument("--order", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'dataset':<20} {'raw chars/s':>14} {'frozen chars/s':>16} {'speedup':>8}")
+    for fname in DATASETS:
+        names = _read_names(DATA_DIR / fname)
+        model = NGramTrie(names, order=args.order)
+        raw = chars_per_sec(model, args.attempts)
+        model.freeze()
+        frozen = chars_per_sec(model, args.attempts)
+        print(f"{fname:<20} {raw:>14,.0f} {frozen:>16,.0f} {frozen / raw:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
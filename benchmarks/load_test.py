@@ -0,0 +1,117 @@
+"""Load test for a running Gradio app: latency percentiles and throughput under N clients.
+
+Start the app first (``python app.py``), then run for example:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:7860 --clients 8 --requests 20
+
+Every client sends its requests one after another through the app's
+"/generate" endpoint. By default each request uses a slightly different retry
+budget so that no two requests coalesce; pass --same to send identical
+requests and see the effect of coalescing instead. Needs gradio_client.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+# Same order as the inputs of the Generate button in app.py.
+DEFAULTS = dict(dataset_choice="Male (male.txt)", order=3, target_len=0, max_len=12, min_len=3,
+                stop_prob=0.2, count=20, retries=300, normalize=True, capitalize=True, backoff=False,
+                prefix="", suffix="", pattern="", temperature=1.0, top_k=0, top_p=1.0, mix="",
+                guided=False)
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def _client(url, requests, params, same, offset, latencies, errors, lock):
+    from gradio_client import Client
+
+    client = Client(url, verbose=False)
+    for i in range(requests):
+        args = dict(params)
+        if not same:
+            # A distinct retry budget gives every request its own key without
+            # changing the work it does.
+            args["retries"] = params["retries"] + offset + i
+        t0 = time.perf_counter()
+        try:
+            info, _, _ = client.predict(*args.values(), api_name="/generate")
+        except Exception as exc:  # noqa: BLE001 - report and keep going
+            with lock:
+                errors.append(repr(exc))
+            continue
+        dt = time.perf_counter() - t0
+        with lock:
+            if info.startswith(("Request timed out", "Server busy")):
+                errors.append(info.split(".")[0])
+            else:
+                latencies.append(dt)
+
+
+def run(url, clients, requests, params=None, same=False):
+    """Drive the app with `clients` concurrent clients.
+
+    Args:
+        url (str): Base URL of the running app.
+        clients (int): Concurrent clients.
+        requests (int): Requests per client.
+        params (dict or None): Generation inputs; defaults to `DEFAULTS`.
+        same (bool): Send identical requests (exercises coalescing).
+
+    Returns:
+        dict: ok, errors, p50_s, p99_s, mean_s, wall_s and requests_per_s.
+    """
+    params = dict(DEFAULTS, **(params or {}))
+    latencies, errors, lock = [], [], threading.Lock()
+    threads = [
+        threading.Thread(target=_client,
+                         args=(url, requests, params, same, c * requests, latencies, errors, lock))
+        for c in range(clients)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    return {
+        "ok": len(latencies),
+        "errors": len(errors),
+        "error_kinds": sorted(set(errors)),
+        "p50_s": _percentile(latencies, 50) if latencies else None,
+        "p99_s": _percentile(latencies, 99) if latencies else None,
+        "mean_s": statistics.fmean(latencies) if latencies else None,
+        "wall_s": wall,
+        "requests_per_s": len(latencies) / wall if wall > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:7860")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--dataset", default=DEFAULTS["dataset_choice"])
+    parser.add_argument("--order", type=int, default=DEFAULTS["order"])
+    parser.add_argument("--count", type=int, default=DEFAULTS["count"], help="names per request")
+    parser.add_argument("--same", action="store_true", help="send identical requests")
+    args = parser.parse_args(argv)
+
+    params = {"dataset_choice": args.dataset, "order": args.order, "count": args.count}
+    print(f"{'clients':>7} {'ok':>5} {'err':>4} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>7}")
+    for n in args.clients:
+        r = run(args.url, n, args.requests, params, args.same)
+        ms = lambda v: f"{1000 * v:8.1f}" if v is not None else f"{'-':>8}"  # noqa: E731
+        print(f"{n:7d} {r['ok']:5d} {r['errors']:4d} {ms(r['p50_s'])} {ms(r['p99_s'])} "
+              f"{r['requests_per_s']:7.1f}")
+        for kind in r["error_kinds"]:
+            print(f"        error: {kind}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Benchmark suite: fit time, generation speed, attempts and memory per dataset and order.
+
+Every dataset in data/ is trained at each order, then measured in variable
+and exact-length mode and with vectorized batches of several sizes. Results
+are written to JSON so runs can be diffed, and compared against a baseline
+run with per-metric regression thresholds.
+
+Usage:
+    python -m benchmarks.suite [--out results.json] [--datasets pokemon.txt male.txt]
+                               [--orders 1 2 3] [--names 200] [--batch-sizes 100 1000]
+                               [--repeat 3] [--baseline old.json]
+                               [--threshold fit_s=0.5 --threshold names_per_s=0.3]
+
+With --baseline the run exits with status 1 if any metric got worse than its
+threshold allows (relative change; e.g. fit_s=0.25 fails when fitting became
+more than 25% slower). The same run is available to pytest as
+`pytest -m benchmark` (see tests/test_benchmarks.py).
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from namegen import NGramTrie, NGramGenerator
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+ORDERS = range(1, 11)
+BATCH_SIZES = (100, 1000)
+PARAMS = dict(max_len=20, min_len=3, stop_prob=0.20, retries=100, capitalize=False)
+
+# metric -> True if larger values are better
+METRICS = {
+    "fit_s": False,
+    "peak_bytes": False,
+    "model_bytes": False,
+    "names_per_s": True,
+    "attempts_per_name": False,
+}
+# Allowed relative degradation per metric before a run counts as a regression.
+THRESHOLDS = {
+    "fit_s": 0.25,
+    "peak_bytes": 0.10,
+    "model_bytes": 0.05,
+    "names_per_s": 0.25,
+    "attempts_per_name": 0.10,
+}
+
+
+class CountingGenerator(NGramGenerator):
+    """NGramGenerator that counts generation attempts."""
+
+    attempts = 0
+
+    def _attempt(self, *args, **kwargs):
+        self.attempts += 1
+        return super()._attempt(*args, **kwargs)
+
+
+def _read_names(path):
+    txt = path.read_text(encoding="utf-8", errors="ignore")
+    return [line.strip() for line in txt.splitlines() if line.strip()]
+
+
+def _best_time(fn, repeat):
+    best, value = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        value = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, value
+
+
+def _measure_fit(names, order, repeat):
+    fit_s, model = _best_time(lambda: NGramTrie(names, order=order).freeze(), repeat)
+    tracemalloc.start()
+    try:
+        NGramTrie(names, order=order).freeze()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return model, {
+        "fit_s": fit_s,
+        "peak_bytes": peak,
+        "model_bytes": model.memory_report()["bytes"],
+    }
+
+
+def _measure_generate(model, count, repeat, **params):
+    def run():
+        gen = CountingGenerator(model, rng=random.Random(0))
+        ok = sum(gen.generate(**params) is not None for _ in range(count))
+        return ok, gen.attempts
+
+    dt, (ok, attempts) = _best_time(run, repeat)
+    return {
+        "accepted": ok,
+        "names_per_s": ok / dt if dt > 0 else 0.0,
+        "attempts_per_name": attempts / ok if ok else None,
+    }
+
+
+def _measure_batch(model, n, repeat):
+    gen = NGramGenerator(model)
+    gen.generate_batch(1)  # compile the array tables outside the timing
+    params = {k: v for k, v in PARAMS.items() if k != "capitalize"}
+    dt, out = _best_time(lambda: gen.generate_batch(n, seed=0, capitalize=False, **params), repeat)
+    ok = sum(s is not None for s in out)
+    return {"accepted": ok, "names_per_s": ok / dt if dt > 0 else 0.0}
+
+
+def run_suite(datasets=None, orders=ORDERS, names=200, batch_sizes=BATCH_SIZES, repeat=1, log=None):
+    """Run the benchmark matrix.
+
+    Args:
+        datasets (list[str] or None): File names in data/. None runs every
+            .txt file there.
+        orders (iterable[int]): n-gram orders. Orders longer than the longest
+            name of a dataset are skipped.
+        names (int): Names requested per generation case.
+        batch_sizes (iterable[int]): Sizes for `generate_batch`. Skipped if
+            NumPy is not installed.
+        repeat (int): Timings keep the best of this many runs.
+        log (Callable[[str], None] or None): Progress callback.
+
+    Returns:
+        dict: {"meta": {...}, "results": [...]}. Each result has dataset,
+        order and case ("fit", "variable", "exact" or "batch:<n>") plus the
+        metrics measured for that case.
+    """
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        batch_sizes = ()
+    files = sorted(DATA_DIR.glob("*.txt")) if datasets is None else [DATA_DIR / d for d in datasets]
+    results = []
+    for path in files:
+        data = _read_names(path)
+        longest = max(len(n) for n in data)
+        lengths = sorted(len(n) for n in data)
+        for order in orders:
+            if order > longest:
+                continue
+            base = {"dataset": path.name, "order": order}
+            model, fit = _measure_fit(data, order, repeat)
+            results.append({**base, "case": "fit", **fit})
+
+            variable = _measure_generate(model, names, repeat, **PARAMS)
+            results.append({**base, "case": "variable", **variable})
+            # Exact length: the median name length, or just past the start context.
+            target = max(lengths[len(lengths) // 2], order)
+            if target <= PARAMS["max_len"]:
+                results.append({**base, "case": "exact", "target_len": target,
+                                **_measure_generate(model, names, repeat, **dict(PARAMS, target_len=target))})
+            for n in batch_sizes:
+                results.append({**base, "case": f"batch:{n}", **_measure_batch(model, n, repeat)})
+            if log:
+                log(f"{path.name} order {order}: fit {fit['fit_s']:.3f}s, "
+                    f"{variable['names_per_s']:,.0f} names/s")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "names": names,
+            "repeat": repeat,
+            "params": PARAMS,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, thresholds=None):
+    """Find metrics that got worse than allowed since `baseline`.
+
+    Args:
+        baseline (dict): Earlier output of `run_suite`.
+        current (dict): New output of `run_suite`.
+        thresholds (dict[str, float] or None): Allowed relative degradation
+            per metric; missing metrics use `THRESHOLDS`.
+
+    Returns:
+        list[str]: One message per regression; empty if none.
+    """
+    limits = dict(THRESHOLDS, **(thresholds or {}))
+    key = lambda r: (r["dataset"], r["order"], r["case"])  # noqa: E731
+    old = {key(r): r for r in baseline["results"]}
+    problems = []
+    for r in current["results"]:
+        prev = old.get(key(r))
+        if prev is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            a, b = prev.get(metric), r.get(metric)
+            if metric not in limits or a is None or not a:
+                continue
+            if b is None:
+                problems.append(f"{key(r)} {metric}: {a:g} -> none")
+                continue
+            change = (a - b) / a if higher_is_better else (b - a) / a
+            if change > limits[metric]:
+                problems.append(f"{key(r)} {metric}: {a:g} -> {b:g} "
+                                f"({change:+.0%} worse, limit {limits[metric]:.0%})")
+    return problems
+
+
+def _parse_threshold(text):
+    metric, _, value = text.partition("=")
+    if metric not in METRICS or not value:
+        raise argparse.ArgumentTypeError(f"expected METRIC=RATIO with METRIC in {', '.join(METRICS)}")
+    return metric, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, help="write results to this JSON file")
+    parser.add_argument("--datasets", nargs="+", help="files in data/ (default: all)")
+    parser.add_argument("--orders", type=int, nargs="+", default=list(ORDERS))
+    parser.add_argument("--names", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=list(BATCH_SIZES))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--threshold", type=_parse_threshold, action="append", default=[],
+                        metavar="METRIC=RATIO", help="allowed relative degradation, e.g. fit_s=0.5")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.datasets, args.orders, args.names, args.batch_sizes, args.repeat,
+                       log=lambda msg: print(msg, file=sys.stderr))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        problems = compare(json.loads(args.baseline.read_text(encoding="utf-8")), report,
+                           dict(args.threshold))
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
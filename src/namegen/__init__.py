@@ -1,3 +1,6 @@
-from .trie import NGramTrie
-from .generator import NGramGenerator, sample_weighted
-__all__ = ["NGramTrie", "NGramGenerator", "sample_weighted"]
\ No newline at end of file
+from .trie import NGramTrie, MultiOrderTrie
+from .generator import NGramGenerator, NameStream, sample_weighted
+from .sampling import CumulativeSampler
+from .cache import ModelCache
+from .stats import GenerationStats
+__all__ = ["NGramTrie", "MultiOrderTrie", "NGramGenerator", "NameStream", "sample_weighted", "CumulativeSampler", "ModelCache", "GenerationStats"]
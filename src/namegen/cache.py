@@ -0,0 +1,138 @@
+"""Process-wide cache of trained models.
+
+Training is the expensive part of serving a request, while most requests only
+change generation parameters. `ModelCache` keeps the most recently used models
+in memory, keyed on the dataset files (with their modification times) and the
+training options, so repeated requests skip both file I/O and `fit`.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ModelCache:
+    """Thread-safe LRU cache for trained models.
+
+    Concurrent requests for the same missing key are coalesced: the first
+    caller builds the value and the others wait for it instead of training
+    the same model in parallel.
+
+    Attributes:
+        maxsize (int): Maximum number of cached entries.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to build the value.
+    """
+
+    def __init__(self, maxsize=16):
+        """Create an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept. Least recently used
+                entries are evicted first. Default is 16.
+
+        Raises:
+            ValueError: If maxsize is negative.
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(files, order, normalize_case):
+        """Build a cache key for a model trained on `files`.
+
+        The key includes each file's modification time, so editing a dataset
+        on disk makes the old entry unreachable.
+
+        Args:
+            files (iterable[str | Path]): Dataset files, in training order.
+            order (int): n-gram order.
+            normalize_case (bool): Case normalization setting.
+
+        Returns:
+            tuple: Hashable cache key.
+        """
+        stamped = []
+        for p in files:
+            p = Path(p)
+            try:
+                mtime = p.stat().st_mtime_ns
+            except OSError:
+                mtime = None
+            stamped.append((str(p), mtime))
+        return (tuple(stamped), int(order), bool(normalize_case))
+
+    def get_or_build(self, key, build):
+        """Return the cached value for `key`, building it on a miss.
+
+        Args:
+            key (Hashable): Cache key, usually from `key_for`.
+            build (Callable[[], Any]): Called without arguments to create the
+                value when it is not cached. Exceptions propagate and nothing
+                is cached.
+
+        Returns:
+            Any: The cached or newly built value.
+        """
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait()
+
+        try:
+            value = build()
+        except BaseException:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+            raise
+
+        with self._lock:
+            if self.maxsize > 0:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            del self._pending[key]
+        pending.set()
+        return value
+
+    def clear(self):
+        """Drop all cached entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return a snapshot of the cache counters.
+
+        Returns:
+            dict[str, int]: hits, misses, size and maxsize.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
@@ -0,0 +1,218 @@
+"""Command-line batch generator (the `namegen` console script).
+
+Trains a model on one or more name files, or loads one written by
+`NGramTrie.save`, and writes N generated names, one per line, to a file or
+stdout. Names are produced in chunks (optionally by several processes and
+with the vectorized NumPy sampler) and each chunk is written with a single
+buffered write. Progress and throughput go to stderr.
+
+Examples:
+    namegen --train data/male.txt -n 1000000 -o names.txt --unique
+    namegen --train data/female.txt data/male.txt --order 4 --save both.ngm -n 0
+    namegen --model both.ngm -n 5000000 --workers 4 --batch --seed 1 | gzip > names.gz
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from .constraints import make_constraint
+from .datasets import load_many
+from .generator import _check_lengths
+from .sampling import check_shape
+from .trie import NGramTrie
+
+# A chunk that adds no new name this many times in a row ends the job early.
+STALL_CHUNKS = 3
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="namegen", description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--train", nargs="+", metavar="FILE", help="name files to train on (one name per line)")
+    source.add_argument("--model", metavar="PATH", help="model file written by NGramTrie.save")
+
+    training = parser.add_argument_group("training")
+    training.add_argument("--order", type=int, default=3)
+    training.add_argument("--no-normalize", dest="normalize", action="store_false",
+                          help="keep the case of the training names")
+    training.add_argument("--backoff", action="store_true", help="back off to shorter contexts")
+    training.add_argument("--save", metavar="PATH", help="write the trained model to PATH")
+
+    gen = parser.add_argument_group("generation")
+    gen.add_argument("-n", "--count", type=int, default=10, help="names to write (0 = none)")
+    gen.add_argument("--target-len", type=int, help="exact name length")
+    gen.add_argument("--min-len", type=int, default=1)
+    gen.add_argument("--max-len", type=int, default=20)
+    gen.add_argument("--stop-prob", type=float, default=0.20)
+    gen.add_argument("--retries", type=int, default=500)
+    gen.add_argument("--no-capitalize", dest="capitalize", action="store_false")
+    gen.add_argument("--prefix", help="required start of every name")
+    gen.add_argument("--suffix", help="required end of every name")
+    gen.add_argument("--pattern", help="pattern every whole name must match, e.g. '[^aeiou]*a.*'")
+    gen.add_argument("--temperature", type=float, default=1.0,
+                     help="< 1 favours common letter sequences, > 1 rarer ones")
+    gen.add_argument("--top-k", type=int, help="sample only the k likeliest next letters")
+    gen.add_argument("--top-p", type=float, default=1.0,
+                     help="sample only the likeliest next letters covering this probability share")
+    gen.add_argument("--unique", action="store_true", help="never write the same name twice")
+    gen.add_argument("--seed", type=int, help="seed for reproducible output")
+
+    run = parser.add_argument_group("execution")
+    run.add_argument("-o", "--output", metavar="PATH", help="output file (default: stdout)")
+    run.add_argument("--workers", type=int, default=1, help="generator processes")
+    run.add_argument("--batch", action="store_true",
+                     help="use the vectorized NumPy sampler (different random stream)")
+    run.add_argument("--chunk-size", type=int, default=10_000, help="names per chunk")
+    run.add_argument("--quiet", action="store_true", help="no progress or summary on stderr")
+    return parser
+
+
+def load_model(args):
+    """Train or load the model described by the parsed arguments.
+
+    Raises:
+        OSError: If a file cannot be read.
+        ValueError: If the training data or options are invalid.
+    """
+    if args.model:
+        return NGramTrie.load(args.model)
+    model = NGramTrie(load_many(args.train), order=args.order, normalize_case=args.normalize,
+                      backoff=args.backoff).freeze()
+    if args.save:
+        model.save(args.save)
+    return model
+
+
+class Progress:
+    """Rate-limited progress line on stderr."""
+
+    def __init__(self, total, stream=sys.stderr, interval=0.5, enabled=True):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.enabled = enabled
+        self.start = self.last = time.perf_counter()
+
+    def update(self, written, force=False):
+        now = time.perf_counter()
+        if not self.enabled or (not force and now - self.last < self.interval):
+            return
+        self.last = now
+        rate = written / (now - self.start) if now > self.start else 0.0
+        pct = 100 * written / self.total if self.total else 100.0
+        self.stream.write(f"\r{written:,}/{self.total:,} names ({pct:.0f}%), {rate:,.0f} names/s")
+        self.stream.flush()
+
+
+def write_names(model, args, out, progress=None):
+    """Generate `args.count` names into the text stream `out`.
+
+    Failed attempts are skipped and, with `args.unique`, repeats of names
+    already written are dropped; both are topped up from further chunks.
+    The job ends early if `STALL_CHUNKS` chunks in a row add nothing.
+
+    Returns:
+        tuple[int, int]: Names written and names generated (including
+        failures and dropped duplicates).
+    """
+    params = dict(target_len=args.target_len, max_len=args.max_len, min_len=args.min_len,
+                  stop_prob=args.stop_prob, retries=args.retries, capitalize=args.capitalize)
+    seen = set() if args.unique else None
+    written = generated = stalled = 0
+    if not args.batch:
+        # Length-guided sampling avoids rejection retries, but only pays off
+        # when a length has to be reached.
+        params["guided"] = args.target_len is not None or args.min_len > 1
+        params.update(prefix=args.prefix, suffix=args.suffix, pattern=args.pattern,
+                      temperature=args.temperature, top_k=args.top_k, top_p=args.top_p)
+    elif args.unique:
+        params["unique"] = True  # also avoid repeats within each vectorized chunk
+    from .parallel import generate_chunks
+
+    chunks = generate_chunks(model, min(args.chunk_size, args.count), workers=args.workers, seed=args.seed,
+                             batch=args.batch, **params)
+    try:
+        for chunk in chunks:
+            generated += len(chunk)
+            names = [s for s in chunk if s]
+            if seen is not None:
+                names = [s for s in dict.fromkeys(names) if s not in seen]
+            names = names[:args.count - written]
+            if seen is not None:
+                seen.update(names)
+            if names:
+                out.write("\n".join(names) + "\n")
+                written += len(names)
+                stalled = 0
+            else:
+                stalled += 1
+            if progress is not None:
+                progress.update(written)
+            if written >= args.count or stalled >= STALL_CHUNKS:
+                break
+    finally:
+        chunks.close()
+    return written, generated
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.count < 0 or args.workers < 1 or args.chunk_size < 1:
+        parser.error("--count must be >= 0, --workers and --chunk-size >= 1")
+    if args.target_len is not None:
+        args.min_len = min(args.min_len, args.target_len)
+    try:
+        _check_lengths(args.target_len, args.max_len, args.min_len)
+        make_constraint(args.prefix, args.suffix, args.pattern)
+        shaped = check_shape(args.temperature, args.top_k, args.top_p) != (1.0, None, 1.0)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.batch and (args.prefix or args.suffix or args.pattern):
+        parser.error("--prefix, --suffix and --pattern are not supported with --batch")
+    if args.batch and shaped:
+        parser.error("--temperature, --top-k and --top-p are not supported with --batch")
+    if args.save and args.model:
+        parser.error("--save needs --train")
+
+    log = (lambda msg: None) if args.quiet else (lambda msg: print(msg, file=sys.stderr))
+    t0 = time.perf_counter()
+    try:
+        model = load_model(args)
+    except (OSError, ValueError) as e:
+        print(f"namegen: {e}", file=sys.stderr)
+        return 1
+    log(f"model ready in {time.perf_counter() - t0:.2f}s (order {model.order})")
+    if args.count == 0:
+        return 0
+
+    if args.output:
+        out = open(args.output, "w", encoding="utf-8", buffering=1 << 20)
+    else:
+        out = sys.stdout
+    progress = Progress(args.count, enabled=not args.quiet and sys.stderr.isatty())
+    t0 = time.perf_counter()
+    try:
+        with out if args.output else contextlib.nullcontext():
+            written, generated = write_names(model, args, out, progress)
+            out.flush()
+    except BrokenPipeError:
+        # Reader went away (e.g. `| head`); silence the error at interpreter exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    dt = time.perf_counter() - t0
+    progress.update(written, force=True)
+    if progress.enabled:
+        sys.stderr.write("\n")
+    log(f"wrote {written:,} names in {dt:.2f}s ({written / dt if dt > 0 else 0:,.0f} names/s, "
+        f"{generated:,} generated)")
+    if written < args.count:
+        log(f"namegen: stopped early, the model produced no new names for {STALL_CHUNKS} chunks")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,699 @@
+"""Constraint-guided generation: required prefix, suffix and regular expression.
+
+Instead of generating names and filtering them afterwards, constraints are
+pushed into sampling:
+
+* A prefix seeds the walk. The candidate starts as the prefix, and its
+  context comes from the prefix itself, or from the start contexts that
+  extend it when it is shorter than the model's context.
+* Suffix and pattern are compiled into one deterministic automaton (DFA)
+  over the model's alphabet. Patterns use a small regex dialect: literals,
+  ``.``, classes ``[a-z]`` / ``[^aeiou]``, groups, ``|``, ``*``, ``+``,
+  ``?`` and ``{m}`` / ``{m,}`` / ``{m,n}``, with ``\\`` escaping. A pattern
+  must match the whole name; ``^`` and ``$`` are accepted and ignored.
+
+`ConstraintTable` is the product of that automaton with the n-gram graph.
+Its states are (context, DFA state) pairs reachable from the start. Like
+`ReachabilityTable`, it keeps per-level probabilities that a walk from a
+state can emit r more characters and end in an accepting DFA state:
+
+    f(s, 0) = accepting(s)
+    f(s, r) = sum over c of p(c | ctx) * f(next(s, c), r - 1)
+
+A second table, e(s, r), counts only walks that end at a natural end (a
+dead end, or a backoff point). Successors are weighted by the probability
+that the rest of the walk satisfies both the constraint and the length
+rules. Every sampled walk therefore ends in an accepting state, so
+rejection only happens on novelty. Levels are computed with NumPy on first
+use, and tables are cached per model and constraint.
+"""
+import functools
+import threading
+
+from .cache import ModelCache
+from .sampling import CumulativeSampler
+
+# Longest repetition a pattern may ask for ({m,n} copies the sub-automaton).
+MAX_REPEAT = 64
+# Product tables kept per model.
+TABLE_CACHE_SIZE = 32
+
+# Kinds of product state: how the walk may end there.
+_CONTINUE, _MAY_END, _MUST_END = 0, 1, 2
+_ANY = (True, frozenset())  # label matching every character
+
+
+class _Parser:
+    """Recursive-descent parser producing a small regex syntax tree.
+
+    Nodes: ("lit", (negated, chars)), ("cat", [nodes]), ("alt", [nodes]),
+    ("rep", node, min, max or None).
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.i = 0
+
+    def parse(self):
+        node = self._alt()
+        if self.i < len(self.text):
+            raise ValueError(f"unexpected {self.text[self.i]!r} at position {self.i} in pattern")
+        return node
+
+    def _peek(self):
+        return self.text[self.i] if self.i < len(self.text) else None
+
+    def _alt(self):
+        parts = [self._concat()]
+        while self._peek() == "|":
+            self.i += 1
+            parts.append(self._concat())
+        return parts[0] if len(parts) == 1 else ("alt", parts)
+
+    def _concat(self):
+        items = []
+        while self._peek() not in (None, "|", ")"):
+            items.append(self._repeat())
+        return ("cat", items)
+
+    def _repeat(self):
+        node = self._atom()
+        while True:
+            c = self._peek()
+            if c == "*":
+                lo, hi = 0, None
+            elif c == "+":
+                lo, hi = 1, None
+            elif c == "?":
+                lo, hi = 0, 1
+            elif c == "{":
+                lo, hi = self._braces()
+                node = ("rep", node, lo, hi)
+                continue
+            else:
+                return node
+            self.i += 1
+            node = ("rep", node, lo, hi)
+
+    def _braces(self):
+        end = self.text.find("}", self.i)
+        if end < 0:
+            raise ValueError("unterminated '{' in pattern")
+        body = self.text[self.i + 1:end]
+        lo, sep, hi = body.partition(",")
+        if not lo.isdigit() or (hi and not hi.isdigit()):
+            raise ValueError(f"invalid repetition {{{body}}} in pattern")
+        lo = int(lo)
+        hi = int(hi) if hi else (None if sep else lo)
+        if (hi is not None and hi < lo) or max(lo, hi or 0) > MAX_REPEAT:
+            raise ValueError(f"invalid repetition {{{body}}} in pattern")
+        self.i = end + 1
+        return lo, hi
+
+    def _atom(self):
+        c = self._peek()
+        if c == "(":
+            self.i += 1
+            node = self._alt()
+            if self._peek() != ")":
+                raise ValueError("missing ')' in pattern")
+            self.i += 1
+            return node
+        if c == "[":
+            return ("lit", self._class())
+        if c == ".":
+            self.i += 1
+            return ("lit", _ANY)
+        if c == "\\":
+            self.i += 1
+            if self._peek() is None:
+                raise ValueError("pattern ends with '\\'")
+            c = self._peek()
+        elif c in ("*", "+", "?", "{", ")"):
+            raise ValueError(f"unexpected {c!r} at position {self.i} in pattern")
+        self.i += 1
+        return ("lit", (False, frozenset(c)))
+
+    def _class(self):
+        self.i += 1
+        negated = self._peek() == "^"
+        if negated:
+            self.i += 1
+        chars = set()
+        first = True
+        while True:
+            c = self._peek()
+            if c is None:
+                raise ValueError("unterminated '[' in pattern")
+            if c == "]" and not first:
+                self.i += 1
+                return (negated, frozenset(chars))
+            if c == "\\":
+                self.i += 1
+                c = self._peek()
+                if c is None:
+                    raise ValueError("unterminated '[' in pattern")
+            self.i += 1
+            first = False
+            if self._peek() == "-" and self.i + 1 < len(self.text) and self.text[self.i + 1] != "]":
+                end = self.text[self.i + 1]
+                self.i += 2
+                if end < c:
+                    raise ValueError(f"invalid range {c}-{end} in pattern")
+                chars.update(map(chr, range(ord(c), ord(end) + 1)))
+            else:
+                chars.add(c)
+
+
+def parse_pattern(pattern):
+    """Parse a pattern into a syntax tree.
+
+    Args:
+        pattern (str): Pattern in the dialect described in the module docs.
+
+    Returns:
+        tuple: Syntax tree.
+
+    Raises:
+        ValueError: If the pattern is malformed.
+    """
+    if pattern.startswith("^"):
+        pattern = pattern[1:]
+    if pattern.endswith("$") and not pattern.endswith("\\$"):
+        pattern = pattern[:-1]
+    return _Parser(pattern).parse()
+
+
+def _literal(text):
+    return ("cat", [("lit", (False, frozenset(c))) for c in text])
+
+
+def _fold(node):
+    """Casefold a syntax tree so it matches the casefolded spelling of what it matched.
+
+    A character may fold to several ("ß" -> "ss"): a literal then becomes a
+    sequence, and a class member an alternative. Negated classes keep the
+    single-character folds only, since folded names never contain the others.
+    """
+    kind = node[0]
+    if kind == "rep":
+        return ("rep", _fold(node[1]), node[2], node[3])
+    if kind != "lit":
+        return (kind, [_fold(n) for n in node[1]])
+    negated, chars = node[1]
+    folds = {c.casefold() for c in chars}
+    single = frozenset(f for f in folds if len(f) == 1)
+    if negated:
+        return ("lit", (True, single))
+    parts = ([("lit", (False, single))] if single else []) + [_literal(f) for f in sorted(folds - single)]
+    return parts[0] if len(parts) == 1 else ("alt", parts)
+
+
+class _NFA:
+    """Thompson construction: epsilon edges and labelled edges per state."""
+
+    def __init__(self):
+        self.eps = []
+        self.edges = []
+
+    def new(self):
+        self.eps.append([])
+        self.edges.append([])
+        return len(self.eps) - 1
+
+    def build(self, node):
+        kind = node[0]
+        if kind == "lit":
+            s, e = self.new(), self.new()
+            self.edges[s].append((node[1], e))
+            return s, e
+        if kind == "cat":
+            s = cur = self.new()
+            for item in node[1]:
+                a, b = self.build(item)
+                self.eps[cur].append(a)
+                cur = b
+            return s, cur
+        if kind == "alt":
+            s, e = self.new(), self.new()
+            for item in node[1]:
+                a, b = self.build(item)
+                self.eps[s].append(a)
+                self.eps[b].append(e)
+            return s, e
+        _, sub, lo, hi = node
+        s = cur = self.new()
+        for _ in range(lo):
+            a, b = self.build(sub)
+            self.eps[cur].append(a)
+            cur = b
+        end = self.new()
+        self.eps[cur].append(end)
+        if hi is None:
+            a, b = self.build(sub)
+            self.eps[cur].append(a)
+            self.eps[b].extend((a, end))
+        else:
+            for _ in range(hi - lo):
+                a, b = self.build(sub)
+                self.eps[cur].append(a)
+                cur = b
+                self.eps[cur].append(end)
+        return s, end
+
+    def closure(self, states):
+        seen = set(states)
+        stack = list(states)
+        while stack:
+            for t in self.eps[stack.pop()]:
+                if t not in seen:
+                    seen.add(t)
+                    stack.append(t)
+        return frozenset(seen)
+
+
+class DFA:
+    """Deterministic automaton over an explicit alphabet, without dead states.
+
+    Attributes:
+        start (int or None): Start state; None if nothing can be accepted.
+        trans (list[dict[str, int]]): Transitions per state. A missing
+            character leads to the (implicit) dead state.
+        accepting (frozenset[int]): Accepting states.
+    """
+
+    __slots__ = ("start", "trans", "accepting")
+
+    def __init__(self, start, trans, accepting):
+        self.start = start
+        self.trans = trans
+        self.accepting = frozenset(accepting)
+
+    @classmethod
+    def from_tree(cls, tree, alphabet):
+        """Subset construction from a syntax tree.
+
+        Args:
+            tree (tuple): Output of `parse_pattern`.
+            alphabet (iterable[str]): Characters the automaton must handle.
+
+        Returns:
+            DFA: Automaton accepting exactly the strings the tree matches.
+        """
+        nfa = _NFA()
+        s, e = nfa.build(tree)
+        alphabet = sorted(set(alphabet))
+        start = nfa.closure([s])
+        ids = {start: 0}
+        trans, accepting = [{}], set()
+        queue = [start]
+        while queue:
+            current = queue.pop()
+            q = ids[current]
+            if e in current:
+                accepting.add(q)
+            for ch in alphabet:
+                moved = [t for st in current for (neg, chars), t in nfa.edges[st] if (ch in chars) != neg]
+                if not moved:
+                    continue
+                target = nfa.closure(moved)
+                if target not in ids:
+                    ids[target] = len(trans)
+                    trans.append({})
+                    queue.append(target)
+                trans[q][ch] = ids[target]
+        return cls(0, trans, accepting)._pruned()
+
+    def intersect(self, other):
+        """Product automaton accepting strings accepted by both.
+
+        Returns:
+            DFA: Intersection of the two languages.
+        """
+        if self.start is None or other.start is None:
+            return DFA(None, [], ())
+        ids = {(self.start, other.start): 0}
+        trans, accepting = [{}], set()
+        queue = [(self.start, other.start)]
+        while queue:
+            a, b = pair = queue.pop()
+            q = ids[pair]
+            if a in self.accepting and b in other.accepting:
+                accepting.add(q)
+            other_trans = other.trans[b]
+            for ch, ta in self.trans[a].items():
+                tb = other_trans.get(ch)
+                if tb is None:
+                    continue
+                nxt = (ta, tb)
+                if nxt not in ids:
+                    ids[nxt] = len(trans)
+                    trans.append({})
+                    queue.append(nxt)
+                trans[q][ch] = ids[nxt]
+        return DFA(0, trans, accepting)._pruned()
+
+    def _pruned(self):
+        # Drop states from which no accepting state is reachable.
+        back = [[] for _ in self.trans]
+        for q, edges in enumerate(self.trans):
+            for t in edges.values():
+                back[t].append(q)
+        live = set(self.accepting)
+        stack = list(live)
+        while stack:
+            for p in back[stack.pop()]:
+                if p not in live:
+                    live.add(p)
+                    stack.append(p)
+        if self.start not in live:
+            return DFA(None, [], ())
+        trans = [{ch: t for ch, t in edges.items() if t in live} if q in live else {}
+                 for q, edges in enumerate(self.trans)]
+        return DFA(self.start, trans, self.accepting)
+
+    def run(self, text, state=None):
+        """Advance from `state` (default: start) over `text`.
+
+        Returns:
+            int or None: Reached state, or None if the text leads nowhere.
+        """
+        q = self.start if state is None else state
+        for ch in text:
+            if q is None:
+                return None
+            q = self.trans[q].get(ch)
+        return q
+
+
+class Constraint:
+    """Required prefix, suffix and/or full-name pattern.
+
+    Constraints are immutable and hashable, so they can key caches.
+
+    Attributes:
+        prefix (str): Required start of the name.
+        suffix (str): Required end of the name.
+        pattern (str or None): Pattern the whole name must match.
+        folded (bool): Whether the constraint was casefolded (see `casefold`).
+    """
+
+    __slots__ = ("prefix", "suffix", "pattern", "folded", "_tree")
+
+    def __init__(self, prefix="", suffix="", pattern=None):
+        """Create a constraint.
+
+        Args:
+            prefix (str): Required start. Default "".
+            suffix (str): Required end. Default "".
+            pattern (str or None): Pattern for the whole name. Default None.
+
+        Raises:
+            ValueError: If the pattern is malformed.
+        """
+        self.prefix = prefix or ""
+        self.suffix = suffix or ""
+        self.pattern = pattern or None
+        self.folded = False
+        self._tree = parse_pattern(self.pattern) if self.pattern else None
+
+    def __eq__(self, other):
+        return isinstance(other, Constraint) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        folded = ", folded=True" if self.folded else ""
+        return f"Constraint(prefix={self.prefix!r}, suffix={self.suffix!r}, pattern={self.pattern!r}{folded})"
+
+    def __bool__(self):
+        return bool(self.prefix or self.suffix or self.pattern)
+
+    def _key(self):
+        return (self.prefix, self.suffix, self.pattern, self.folded)
+
+    def casefold(self):
+        """Return the constraint as a case-normalized model reads it.
+
+        Prefix and suffix are casefolded like the training names
+        (`NGramTrie.norm`). The pattern keeps its text but matches the
+        casefolded spelling of what it matched before, so "ß" matches "ss"
+        and "[A-Z]" matches "a".
+        """
+        folded = Constraint(self.prefix.casefold(), self.suffix.casefold())
+        folded.pattern = self.pattern
+        folded._tree = _fold(self._tree) if self._tree is not None else None
+        folded.folded = True
+        return folded
+
+    def dfa(self, alphabet):
+        """Compile suffix and pattern into one automaton over `alphabet`.
+
+        The automaton reads the whole name, prefix included.
+
+        Args:
+            alphabet (iterable[str]): Characters the model can produce.
+
+        Returns:
+            DFA: Automaton accepting the names that satisfy the suffix and
+            pattern.
+        """
+        alphabet = set(alphabet) | set(self.prefix) | set(self.suffix)
+        anything = ("rep", ("lit", _ANY), 0, None)
+        dfa = DFA.from_tree(("cat", [anything, _literal(self.suffix)]), alphabet)
+        if self._tree is not None:
+            dfa = dfa.intersect(DFA.from_tree(self._tree, alphabet))
+        return dfa
+
+
+class ConstraintTable:
+    """Product of one model with one constraint, with completion probabilities.
+
+    States are (context, DFA state) pairs reachable from the start; kind says
+    whether the walk continues there, may end (backoff point) or must end
+    (dead end).
+
+    Attributes:
+        starts (list[tuple[int, int, int, str]]): Possible openings as
+            (state, count, length, text).
+        next (list[dict[str, tuple[int, float]]]): Per state, the characters
+            that keep the constraint satisfiable, mapped to (next state,
+            p(c | ctx)).
+    """
+
+    def __init__(self, model, constraint):
+        """Build the reachable product graph (levels are computed on demand).
+
+        Args:
+            model (NGramTrie): Trained model.
+            constraint (Constraint): Constraint, already casefolded for
+                case-normalized models.
+        """
+        self.constraint = constraint
+        k = model.order - 1
+        contexts = model.contexts
+        prefix = constraint.prefix
+
+        alphabet = set(prefix)
+        for s in model.start_counts:
+            alphabet.update(s)
+        for node in contexts.values():
+            alphabet.update(node.next_counts)
+        self.dfa = dfa = constraint.dfa(alphabet)
+        q0 = dfa.run(prefix)
+
+        self._ids = {}
+        self._pairs = []
+        self.kind, self.accepting, self.next = [], [], []
+        src, dst, prob = [], [], []
+
+        # (state, start weight, length, text) for every possible opening.
+        self.starts = []
+        if q0 is not None:
+            if len(prefix) >= k:
+                self.starts.append((self._state(prefix[-k:] if k else "", q0), 1, len(prefix), prefix))
+            else:
+                for s, c in model.start_counts.items():
+                    q = dfa.run(s[len(prefix):], q0) if s.startswith(prefix) else None
+                    if q is not None:
+                        self.starts.append((self._state(s[-k:], q), c, len(s), s))
+
+        i = 0
+        while i < len(self.kind):
+            ctx, q = self._pairs[i]
+            node = contexts.get(ctx)
+            kind = _CONTINUE
+            if node is None or not node.next_counts:
+                node = model.backoff_node(ctx) if model.backoff else None
+                kind = _MAY_END if node is not None else _MUST_END
+            self.kind[i] = kind
+            self.accepting[i] = q in dfa.accepting
+            succ = {}
+            if node is not None:
+                counts = node.next_counts
+                total = sum(counts.values())
+                edges = dfa.trans[q]
+                for ch, c in counts.items():
+                    t = edges.get(ch)
+                    if t is None or c <= 0:
+                        continue
+                    j = self._state((ctx + ch)[1:] if k else "", t)
+                    succ[ch] = (j, c / total)
+                    src.append(i)
+                    dst.append(j)
+                    prob.append(c / total)
+            self.next[i] = succ
+            i += 1
+
+        import numpy as np
+
+        n = len(self.kind)
+        self._src = np.asarray(src, dtype=np.int64)
+        self._dst = np.asarray(dst, dtype=np.int64)
+        self._prob = np.asarray(prob, dtype=np.float64)
+        acc = np.asarray(self.accepting, dtype=np.float64).reshape(n)
+        ends = acc * (np.asarray(self.kind, dtype=np.int8).reshape(n) != _CONTINUE)
+        # f levels, cumulative e levels, and the latest e level.
+        self._f = [acc]
+        self._e_cum = [ends]
+        self._e = ends
+        self._samplers = {}
+        self._lock = threading.Lock()
+
+    def _state(self, ctx, q):
+        key = (ctx, q)
+        i = self._ids.get(key)
+        if i is None:
+            i = self._ids[key] = len(self.kind)
+            self._pairs.append(key)
+            self.kind.append(_CONTINUE)
+            self.accepting.append(False)
+            self.next.append(None)
+        return i
+
+    def __len__(self):
+        return len(self.kind)
+
+    def context(self, state):
+        """Return the model context of a product state."""
+        return self._pairs[state][0]
+
+    def _extend(self, r):
+        import numpy as np
+
+        with self._lock:
+            n = len(self.kind)
+            while len(self._f) <= r:
+                f_prev = self._f[-1]
+                self._f.append(np.bincount(self._src, self._prob * f_prev[self._dst], minlength=n))
+                self._e = np.bincount(self._src, self._prob * self._e[self._dst], minlength=n)
+                self._e_cum.append(self._e_cum[-1] + self._e)
+
+    def _level(self, table, r):
+        if r >= len(self._f):
+            self._extend(r)
+        return table[r]
+
+    def weight(self, state, length, target_len, max_len, min_len):
+        """Probability that a walk at `state` with `length` chars ends validly.
+
+        Exact mode (target_len set): it emits exactly target_len - length more
+        characters and ends accepting. Variable mode: it ends, at a natural
+        end or at max_len, with at least min_len characters in an accepting
+        state.
+
+        Returns:
+            float: Completion probability (0.0 if impossible).
+        """
+        if target_len is not None:
+            r = target_len - length
+            return float(self._level(self._f, r)[state]) if r >= 0 else 0.0
+        budget = max_len - length
+        if budget < 0:
+            return 0.0
+        need = max(0, min_len - length)
+        total = float(self._level(self._f, budget)[state])
+        if budget - 1 >= need:
+            total += float(self._level(self._e_cum, budget - 1)[state])
+            if need > 0:
+                total -= float(self._level(self._e_cum, need - 1)[state])
+        return max(total, 0.0)
+
+    def start_sampler(self, target_len, max_len, min_len):
+        """Sampler over indexes into `starts`, weighted by completion probability.
+
+        Returns:
+            CumulativeSampler: Empty-weight sampler if the constraint cannot
+            be met.
+        """
+        key = (None, target_len, max_len, min_len)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            weights = {}
+            for i, (state, count, length, _) in enumerate(self.starts):
+                w = count * self.weight(state, length, target_len, max_len, min_len)
+                if w > 0:
+                    weights[i] = w
+            sampler = self._samplers[key] = CumulativeSampler.from_counts(weights)
+        return sampler
+
+    def step_sampler(self, state, length, target_len, max_len, min_len):
+        """Sampler over the next characters that keep the constraint satisfiable.
+
+        Args:
+            state (int): Current product state.
+            length (int): Characters in the candidate so far.
+            target_len, max_len, min_len: As in `NGramGenerator.generate`.
+
+        Returns:
+            CumulativeSampler: Weighted by p(c | ctx) times the completion
+            probability of the state `c` leads to.
+        """
+        key = (state, length, target_len, max_len, min_len)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            weights = {}
+            for ch, (nxt, p) in self.next[state].items():
+                w = p * self.weight(nxt, length + 1, target_len, max_len, min_len)
+                if w > 0:
+                    weights[ch] = w
+            sampler = self._samplers[key] = CumulativeSampler.from_counts(weights)
+        return sampler
+
+
+@functools.lru_cache(maxsize=256)
+def make_constraint(prefix, suffix, pattern, fold=False):
+    """Build (and memoize) a constraint, casefolded for case-normalized models.
+
+    Args:
+        prefix, suffix, pattern: As in `Constraint`; None means unset.
+        fold (bool): Casefold the constraint (`Constraint.casefold`).
+            Default False.
+
+    Returns:
+        Constraint: The constraint.
+
+    Raises:
+        ValueError: If the pattern is malformed.
+    """
+    constraint = Constraint(prefix or "", suffix or "", pattern)
+    return constraint.casefold() if fold else constraint
+
+
+def constraint_table(model, constraint):
+    """Return the cached product table of `model` and `constraint`.
+
+    Tables live in an LRU (`TABLE_CACHE_SIZE` entries) stored with the
+    model's derived structures, so retraining the model drops them.
+
+    Args:
+        model (NGramTrie): Trained model.
+        constraint (Constraint): Constraint, already casefolded if the model
+            normalizes case.
+
+    Returns:
+        ConstraintTable: Product table.
+    """
+    cache = model.derived("constraints", lambda m: ModelCache(maxsize=TABLE_CACHE_SIZE))
+    return cache.get_or_build(constraint, lambda: ConstraintTable(model, constraint))
@@ -0,0 +1,102 @@
+"""Loading name lists from text files (one name per line).
+
+Each file is parsed once into a de-duplicated tuple of names and cached under
+its path, size and modification time, so editing a file on disk invalidates
+its entry while unchanged files are never re-read. Combined datasets are
+assembled from the cached per-file lists.
+"""
+import mmap
+from pathlib import Path
+
+from .cache import ModelCache
+
+# Files at least this large are decoded straight from a memory map instead of
+# being read into a bytes object first.
+MMAP_THRESHOLD = 1 << 20
+
+# Parsed files, keyed on (path, size, mtime). ModelCache is a generic
+# thread-safe LRU that also coalesces concurrent loads of the same file.
+NAME_CACHE = ModelCache(maxsize=64)
+
+
+def read_names(path):
+    """Read a names file without caching.
+
+    The file is decoded in one pass (via mmap for large files), split into
+    lines, stripped, and de-duplicated in first-seen order. Blank lines are
+    skipped and undecodable bytes ignored.
+
+    Args:
+        path (str or Path): Text file with one name per line.
+
+    Returns:
+        tuple[str, ...]: Names in file order without duplicates.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = str(mm, "utf-8", "ignore")
+        else:
+            text = str(f.read(), "utf-8", "ignore")
+    return tuple(dict.fromkeys(filter(None, map(str.strip, text.splitlines()))))
+
+
+def file_key(path):
+    """Cache key of a file: resolved path, size and modification time.
+
+    Args:
+        path (str or Path): File to stat.
+
+    Returns:
+        tuple: (path, size, mtime_ns).
+
+    Raises:
+        OSError: If the file does not exist.
+    """
+    p = Path(path).resolve()
+    st = p.stat()
+    return (str(p), st.st_size, st.st_mtime_ns)
+
+
+def load_names(path, cache=NAME_CACHE):
+    """Return the names in `path`, parsing the file only if it changed.
+
+    Args:
+        path (str or Path): Text file with one name per line.
+        cache (ModelCache): Cache to use. Default is the module-wide cache.
+
+    Returns:
+        tuple[str, ...]: Names in file order without duplicates.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    return cache.get_or_build(file_key(path), lambda: read_names(path))
+
+
+def load_many(paths, cache=NAME_CACHE):
+    """Combine the names of several files.
+
+    Args:
+        paths (iterable[str | Path]): Files, in the order their names should
+            appear.
+        cache (ModelCache): Cache to use for the per-file lists.
+
+    Returns:
+        list[str]: Names of all files, de-duplicated in first-seen order.
+
+    Raises:
+        OSError: If a file cannot be read.
+    """
+    lists = [load_names(p, cache) for p in paths]
+    if len(lists) == 1:
+        return list(lists[0])
+    merged = {}
+    for names in lists:
+        merged.update(dict.fromkeys(names))
+    return list(merged)
@@ -0,0 +1,637 @@
+"""Flat binary storage for trained models.
+
+A trained `NGramTrie` is written as a handful of contiguous arrays:
+
+    header        magic, format version, flags, order and section sizes
+    alphabet      UTF-8 string of every character used by the model; the
+                  arrays below refer to characters by their index in it
+    child_start   per node, offset of its first child edge (CSR row pointer)
+    edge_char     per edge, character id. Nodes are numbered breadth-first
+                  with children sorted, so edge e always leads to node e + 1
+    count_start   per node, offset of its first successor count
+    count_char    per successor count, character id (insertion order)
+    count_cum     per successor count, running total within its node
+    start_offsets, start_cum, start_blob
+                  start contexts as UTF-8 strings with running totals
+    name_offsets, name_blob
+                  training names, UTF-8 encoded and sorted
+    terminal      per node, 1 if the path to the node spells a training name
+                  (added in format version 2; rebuilt from the names when
+                  reading version 1 files)
+
+Every section starts on an 8-byte boundary, so a loaded file can be read
+through typed `memoryview`s directly over an `mmap`. `FlatNode` and the view
+classes below expose the same surface as `Node` (children, next_counts,
+sampler) without building per-node Python dicts, which lets many processes
+share one page-cached model file.
+"""
+import mmap as _mmap
+import struct
+import sys
+from sys import getsizeof
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Set
+from pathlib import Path
+
+MAGIC = b"NGTRIE\x00\x00"
+FORMAT_VERSION = 2
+
+_FLAG_NORMALIZE_CASE = 1
+_FLAG_BACKOFF = 2
+
+# magic, version, flags, order, alphabet bytes, nodes, edges, counts,
+# starts, start bytes, names, name bytes
+_HEADER = struct.Struct("<8sHHIIIIIIIII")
+_ALIGN = 8
+
+# (section name, array typecode or None for raw bytes)
+_SECTIONS = (
+    ("alphabet", None),
+    ("child_start", "I"),
+    ("edge_char", "H"),
+    ("count_start", "I"),
+    ("count_char", "H"),
+    ("count_cum", "I"),
+    ("start_offsets", "I"),
+    ("start_cum", "I"),
+    ("start_blob", None),
+    ("name_offsets", "I"),
+    ("name_blob", None),
+    ("terminal", "B"),
+)
+
+
+def _check_platform():
+    if sys.byteorder != "little" or array("I").itemsize != 4 or array("H").itemsize != 2:
+        raise RuntimeError("flat model files require a little-endian platform with 32-bit 'I' arrays")
+
+
+class FlatTables:
+    """Typed views over the sections of a flat model.
+
+    Attributes:
+        order (int): n-gram order of the model.
+        normalize_case (bool): Case normalization setting of the model.
+        backoff (bool): Whether the model stores lower-order counts.
+        alphabet (str): Characters indexed by character id.
+        alphabet_index (dict[str, int]): Inverse of `alphabet`.
+        buffer: Object owning the memory (mmap, bytes or None).
+        sections (dict[str, Any]): Raw section arrays keyed by section name.
+    """
+
+    def __init__(self, order, normalize_case, sections, buffer=None, backoff=False):
+        self.order = order
+        self.normalize_case = normalize_case
+        self.backoff = backoff
+        self.buffer = buffer
+        self.sections = sections
+        for name, _ in _SECTIONS:
+            setattr(self, name, sections.get(name))
+        self.alphabet = bytes(sections["alphabet"]).decode("utf-8")
+        self.alphabet_index = {ch: i for i, ch in enumerate(self.alphabet)}
+        if self.terminal is None:
+            self.terminal = sections["terminal"] = self._terminal_from_names()
+        self._samplers = None
+
+    @property
+    def n_nodes(self):
+        return len(self.child_start) - 1
+
+    def sampler(self, index):
+        """Return the sampler of node `index` (None if it has no counts), built on first use."""
+        samplers = self._samplers
+        if samplers is None:
+            samplers = self._samplers = [None] * self.n_nodes
+        sampler = samplers[index]
+        if sampler is None:
+            lo, hi = self.count_start[index], self.count_start[index + 1]
+            if lo == hi:
+                return None
+            sampler = samplers[index] = FlatSampler(self.count_cum, lo, hi, self._count_key)
+        return sampler
+
+    def _count_key(self, j):
+        return self.alphabet[self.count_char[j]]
+
+    def _terminal_from_names(self):
+        """Compute the terminal flags of a version 1 file from its name list."""
+        terminal = array("B", bytes(self.n_nodes))
+        names = NameSetView(self)
+        for name in names:
+            node = 0
+            for ch in name:
+                cid = self.alphabet_index.get(ch)
+                lo, hi = self.child_start[node], self.child_start[node + 1]
+                e = bisect_left(self.edge_char, cid, lo, hi) if cid is not None else hi
+                if e >= hi or self.edge_char[e] != cid:
+                    break
+                node = e + 1
+            else:
+                terminal[node] = 1
+        return terminal
+
+    @classmethod
+    def from_model(cls, model):
+        """Flatten a trained model into in-memory arrays.
+
+        Args:
+            model (NGramTrie): Trained model (dict-backed or flat).
+
+        Returns:
+            FlatTables: Tables backed by `array.array` objects.
+
+        Raises:
+            ValueError: If the model uses more than 65536 distinct characters,
+                or has fractional counts (see `NGramTrie.combine`).
+        """
+        chars = set()
+        stack = [model.root]
+        while stack:
+            node = stack.pop()
+            chars.update(node.children)
+            chars.update(node.next_counts)
+            stack.extend(node.children.values())
+        alphabet = "".join(sorted(chars))
+        if len(alphabet) > 0xFFFF:
+            raise ValueError("flat storage supports at most 65536 distinct characters")
+        index = {ch: i for i, ch in enumerate(alphabet)}
+
+        child_start, edge_char, terminal = array("I", [0]), array("H"), array("B")
+        count_start, count_char, count_cum = array("I", [0]), array("H"), array("I")
+        nodes = [model.root]
+        i = 0
+        while i < len(nodes):
+            node = nodes[i]
+            i += 1
+            terminal.append(1 if node.terminal else 0)
+            for ch in sorted(node.children):
+                edge_char.append(index[ch])
+                nodes.append(node.children[ch])
+            child_start.append(len(edge_char))
+            acc = 0
+            for ch, c in node.next_counts.items():
+                if not isinstance(c, int):
+                    raise ValueError("flat storage needs integer counts, not fractional weights")
+                acc += c
+                count_char.append(index[ch])
+                count_cum.append(acc)
+            count_start.append(len(count_char))
+
+        start_offsets, start_blob = _pack_strings(model.start_counts.keys())
+        start_cum = array("I")
+        acc = 0
+        for c in model.start_counts.values():
+            if not isinstance(c, int):
+                raise ValueError("flat storage needs integer counts, not fractional weights")
+            acc += c
+            start_cum.append(acc)
+        name_offsets, name_blob = _pack_strings(sorted(model.names))
+
+        sections = {
+            "alphabet": alphabet.encode("utf-8"),
+            "child_start": child_start,
+            "edge_char": edge_char,
+            "count_start": count_start,
+            "count_char": count_char,
+            "count_cum": count_cum,
+            "start_offsets": start_offsets,
+            "start_cum": start_cum,
+            "start_blob": start_blob,
+            "name_offsets": name_offsets,
+            "name_blob": name_blob,
+            "terminal": terminal,
+        }
+        return cls(model.order, model.normalize_case, sections, backoff=model.backoff)
+
+    def write(self, path):
+        """Write the tables to `path` in the flat binary format.
+
+        Args:
+            path (str or Path): Destination file.
+        """
+        _check_platform()
+        payloads = [bytes(self.sections[name]) if code is None else self.sections[name].tobytes()
+                    for name, code in _SECTIONS]
+        flags = (_FLAG_NORMALIZE_CASE if self.normalize_case else 0) | (_FLAG_BACKOFF if self.backoff else 0)
+        header = _HEADER.pack(
+            MAGIC, FORMAT_VERSION, flags, self.order,
+            len(payloads[0]),
+            self.n_nodes,
+            len(self.edge_char),
+            len(self.count_char),
+            len(self.start_cum),
+            len(payloads[8]),
+            len(self.name_offsets) - 1,
+            len(payloads[10]),
+        )
+        with open(path, "wb") as f:
+            f.write(header)
+            pos = len(header)
+            for payload in payloads:
+                pad = -pos % _ALIGN
+                f.write(b"\x00" * pad)
+                f.write(payload)
+                pos += pad + len(payload)
+
+    @classmethod
+    def read(cls, path, mmap=True):
+        """Open a flat model file.
+
+        Args:
+            path (str or Path): File written by `write`.
+            mmap (bool): If True, map the file instead of reading it.
+
+        Returns:
+            FlatTables: Tables whose sections are memoryviews into the file.
+
+        Raises:
+            ValueError: If the file is not a flat model or has an unsupported version.
+        """
+        _check_platform()
+        with open(path, "rb") as f:
+            if mmap:
+                buf = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+            else:
+                buf = f.read()
+        if len(buf) < _HEADER.size:
+            raise ValueError(f"{path}: file too short for a model header")
+        (magic, version, flags, order, n_alpha, n_nodes, n_edges, n_counts,
+         n_starts, n_start_bytes, n_names, n_name_bytes) = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a namegen model file")
+        if version not in (1, FORMAT_VERSION):
+            raise ValueError(f"{path}: unsupported model format version {version}")
+
+        lengths = {
+            "alphabet": n_alpha,
+            "child_start": n_nodes + 1,
+            "edge_char": n_edges,
+            "count_start": n_nodes + 1,
+            "count_char": n_counts,
+            "count_cum": n_counts,
+            "start_offsets": n_starts + 1,
+            "start_cum": n_starts,
+            "start_blob": n_start_bytes,
+            "name_offsets": n_names + 1,
+            "name_blob": n_name_bytes,
+            "terminal": n_nodes,
+        }
+        view = memoryview(buf)
+        sections = {}
+        pos = _HEADER.size
+        for name, code in _SECTIONS:
+            if name == "terminal" and version < 2:
+                continue
+            pos += -pos % _ALIGN
+            size = lengths[name] * (array(code).itemsize if code else 1)
+            if pos + size > len(buf):
+                raise ValueError(f"{path}: truncated model file")
+            section = view[pos:pos + size]
+            sections[name] = section.cast(code) if code else section
+            pos += size
+        return cls(order, bool(flags & _FLAG_NORMALIZE_CASE), sections, buffer=buf,
+                   backoff=bool(flags & _FLAG_BACKOFF))
+
+    def string_at(self, offsets, blob, i):
+        """Decode the i-th string of a packed string section."""
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+
+def _pack_strings(strings):
+    offsets, blob = array("I", [0]), bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+class FlatSampler:
+    """`CumulativeSampler` equivalent reading a slice of a cumulative array."""
+
+    __slots__ = ("_cum", "_lo", "_hi", "_key")
+
+    def __init__(self, cum, lo, hi, key):
+        self._cum, self._lo, self._hi, self._key = cum, lo, hi, key
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    @property
+    def total(self):
+        return self._cum[self._hi - 1] if self._hi > self._lo else 0
+
+    def sample(self, rng):
+        """Sample one key in O(log k), with the same rule as `sample_weighted`."""
+        total = self.total
+        if total <= 0:
+            return None
+        i = bisect_left(self._cum, rng.random() * total, self._lo, self._hi)
+        return self._key(i if i < self._hi else self._lo)
+
+
+class FlatNode:
+    """Read-only view of one trie node stored in `FlatTables`."""
+
+    __slots__ = ("_t", "_i")
+
+    def __init__(self, tables, index):
+        self._t = tables
+        self._i = index
+
+    @property
+    def children(self):
+        return _ChildrenView(self._t, self._i)
+
+    @property
+    def next_counts(self):
+        return _CountsView(self._t, self._i)
+
+    @property
+    def terminal(self):
+        return bool(self._t.terminal[self._i])
+
+    @property
+    def sampler(self):
+        return self._t.sampler(self._i)
+
+    def __eq__(self, other):
+        return isinstance(other, FlatNode) and other._t is self._t and other._i == self._i
+
+    def __hash__(self):
+        return hash((id(self._t), self._i))
+
+
+class _ChildrenView(Mapping):
+    __slots__ = ("_t", "_lo", "_hi")
+
+    def __init__(self, tables, index):
+        self._t = tables
+        self._lo, self._hi = tables.child_start[index], tables.child_start[index + 1]
+
+    def get(self, ch, default=None):
+        cid = self._t.alphabet_index.get(ch)
+        if cid is None:
+            return default
+        e = bisect_left(self._t.edge_char, cid, self._lo, self._hi)
+        if e < self._hi and self._t.edge_char[e] == cid:
+            return FlatNode(self._t, e + 1)
+        return default
+
+    def __getitem__(self, ch):
+        node = self.get(ch)
+        if node is None:
+            raise KeyError(ch)
+        return node
+
+    def __contains__(self, ch):
+        return self.get(ch) is not None
+
+    def __iter__(self):
+        t = self._t
+        return (t.alphabet[t.edge_char[e]] for e in range(self._lo, self._hi))
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def values(self):
+        return [FlatNode(self._t, e + 1) for e in range(self._lo, self._hi)]
+
+    def items(self):
+        t = self._t
+        return [(t.alphabet[t.edge_char[e]], FlatNode(t, e + 1)) for e in range(self._lo, self._hi)]
+
+
+class _CumulativeView(Mapping):
+    """Mapping over a slice of a cumulative array; `key(j)` decodes the key at position j."""
+
+    __slots__ = ("_cum", "_lo", "_hi", "_key")
+
+    def __init__(self, cum, lo, hi, key):
+        self._cum, self._lo, self._hi, self._key = cum, lo, hi, key
+
+    def _count_at(self, j):
+        c = self._cum[j]
+        return c - self._cum[j - 1] if j > self._lo else c
+
+    def __getitem__(self, key):
+        for j in range(self._lo, self._hi):
+            if self._key(j) == key:
+                return self._count_at(j)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (self._key(j) for j in range(self._lo, self._hi))
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def values(self):
+        return [self._count_at(j) for j in range(self._lo, self._hi)]
+
+    def items(self):
+        return [(self._key(j), self._count_at(j)) for j in range(self._lo, self._hi)]
+
+
+class _CountsView(_CumulativeView):
+    __slots__ = ()
+
+    def __init__(self, tables, index):
+        super().__init__(tables.count_cum, tables.count_start[index], tables.count_start[index + 1],
+                         tables._count_key)
+
+
+class StartCountsView(_CumulativeView):
+    """Read-only `start_counts` mapping of a flat model."""
+
+    __slots__ = ()
+
+    def __init__(self, tables):
+        super().__init__(tables.start_cum, 0, len(tables.start_cum),
+                         lambda j: tables.string_at(tables.start_offsets, tables.start_blob, j))
+
+    def sampler(self):
+        return FlatSampler(self._cum, self._lo, self._hi, self._key)
+
+
+class NameSetView(Set):
+    """Read-only set of training names, searched by bisection over sorted UTF-8."""
+
+    __slots__ = ("_t",)
+
+    def __init__(self, tables):
+        self._t = tables
+
+    def _bytes_at(self, i):
+        t = self._t
+        return bytes(t.name_blob[t.name_offsets[i]:t.name_offsets[i + 1]])
+
+    def __contains__(self, name):
+        if not isinstance(name, str):
+            return False
+        key = name.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self) and self._bytes_at(lo) == key
+
+    def __iter__(self):
+        return (self._bytes_at(i).decode("utf-8") for i in range(len(self)))
+
+    def __len__(self):
+        return len(self._t.name_offsets) - 1
+
+
+class ContextIndexView(Mapping):
+    """Context index of a flat model, resolved on first use and memoized.
+
+    Building the full index eagerly would recreate a Python dict per context at
+    load time, so contexts are looked up in the arrays on demand instead.
+    """
+
+    __slots__ = ("_model", "_cache")
+
+    def __init__(self, model):
+        self._model = model
+        self._cache = {"": model.root} if model.order == 1 else {}
+
+    def get(self, ctx, default=None):
+        try:
+            node = self._cache[ctx]
+        except KeyError:
+            m = self._model
+            node = m.get_node_chars(ctx) if len(ctx) == m.order - 1 else None
+            self._cache[ctx] = node
+        return default if node is None else node
+
+    def __getitem__(self, ctx):
+        node = self.get(ctx)
+        if node is None:
+            raise KeyError(ctx)
+        return node
+
+    def __contains__(self, ctx):
+        return self.get(ctx) is not None
+
+    def __iter__(self):
+        return iter(self._model.index_contexts())
+
+    def __len__(self):
+        return len(self._model.index_contexts())
+
+
+def save(model, path):
+    """Write `model` to `path` in the flat binary format.
+
+    Args:
+        model (NGramTrie): Trained model.
+        path (str or Path): Destination file.
+    """
+    FlatTables.from_model(model).write(Path(path))
+
+
+def attach(model, tables):
+    """Point `model` at flat tables instead of dict-backed nodes.
+
+    Args:
+        model (NGramTrie): Model to rewire; its order, case and backoff settings are
+            taken from `tables`.
+        tables (FlatTables): Tables to read from.
+
+    Returns:
+        NGramTrie: `model`, now frozen and read-only.
+    """
+    model.order = tables.order
+    model.normalize_case = tables.normalize_case
+    model.backoff = tables.backoff
+    model.root = FlatNode(tables, 0)
+    model.names = NameSetView(tables)
+    model.start_counts = StartCountsView(tables)
+    model.start_sampler = model.start_counts.sampler()
+    model.contexts = ContextIndexView(model)
+    model._derived = {}
+    model.frozen = True
+    model.storage = tables
+    return model
+
+
+def inflate(model, tables):
+    """Rebuild dict-backed `Node` objects for `model` from flat tables.
+
+    Args:
+        model (NGramTrie): Model to fill; its order, case and backoff settings are
+            taken from `tables`.
+        tables (FlatTables): Tables to copy from.
+
+    Returns:
+        NGramTrie: `model`, mutable and unfrozen.
+    """
+    from .trie import Node, TrieNameSet
+
+    t = tables
+    nodes = [Node() for _ in range(t.n_nodes)]
+    for i, node in enumerate(nodes):
+        for e in range(t.child_start[i], t.child_start[i + 1]):
+            node.children[t.alphabet[t.edge_char[e]]] = nodes[e + 1]
+        node.next_counts = dict(_CountsView(t, i).items())
+        node.terminal = bool(t.terminal[i])
+
+    model.order = t.order
+    model.normalize_case = t.normalize_case
+    model.backoff = t.backoff
+    model.root = nodes[0]
+    model.names = set(NameSetView(t)) if model.keep_names else TrieNameSet(model)
+    model.start_counts = dict(StartCountsView(t).items())
+    model.start_sampler = None
+    model.contexts = model.index_contexts()
+    model._derived = {}
+    model.frozen = False
+    model.storage = None
+    return model
+
+
+def memory_report(model):
+    """Estimate the memory held by `model`.
+
+    For the dict backend this is the deep size of the nodes, their dicts and
+    samplers, the start counts and the names set. For the compact backend it is
+    the size of the backing arrays.
+
+    Args:
+        model (NGramTrie): Trained model.
+
+    Returns:
+        dict: backend ("dict" or "compact"), nodes, bytes and bytes_per_node.
+    """
+    tables = model.storage
+    if tables is not None:
+        total = sum(memoryview(v).nbytes for v in tables.sections.values())
+        total += getsizeof(tables.alphabet) + getsizeof(tables.alphabet_index)
+        n_nodes = tables.n_nodes
+        backend = "compact"
+    else:
+        total, n_nodes = 0, 0
+        stack = [model.root]
+        while stack:
+            node = stack.pop()
+            n_nodes += 1
+            total += getsizeof(node) + getsizeof(node.children) + getsizeof(node.next_counts)
+            if node.sampler is not None:
+                total += getsizeof(node.sampler) + getsizeof(node.sampler.keys) + getsizeof(node.sampler.cumulative)
+            stack.extend(node.children.values())
+        for counts in getattr(model, "start_counts_by_order", {model.order: model.start_counts}).values():
+            total += getsizeof(counts) + sum(getsizeof(k) for k in counts)
+        total += getsizeof(model.names)
+        if isinstance(model.names, set):
+            total += sum(getsizeof(n) for n in model.names)
+        backend = "dict"
+    return {
+        "backend": backend,
+        "nodes": n_nodes,
+        "bytes": total,
+        "bytes_per_node": total / n_nodes if n_nodes else 0.0,
+    }
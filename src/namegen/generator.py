@@ -6,7 +6,10 @@ new, name-like strings.
 
 """
 import random
+import time
 from .trie import NGramTrie
+from .reach import ReachabilityTable
+from .sampling import shaped_samplers
 
 def sample_weighted(weights, rng=None):
     """Sample a key from a dictionary of weighted counts.
@@ -33,14 +36,39 @@ def sample_weighted(weights, rng=None):
 
 
 
+def _check_lengths(target_len, max_len, min_len):
+    """Validate length arguments shared by the generation methods."""
+    if target_len is not None:
+        if target_len > max_len:
+            raise ValueError("target_len cannot exceed max_len")
+        if min_len > target_len:
+            raise ValueError("min_len cannot exceed target_len when target_len is set")
+    else:
+        if min_len < 1:
+            raise ValueError("min_len must be >= 1")
+        if min_len > max_len:
+            raise ValueError("min_len cannot exceed max_len")
+
+
 class NGramGenerator:
-    """Generates names from a previously built NGramTrie."""
+    """Generates names from a previously built NGramTrie.
+
+    Attributes:
+        stats (GenerationStats or None): If set, `generate` records attempts,
+            dead ends, rejections and latency into it.
+        step_hook (Callable[[str or None, str], None] or None): If set, called
+            after every sampling step with the context sampled from (None for
+            the start context) and the sampled character or start context.
+    """
 
-    def __init__(self, model, rng=None):
+    def __init__(self, model, rng=None, stats=None, step_hook=None):
        self.model = model
        self._rng = rng if rng is not None else random.Random()  
+       self.stats = stats
+       self.step_hook = step_hook
     
-    def generate(self, target_len=None, max_len=20, min_len=1, stop_prob=0.20, retries=500, capitalize=True):
+    def generate(self, target_len=None, max_len=20, min_len=1, stop_prob=0.20, retries=500, capitalize=True,
+                 guided=False, prefix=None, suffix=None, pattern=None, temperature=1.0, top_k=None, top_p=1.0):
         """Generate a new name using the n-gram model.
 
         You can call this with no arguments to get a random name.  
@@ -59,27 +87,83 @@ class NGramGenerator:
                 giving up. Default is 500.
             capitalize (bool): If True, capitalize the first letter of the
                 result. Default is True.
+            guided (bool): If True, only sample continuations that can still
+                reach target_len (or min_len in variable mode), using the
+                model's reachability table. Attempts then fail only on
+                novelty, not on length. Default is False.
+            prefix (str or None): Required start of the name. The walk is
+                seeded with it instead of filtering afterwards.
+            suffix (str or None): Required end of the name.
+            pattern (str or None): Pattern the whole name must match (see
+                `namegen.constraints` for the syntax). Suffix and pattern
+                are compiled into an automaton, and only continuations that
+                can still satisfy it (and the length rules) are sampled.
+                Constraints are matched before capitalization, casefolded
+                for case-normalized models.
+            temperature (float): Sharpens (< 1) or flattens (> 1) every
+                start and successor distribution. Default 1.0.
+            top_k (int or None): Sample only from the k most frequent
+                successors. None or 0 disables it.
+            top_p (float): Sample only from the most frequent successors
+                that together reach this probability. Default 1.0 (off).
+                The three settings apply to unguided steps; guided and
+                constrained steps use their own weights. Shaped tables are
+                built once per setting and cached (see
+                `namegen.sampling.shaped_samplers`).
 
         Returns:
             str or None: A generated name, or None if no valid name could
             be created after retries.
+
+        Raises:
+            ValueError: On invalid length arguments, a malformed pattern or
+                out-of-range sampling settings.
         """
-        if target_len is not None:
-            if target_len > max_len:
-                raise ValueError("target_len cannot exceed max_len")
-            if min_len > target_len:
-                raise ValueError("min_len cannot exceed target_len when target_len is set")
-        else:
-            if min_len < 1:
-                raise ValueError("min_len must be >= 1")
-            if min_len > max_len:
-                raise ValueError("min_len cannot exceed max_len")
+        _check_lengths(target_len, max_len, min_len)
+        constraint = self._constraint(prefix, suffix, pattern)
+        shape = shaped_samplers(self.model, temperature, top_k, top_p)
+        stats = self.stats
+        if stats is None:
+            return self._generate(target_len, max_len, min_len, stop_prob, retries, capitalize, guided, constraint,
+                                  shape)
+        t0 = time.perf_counter()
+        result = self._generate(target_len, max_len, min_len, stop_prob, retries, capitalize, guided, constraint,
+                                shape)
+        stats.record_call(result, time.perf_counter() - t0)
+        return result
+
+    def _constraint(self, prefix, suffix, pattern):
+        if not (prefix or suffix or pattern):
+            return None
+        from .constraints import make_constraint
+        return make_constraint(prefix, suffix, pattern, self.model.normalize_case)
+
+    def _generate(self, target_len, max_len, min_len, stop_prob, retries, capitalize, guided, constraint=None,
+                  shape=None):
+        stats = self.stats
+        table = None
+        if constraint is not None:
+            from .constraints import constraint_table
+            table = constraint_table(self.model, constraint)
+            if table.start_sampler(target_len, max_len, min_len).total <= 0:
+                return None
+        elif guided and not self._reachable(target_len, min_len):
+            return None
 
         for _ in range(retries):
-            candidate = self.generate_once(target_len, max_len, min_len, stop_prob)
-            if not candidate:
-                continue
-            if candidate in self.model.names:
+            if table is None:
+                candidate, is_name = self._attempt(target_len, max_len, min_len, stop_prob, guided, shape)
+            else:
+                candidate, is_name = self._constrained_attempt(table, target_len, max_len, min_len, stop_prob)
+            if stats is not None:
+                stats.attempts += 1
+                stats.chars += len(candidate)
+            if not candidate or is_name:
+                if stats is not None:
+                    if candidate:
+                        stats.rejected_training += 1
+                    else:
+                        stats.rejected_empty += 1
                 continue
             if target_len is not None:
                 ok = (len(candidate) == target_len)
@@ -87,9 +171,101 @@ class NGramGenerator:
                 ok = (len(candidate) >= min_len)
             if ok:
                 return candidate.capitalize() if capitalize else candidate
+            if stats is not None:
+                stats.rejected_length += 1
         return None
 
-    def generate_once(self, target_len, max_len, min_len, stop_prob):
+    def iter_names(self, limit=None, patience=50, **params):
+        """Lazily stream novel, de-duplicated names.
+
+        Args:
+            limit (int or None): Stop after this many names. None streams
+                until the model is exhausted.
+            patience (int): Number of consecutive `generate` calls without a
+                new name after which the model's name space is considered
+                exhausted. Default is 50.
+            **params: Passed to `generate` (target_len, max_len, ...).
+
+        Returns:
+            NameStream: Iterator over new names. Its `exhausted` attribute
+            is set when the stream ended because no new names were found.
+
+        Raises:
+            ValueError: On invalid length arguments, as in `generate`.
+        """
+        _check_lengths(params.get("target_len"), params.get("max_len", 20), params.get("min_len", 1))
+        return NameStream(self, limit=limit, patience=patience, **params)
+
+    def generate_batch(self, n, target_len=None, max_len=20, min_len=1, stop_prob=0.20, retries=500,
+                       capitalize=True, unique=False, seed=None):
+        """Generate many names at once with vectorized NumPy sampling.
+
+        Candidate walkers are advanced in lockstep over integer tables compiled
+        from the model (cached until the model is retrained). Length, stop,
+        backoff and novelty rules are the same as in `generate`, so this is a
+        drop-in replacement for calling `generate` `n` times, but much faster
+        for large `n`. The random stream differs from `generate`, so the two do
+        not produce the same names for the same seed.
+
+        Args:
+            n (int): Number of names to generate.
+            target_len, max_len, min_len, stop_prob, capitalize: As in `generate`.
+            retries (int): Attempt budget per requested name. Default is 500.
+            unique (bool): If True, never return the same name twice in a batch.
+            seed (int or None): Seed for NumPy's generator. If None, a seed is
+                drawn from this generator's RNG, so seeded generators stay
+                reproducible.
+
+        Returns:
+            list[str or None]: `n` entries; None where no valid name was found
+            within the attempt budget.
+
+        Raises:
+            ValueError: On invalid length arguments, as in `generate`.
+        """
+        import numpy as np
+        from .vectorized import ArrayTables, generate_batch
+
+        _check_lengths(target_len, max_len, min_len)
+        if seed is None:
+            seed = self._rng.getrandbits(64)
+        tables = self.model.derived("arrays", ArrayTables)
+        out = generate_batch(
+            tables, n, np.random.default_rng(seed),
+            target_len=target_len, max_len=max_len, min_len=min_len, stop_prob=stop_prob,
+            retries=retries, unique=unique,
+        )
+        if capitalize:
+            out = [s.capitalize() for s in out]
+        return out + [None] * (n - len(out))
+
+    def generate_parallel(self, n, workers=None, seed=None, unique=False, **params):
+        """Generate names on a pool of worker processes.
+
+        Each worker gets the model without per-task pickling and its own
+        deterministic RNG stream derived from `seed`, so the same seed and
+        worker count always give the same list. See
+        `namegen.parallel.generate_parallel`.
+
+        Args:
+            n (int): Number of names to generate.
+            workers (int or None): Number of processes. Default is os.cpu_count().
+            seed (int or None): Job seed. If None, one is drawn from this
+                generator's RNG.
+            unique (bool): De-duplicate names across workers.
+            **params: Passed to `generate` (target_len, max_len, ...).
+
+        Returns:
+            list[str or None]: `n` entries, None where no valid name was found.
+        """
+        from .parallel import generate_parallel
+
+        _check_lengths(params.get("target_len"), params.get("max_len", 20), params.get("min_len", 1))
+        if seed is None:
+            seed = self._rng.getrandbits(64)
+        return generate_parallel(self.model, n, workers=workers, seed=seed, unique=unique, **params)
+
+    def generate_once(self, target_len, max_len, min_len, stop_prob, guided=False):
         """Attempt to generate a single name candidate.
 
         Args:
@@ -97,27 +273,67 @@ class NGramGenerator:
             max_len (int): Maximum length of the name.
             stop_prob (float): Stop probability in variable-length mode.
             rng (random.Random): Random number generator.
+            guided (bool): Sample only continuations that can still reach the
+                required length (see `ReachabilityTable`).
 
         Returns:
             str: Candidate name (may be empty if generation failed).
         """
-        m = self.model 
+        return self._attempt(target_len, max_len, min_len, stop_prob, guided)[0]
+
+    def _attempt(self, target_len, max_len, min_len, stop_prob, guided, shape=None):
+        """Run one `generate_once` attempt.
+
+        The walk follows the candidate's own path through the prefix trie next
+        to the rolling context, so whether the current prefix is a training
+        name is read from the node's terminal marker instead of joining the
+        characters and hashing the string at every step.
+
+        Returns:
+            tuple[str, bool]: The candidate and whether it is a training name.
+        """
+        m = self.model
+        contexts = m.contexts
+        k = m.order - 1
+        reach = m.derived("reach", ReachabilityTable) if guided else None
+        stats = self.stats
+        hook = self.step_hook
+
+        def required(length):
+            # Characters that must still follow once the name has `length` chars
+            # (negative in exact mode when `length` already overshoots target_len).
+            if target_len is not None:
+                return target_len - length
+            return max(0, min_len - length)
 
         if m.order == 1:
             if not m.root.next_counts:
-                return ""
-            first = sample_weighted(m.root.next_counts, self._rng)
+                return "", False
+            if reach is not None and required(1) != 0:
+                first = reach.successor_sampler("", required(1)).sample(self._rng)
+            else:
+                first = self._draw(m.root.next_counts, m.root.sampler, shape, "")
             if first is None:
-                return ""
+                return "", False
             name_chars = [first]
+            ctx = ""
+            pos = m.root.children.get(first)
+            if hook is not None:
+                hook(None, first)
         else:
             if not m.start_counts:
-                return ""
-            start_ctx =  sample_weighted(m.start_counts, self._rng)
+                return "", False
+            if reach is not None and required(k) != 0:
+                start_ctx = reach.start_sampler(required(k)).sample(self._rng)
+            else:
+                start_ctx = self._draw(m.start_counts, m.start_sampler, shape, None)
             if start_ctx is None:
-                return ""
+                return "", False
             name_chars = list(start_ctx)
-
+            ctx = start_ctx
+            pos = m.get_node_chars(start_ctx)
+            if hook is not None:
+                hook(None, start_ctx)
 
         while len(name_chars) < max_len:
             if target_len is not None and len(name_chars) >= target_len:
@@ -125,25 +341,162 @@ class NGramGenerator:
             if (
                 target_len is None
                 and len(name_chars) >= min_len
-                and "".join(name_chars) in m.names
+                and pos is not None
+                and pos.terminal
                 and self._rng.random() < stop_prob
             ):
                 break
 
-            if m.order == 1:
-                succ = m.root.next_counts
+            node = contexts.get(ctx)
+            backed_off = node is None or not node.next_counts
+            if backed_off:
+                fallback = m.backoff_node(ctx) if m.backoff else None
+                if fallback is None:
+                    if stats is not None:
+                        if node is None:
+                            stats.dead_ends_missing += 1
+                        else:
+                            stats.dead_ends_empty += 1
+                    break
+                node = fallback
+                if stats is not None:
+                    stats.backoffs += 1
+                # A plain model always ends the name here; with backoff a
+                # missing context is a possible end, taken with stop_prob.
+                if target_len is None and len(name_chars) >= min_len and self._rng.random() < stop_prob:
+                    break
+            if reach is not None and required(len(name_chars) + 1) > 0:
+                ch = reach.successor_sampler(ctx, required(len(name_chars) + 1)).sample(self._rng)
             else:
-                ctx = "".join(name_chars[-(m.order - 1):])
-                node = m.get_node(ctx)
-                succ = node.next_counts if node else {}
+                # Shaped samplers are keyed by context; a backoff node is keyed
+                # by the context it stands in for.
+                ch = self._draw(node.next_counts, node.sampler, shape, (ctx,) if backed_off else ctx)
+            if ch is None:
+                break
+            if hook is not None:
+                hook(ctx, ch)
+            name_chars.append(ch)
+            if k:
+                ctx = ctx[1:] + ch
+            if pos is not None:
+                pos = pos.children.get(ch)
+
+        return "".join(name_chars), pos is not None and pos.terminal
 
-            if not succ:
+    def _constrained_attempt(self, table, target_len, max_len, min_len, stop_prob):
+        """Run one attempt on the product of the model and a constraint automaton.
+
+        Every step samples from `table.step_sampler`, which only offers
+        characters after which the constraint and the length rules can still
+        be met. The walk ends where the model would end it (a dead end, or
+        max_len / target_len); at a backoff point it may also stop with
+        stop_prob. Variable-mode stops at training names are skipped because
+        such candidates are always rejected.
+
+        Returns:
+            tuple[str, bool]: The candidate ("" if the walk did not end in
+            an accepting state) and whether it is a training name.
+        """
+        from .constraints import _MAY_END, _MUST_END
+
+        rng = self._rng
+        hook = self.step_hook
+        i = table.start_sampler(target_len, max_len, min_len).sample(rng)
+        if i is None:
+            return "", False
+        state, _, length, text = table.starts[i]
+        name_chars = list(text)
+        pos = self.model.get_node_chars(text)
+        if hook is not None:
+            hook(None, text)
+        end = target_len if target_len is not None else max_len
+        while length < end:
+            kind = table.kind[state]
+            if kind == _MUST_END:
+                break
+            if (kind == _MAY_END and target_len is None and length >= min_len
+                    and table.accepting[state] and rng.random() < stop_prob):
                 break
-            ch = sample_weighted(succ, self._rng)
+            ch = table.step_sampler(state, length, target_len, max_len, min_len).sample(rng)
             if ch is None:
                 break
+            if hook is not None:
+                hook(table.context(state), ch)
             name_chars.append(ch)
+            state = table.next[state][ch][0]
+            length += 1
+            if pos is not None:
+                pos = pos.children.get(ch)
+        if not table.accepting[state]:
+            return "", False
+        return "".join(name_chars), pos is not None and pos.terminal
+
+    def _reachable(self, target_len, min_len):
+        """Return False if no walk of the model can reach the required length."""
+        m = self.model
+        reach = m.derived("reach", ReachabilityTable)
+        first = max(m.order - 1, 1)
+        r = target_len - first if target_len is not None else max(0, min_len - first)
+        if r < 0:
+            return False
+        sampler = reach.start_sampler(r) if m.order > 1 else reach.successor_sampler("", r)
+        return sampler.total > 0
+
+    def _draw(self, counts, sampler, shape=None, key=None):
+        """Sample from a compiled sampler when the model is frozen, else from raw counts.
+
+        With `shape` set, the shaped sampler cached under `key` is used instead.
+        """
+        if shape is not None:
+            sampler = shape.samplers.get(key)
+            if sampler is None:
+                sampler = shape.sampler(key, counts)
+            return sampler.sample(self._rng)
+        if sampler is not None:
+            return sampler.sample(self._rng)
+        return sample_weighted(counts, self._rng)
+
+
+class NameStream:
+    """Iterator yielding names from a generator, each name at most once.
+
+    Only the set of names already yielded is kept in memory. The stream ends
+    when `limit` names have been produced or when `patience` consecutive
+    `generate` calls in a row return nothing new.
+
+    Attributes:
+        seen (set[str]): Names yielded so far.
+        produced (int): Number of names yielded.
+        attempts (int): Number of `generate` calls made.
+        exhausted (bool): True if the stream ended for lack of new names.
+    """
 
-        return "".join(name_chars)
+    def __init__(self, generator, limit=None, patience=50, **params):
+        if patience < 1:
+            raise ValueError("patience must be >= 1")
+        self._generator = generator
+        self._params = params
+        self.limit = limit
+        self.patience = patience
+        self.seen = set()
+        self.produced = 0
+        self.attempts = 0
+        self.exhausted = False
 
+    def __iter__(self):
+        return self
 
+    def __next__(self):
+        if self.exhausted or (self.limit is not None and self.produced >= self.limit):
+            raise StopIteration
+        misses = 0
+        while misses < self.patience:
+            self.attempts += 1
+            name = self._generator.generate(**self._params)
+            if name is not None and name not in self.seen:
+                self.seen.add(name)
+                self.produced += 1
+                return name
+            misses += 1
+        self.exhausted = True
+        raise StopIteration
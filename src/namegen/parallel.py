@@ -0,0 +1,241 @@
+"""Multi-process training and generation.
+
+Training splits the deduplicated names into contiguous shards, counts each
+shard in a worker and returns flat count tables (plain dicts keyed by prefix,
+which pickle far faster than trie nodes) to be merged in shard order.
+
+For generation, workers receive the trained model once: through copy-on-write memory when the
+platform can fork, otherwise through the pool initializer (one pickle per
+worker, never per task). Each worker draws from its own `random.Random`
+stream derived from the caller's seed and the worker index, so a given seed
+and worker count always produce the same names in the same order.
+"""
+import multiprocessing
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .generator import NGramGenerator
+from .trie import NGramTrie
+
+_MODEL = None
+
+
+def worker_seed(seed, index, round_=0):
+    """Derive the seed of one worker's RNG stream.
+
+    String seeds are hashed with SHA-512 by `random.Random`, so the derived
+    streams are independent of each other and stable across processes and
+    Python runs.
+
+    Args:
+        seed (int): Seed of the whole job.
+        index (int): Worker index.
+        round_ (int): Top-up round (used when de-duplicating).
+
+    Returns:
+        int: 64-bit seed for `random.Random`.
+    """
+    return random.Random(f"namegen:{seed}:{round_}:{index}").getrandbits(64)
+
+
+def _init_worker(model):
+    global _MODEL
+    _MODEL = model
+
+
+def _generate_chunk(task):
+    count, seed, params = task
+    gen = NGramGenerator(_MODEL, rng=random.Random(seed))
+    return [gen.generate(**params) for _ in range(count)]
+
+
+def _generate_batch_chunk(task):
+    count, seed, params = task
+    return NGramGenerator(_MODEL).generate_batch(count, seed=seed, **params)
+
+
+def _split(n, workers):
+    base, extra = divmod(n, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers)]
+
+
+def _fit_shard(task):
+    order, backoff, names = task
+    shard = NGramTrie(order=order, normalize_case=False, backoff=backoff)
+    shard._insert(names)
+    return shard._count_table()
+
+
+def fit_shards(order, names, workers=None, backoff=False):
+    """Count n-grams of `names` in a pool of worker processes.
+
+    Args:
+        order (int): n-gram order.
+        names (list[str]): Normalized, deduplicated training names.
+        workers (int or None): Number of processes. Default is os.cpu_count().
+        backoff (bool): Also count the lower orders (see `NGramTrie`).
+
+    Returns:
+        list[tuple[dict, dict]]: Count table and start counts of each shard
+        (see `NGramTrie._count_table`), in input order. Shards are disjoint, so adding them up in this
+        order gives the counts of a serial fit.
+
+    Raises:
+        ValueError: If workers < 1.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    bounds = [0]
+    for size in _split(len(names), workers):
+        bounds.append(bounds[-1] + size)
+    tasks = [(order, backoff, names[lo:hi]) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+    if len(tasks) == 1:
+        return [_fit_shard(tasks[0])]
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=len(tasks), mp_context=multiprocessing.get_context("fork"))
+    else:
+        pool = ProcessPoolExecutor(max_workers=len(tasks))
+    with pool:
+        return list(pool.map(_fit_shard, tasks))
+
+
+def generate_parallel(model, n, workers=None, seed=None, unique=False, max_rounds=10, **params):
+    """Generate `n` names on a pool of worker processes.
+
+    Args:
+        model (NGramTrie): Trained model.
+        n (int): Number of names to generate.
+        workers (int or None): Number of processes. Default is os.cpu_count().
+            With 1 worker the job runs in the calling process, producing the
+            same names a one-process pool would.
+        seed (int or None): Job seed. None draws one from the OS.
+        unique (bool): Drop duplicates across workers. Missing names are
+            topped up in further rounds (at most `max_rounds`).
+        max_rounds (int): Limit on top-up rounds when `unique` is set.
+        **params: Passed to `NGramGenerator.generate`.
+
+    Returns:
+        list[str or None]: `n` entries in worker order; None where a worker
+        found no valid name, or (with `unique`) where the model ran out of
+        new names.
+
+    Raises:
+        ValueError: If workers < 1.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), "little")
+
+    def run(tasks):
+        if workers == 1:
+            _init_worker(model)
+            try:
+                return [_generate_chunk(t) for t in tasks]
+            finally:
+                _init_worker(None)
+        global _MODEL
+        if "fork" in multiprocessing.get_all_start_methods():
+            _MODEL = model
+            try:
+                ctx = multiprocessing.get_context("fork")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                    return list(pool.map(_generate_chunk, tasks))
+            finally:
+                _MODEL = None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,)) as pool:
+            return list(pool.map(_generate_chunk, tasks))
+
+    results, seen = [], set()
+    missing = n
+    for round_ in range(max_rounds if unique else 1):
+        tasks = [(count, worker_seed(seed, i, round_), params)
+                 for i, count in enumerate(_split(missing, workers)) if count]
+        added = 0
+        for chunk in run(tasks):
+            for name in chunk:
+                if not unique:
+                    results.append(name)
+                elif name is not None and name not in seen and len(results) < n:
+                    seen.add(name)
+                    results.append(name)
+                    added += 1
+        missing = n - len(results)
+        if missing <= 0 or (unique and added == 0):
+            break
+    return results + [None] * (n - len(results))
+
+
+def generate_chunks(model, chunk_size, workers=1, seed=None, batch=False, limit=None, **params):
+    """Yield generated names chunk by chunk, for jobs too large to hold in memory.
+
+    Chunk i is generated from its own RNG stream, `worker_seed(seed, i)`, so
+    a given seed yields the same chunks whatever the number of workers. With
+    several workers at most two chunks per worker are in flight, and chunks
+    are yielded in order.
+
+    Args:
+        model (NGramTrie): Trained model.
+        chunk_size (int): Names per chunk.
+        workers (int): Number of processes; 1 generates in the calling
+            process. Default 1.
+        seed (int or None): Job seed. None draws one from the OS.
+        batch (bool): Generate each chunk with the vectorized
+            `NGramGenerator.generate_batch` (needs NumPy) instead of calling
+            `generate` per name.
+        limit (int or None): Total names to generate; None never stops, and
+            the caller decides when it has enough.
+        **params: Passed to `generate` or `generate_batch`.
+
+    Yields:
+        list[str or None]: One chunk of names; None where no valid name was
+        found.
+
+    Raises:
+        ValueError: If chunk_size or workers is less than 1.
+    """
+    if chunk_size < 1 or workers < 1:
+        raise ValueError("chunk_size and workers must be >= 1")
+    if seed is None:
+        seed = int.from_bytes(os.urandom(8), "little")
+    task_fn = _generate_batch_chunk if batch else _generate_chunk
+
+    def tasks():
+        i, left = 0, limit
+        while left is None or left > 0:
+            count = chunk_size if left is None else min(chunk_size, left)
+            yield (count, worker_seed(seed, i), params)
+            i += 1
+            if left is not None:
+                left -= count
+
+    global _MODEL
+    previous, _MODEL = _MODEL, model
+    if workers == 1:
+        try:
+            for task in tasks():
+                yield task_fn(task)
+        finally:
+            _MODEL = previous
+        return
+
+    # Forked workers inherit _MODEL; the others receive it once through the initializer.
+    if "fork" in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model,))
+    try:
+        pending = deque()
+        for task in tasks():
+            pending.append(pool.submit(task_fn, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        _MODEL = previous
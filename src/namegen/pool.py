@@ -0,0 +1,239 @@
+"""Bounded worker pool for serving generation requests.
+
+`RequestPool` runs jobs on a fixed number of threads and limits how many jobs
+may be queued or running at once. Identical requests that arrive while a job
+for the same key is still running share that job instead of starting a new
+one. Every job gets a `CancelToken` carrying the request deadline; jobs call
+`token.check()` between units of work (e.g. between names), so a timed-out
+or abandoned request stops within one unit instead of running to the end.
+
+Generation is pure Python, so the threads interleave rather than run in
+parallel; what the pool buys is that one expensive request no longer holds
+up everyone else, and that the amount of queued work stays bounded.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+class Cancelled(Exception):
+    """Raised inside a job whose request was cancelled or ran out of time."""
+
+
+class PoolBusy(RuntimeError):
+    """Raised by `RequestPool.submit` when too many jobs are pending."""
+
+
+class CancelToken:
+    """Cancellation flag and deadline shared by a job and its callers.
+
+    Attributes:
+        deadline (float or None): `time.monotonic()` value after which the
+            job counts as timed out; None for no limit.
+    """
+
+    __slots__ = ("_event", "deadline")
+
+    def __init__(self, timeout=None):
+        self._event = threading.Event()
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+
+    def cancel(self):
+        """Ask the job to stop at its next `check()`."""
+        self._event.set()
+
+    @property
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def cancelled(self):
+        return self._event.is_set() or self.expired
+
+    def remaining(self):
+        """Seconds left until the deadline (None for no limit, never negative)."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise `Cancelled` if the job should stop.
+
+        Raises:
+            Cancelled: If the token was cancelled or its deadline passed.
+        """
+        if self.cancelled:
+            raise Cancelled("timed out" if self.expired else "cancelled")
+
+
+class _Job:
+    __slots__ = ("key", "token", "future", "waiters")
+
+    def __init__(self, key, token):
+        self.key = key
+        self.token = token
+        self.future = None
+        self.waiters = 0
+
+
+class RequestPool:
+    """Thread pool with bounded admission, request coalescing and timeouts.
+
+    Attributes:
+        max_workers (int): Jobs running at the same time.
+        max_pending (int): Jobs admitted (running or queued) at the same time.
+        timeout (float or None): Default per-request time limit in seconds.
+        submitted (int): Jobs started.
+        coalesced (int): Requests that joined a job already in flight.
+        rejected (int): Requests refused because the pool was full.
+        timeouts (int): Requests that gave up waiting.
+    """
+
+    def __init__(self, max_workers=4, max_pending=32, timeout=30.0):
+        """Create a pool.
+
+        Args:
+            max_workers (int): Number of worker threads. Default 4.
+            max_pending (int): Admission limit for running plus queued jobs.
+                Default 32.
+            timeout (float or None): Default time limit per request. Default 30.
+
+        Raises:
+            ValueError: If max_workers or max_pending is less than 1.
+        """
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("max_workers and max_pending must be >= 1")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="namegen")
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, timeout=None):
+        """Start `fn(token, *args)`, or join the running job with the same key.
+
+        Every call must be paired with `release(job)` once the caller stops
+        waiting, so that abandoned jobs can be cancelled.
+
+        Args:
+            key (Hashable or None): Coalescing key; None never coalesces.
+            fn (Callable): Job function; receives a `CancelToken` first.
+            *args: Further arguments for `fn`.
+            timeout (float or None): Time limit for a new job. Default is the
+                pool's timeout.
+
+        Returns:
+            _Job: Handle with `future` and `token` attributes.
+
+        Raises:
+            PoolBusy: If `max_pending` jobs are already admitted.
+        """
+        with self._lock:
+            job = self._jobs.get(key) if key is not None else None
+            if job is not None:
+                self.coalesced += 1
+            else:
+                if self._pending >= self.max_pending:
+                    self.rejected += 1
+                    raise PoolBusy("too many pending requests")
+                job = _Job(key, CancelToken(self.timeout if timeout is None else timeout))
+                self._pending += 1
+                self.submitted += 1
+                if key is not None:
+                    self._jobs[key] = job
+                job.future = self._executor.submit(self._run, job, fn, args)
+            job.waiters += 1
+            return job
+
+    def _run(self, job, fn, args):
+        try:
+            job.token.check()
+            return fn(job.token, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def release(self, job):
+        """Stop waiting for `job`; cancel it if nobody else is waiting."""
+        with self._lock:
+            job.waiters -= 1
+            if job.waiters == 0 and not job.future.done():
+                job.token.cancel()
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def run(self, key, fn, *args, timeout=None):
+        """Submit a job and wait for its result.
+
+        Args:
+            key, fn, *args, timeout: As in `submit`.
+
+        Returns:
+            Any: The job's return value.
+
+        Raises:
+            TimeoutError: If the job did not finish in time.
+            PoolBusy: If the pool is full.
+            Cancelled: If the job was cancelled by another party.
+        """
+        job = self.submit(key, fn, *args, timeout=timeout)
+        try:
+            try:
+                return job.future.result(job.token.remaining())
+            except (FutureTimeout, Cancelled) as exc:
+                self._raise_timeout(job, exc)
+        finally:
+            self.release(job)
+
+    async def run_async(self, key, fn, *args, timeout=None):
+        """`run` for asyncio callers; cancelling the awaiting task releases the job."""
+        import asyncio
+
+        job = self.submit(key, fn, *args, timeout=timeout)
+        try:
+            waiter = asyncio.shield(asyncio.wrap_future(job.future))
+            try:
+                return await asyncio.wait_for(waiter, job.token.remaining())
+            except (asyncio.TimeoutError, Cancelled) as exc:
+                self._raise_timeout(job, exc)
+        finally:
+            self.release(job)
+
+    def _raise_timeout(self, job, exc):
+        if isinstance(exc, Cancelled) and not job.token.expired:
+            raise exc
+        with self._lock:
+            self.timeouts += 1
+        raise TimeoutError("request timed out") from None
+
+    def stats(self):
+        """Return a snapshot of the pool counters.
+
+        Returns:
+            dict[str, int]: pending, submitted, coalesced, rejected, timeouts.
+        """
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+    def shutdown(self, wait=True):
+        """Cancel queued jobs and stop the worker threads."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.token.cancel()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,170 @@
+"""Reachability tables for length-constrained generation.
+
+For every context and every number of remaining steps r, `ReachabilityTable`
+stores the probability that a walk starting in that context can emit r more
+characters without hitting a dead end (a missing context or one with no
+successors):
+
+    f(ctx, 0) = 1
+    f(ctx, r) = sum over c of p(c | ctx) * f(next(ctx, c), r - 1)
+
+Reweighting each successor by the survival of the context it leads to
+(p(c | ctx) * f(next, r - 1)) samples exactly from the walks that reach the
+required length. No attempt is then lost to an early dead end. Levels are
+computed bottom-up with NumPy on first use and kept for the lifetime of the
+trained model.
+
+On a backoff model a missing or empty context is not a dead end: the walk
+continues from `backoff_node(ctx)`, the longest suffix of ctx with counts.
+Which node the walk samples from, now and after every later step, depends
+only on that suffix, so the table's states are the trie paths up to length
+order - 1 that have successor counts, and a context stands for its longest
+suffix among them.
+"""
+import threading
+
+from .sampling import CumulativeSampler
+
+
+class ReachabilityTable:
+    """Survival probabilities f(ctx, r) for one trained model."""
+
+    def __init__(self, model):
+        k = model.order - 1
+        self._k = k
+        self._backoff = bool(model.backoff) and k > 0
+        self._states = {}
+        contexts = model.contexts
+        # ctx -> [(char, count, next context or None, probability)]
+        self._succ = {}
+        if self._backoff:
+            self._init_backoff(model)
+        else:
+            for ctx in list(contexts):
+                counts = contexts[ctx].next_counts
+                total = sum(counts.values())
+                succ = []
+                if total > 0:
+                    for ch, c in counts.items():
+                        nxt = (ctx + ch)[1:] if k else ""
+                        succ.append((ch, c, nxt if nxt in contexts else None, c / total))
+                self._succ[ctx] = succ
+        self._starts = list(model.start_counts.items())
+        self._init_levels()
+        self._samplers = {}
+        self._lock = threading.Lock()
+
+    def _init_backoff(self, model):
+        # Collect every state first so successor contexts can be resolved.
+        k = self._k
+        stack = [("", model.root)]
+        while stack:
+            path, node = stack.pop()
+            counts = node.next_counts
+            total = sum(counts.values())
+            if total > 0:
+                self._succ[path] = [(ch, c, (path + ch)[-k:], c / total) for ch, c in counts.items() if c > 0]
+            if len(path) < k:
+                stack.extend((path + ch, child) for ch, child in node.children.items())
+        for succ in self._succ.values():
+            succ[:] = [(ch, c, self.state(nxt), p) for ch, c, nxt, p in succ]
+
+    def _init_levels(self):
+        import numpy as np
+
+        # One edge per (context, successor); index n stands for a dead end.
+        ids = self._ids = {ctx: i for i, ctx in enumerate(self._succ)}
+        n = len(ids)
+        src, dst, prob = [], [], []
+        for i, succ in enumerate(self._succ.values()):
+            for _, _, nxt, p in succ:
+                src.append(i)
+                dst.append(ids[nxt] if nxt is not None else n)
+                prob.append(p)
+        self._src = np.asarray(src, dtype=np.int64)
+        self._dst = np.asarray(dst, dtype=np.int64)
+        self._prob = np.asarray(prob, dtype=np.float64)
+        self._levels = [np.ones(n + 1)]
+
+    def state(self, ctx):
+        """Return the table state that stands for context `ctx`.
+
+        Without backoff this is ctx itself. With backoff it is the longest
+        suffix of ctx that is a trie path with successor counts, the node
+        generation samples from (None if the model has no counts at all).
+        """
+        if not self._backoff or ctx is None or ctx in self._succ:
+            return ctx
+        try:
+            return self._states[ctx]
+        except KeyError:
+            state = self._states[ctx] = next(
+                (ctx[j:] for j in range(1, len(ctx) + 1) if ctx[j:] in self._succ), None)
+            return state
+
+    def survival(self, ctx, r):
+        """Probability that `r` more characters can follow context `ctx`.
+
+        Args:
+            ctx (str or None): Context string; None stands for a context that
+                does not exist in the model (a dead end).
+            r (int): Number of characters still required.
+
+        Returns:
+            float: Survival probability in [0, 1]; 0.0 for r < 0.
+        """
+        if r < 0:
+            return 0.0
+        if ctx is None:
+            return 1.0 if r == 0 else 0.0
+        i = self._ids.get(self.state(ctx))
+        if i is None:
+            return 0.0
+        if r >= len(self._levels):
+            self._extend(r)
+        return float(self._levels[r][i])
+
+    def _extend(self, r):
+        import numpy as np
+
+        with self._lock:
+            n = len(self._ids) + 1
+            while len(self._levels) <= r:
+                prev = self._levels[-1]
+                self._levels.append(np.bincount(self._src, self._prob * prev[self._dst], minlength=n))
+
+    def successor_sampler(self, ctx, r):
+        """Sampler over the successors of `ctx` that leave `r` more characters reachable.
+
+        Each successor is weighted by count * f(next, r). Samplers are cached
+        per (ctx, r).
+
+        Args:
+            ctx (str): Current context.
+            r (int): Characters still required after the sampled one.
+
+        Returns:
+            CumulativeSampler: Empty-weight sampler if no successor qualifies.
+        """
+        key = (self.state(ctx), r)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            weights = {ch: c * self.survival(n, r) for ch, c, n, _ in self._succ.get(key[0], ())}
+            sampler = self._samplers[key] = CumulativeSampler.from_counts(weights)
+        return sampler
+
+    def start_sampler(self, r):
+        """Sampler over start contexts that leave `r` more characters reachable.
+
+        Args:
+            r (int): Characters still required after the start context.
+
+        Returns:
+            CumulativeSampler: Empty-weight sampler if no start context qualifies.
+        """
+        key = (None, r)
+        sampler = self._samplers.get(key)
+        if sampler is None:
+            weights = {s: c * self.survival(s, r) for s, c in self._starts}
+            sampler = self._samplers[key] = CumulativeSampler.from_counts(weights)
+        return sampler
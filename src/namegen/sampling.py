@@ -0,0 +1,219 @@
+"""Precompiled sampling tables for frozen n-gram models.
+
+`sample_weighted` walks a counts dictionary on every draw. Once a model is
+trained its successor counts no longer change, so each table can be compiled
+once into cumulative weights and sampled with a binary search instead.
+
+Temperature, top-k and top-p sampling reuse the same samplers: each context's
+successors are sorted by count once per model, and the transformed
+distributions are compiled per setting and kept in a small LRU.
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Temperature / top-k / top-p settings whose samplers are kept per model.
+SHAPE_CACHE_SIZE = 8
+
+
+class CumulativeSampler:
+    """Weighted sampler backed by a cumulative weight array.
+
+    Draws are made with the same rule as `sample_weighted`: the first key whose
+    running total reaches ``rng.random() * total`` wins. Given the same RNG
+    state both functions therefore return the same key, so freezing a model
+    does not change seeded output.
+
+    Attributes:
+        keys (tuple): Keys in the insertion order of the source dictionary.
+        cumulative (list[int | float]): Running totals of the weights.
+        total (int | float): Sum of all weights.
+    """
+
+    __slots__ = ("keys", "cumulative", "total")
+
+    def __init__(self, keys, cumulative):
+        self.keys = tuple(keys)
+        self.cumulative = list(cumulative)
+        self.total = self.cumulative[-1] if self.cumulative else 0
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Compile a dictionary of weighted counts.
+
+        Args:
+            counts (dict[str, int]): Mapping from keys to non-negative weights.
+
+        Returns:
+            CumulativeSampler: Sampler over the keys of `counts`.
+        """
+        keys, cumulative = [], []
+        acc = 0
+        for k, w in counts.items():
+            acc += w
+            keys.append(k)
+            cumulative.append(acc)
+        return cls(keys, cumulative)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def sample(self, rng):
+        """Sample one key in O(log k).
+
+        Args:
+            rng: Object with a ``random()`` method (e.g. random.Random).
+
+        Returns:
+            str or None: Sampled key, or None if the total weight is <= 0.
+        """
+        total = self.total
+        if total <= 0:
+            return None
+        i = bisect_left(self.cumulative, rng.random() * total)
+        return self.keys[i] if i < len(self.keys) else self.keys[0]
+
+
+def check_shape(temperature=1.0, top_k=None, top_p=1.0):
+    """Validate temperature / top-k / top-p settings.
+
+    Args:
+        temperature (float): Must be > 0.
+        top_k (int or None): Must be >= 1 if set; None or 0 disables it.
+        top_p (float): Must be in (0, 1].
+
+    Returns:
+        tuple: Normalized (temperature, top_k, top_p); top_k 0 becomes None.
+
+    Raises:
+        ValueError: If a setting is out of range.
+    """
+    if not temperature > 0:
+        raise ValueError("temperature must be > 0")
+    if top_k is not None and top_k < 0:
+        raise ValueError("top_k must be >= 1 (or 0/None to disable)")
+    if not 0 < top_p <= 1:
+        raise ValueError("top_p must be in (0, 1]")
+    return float(temperature), (int(top_k) or None) if top_k is not None else None, float(top_p)
+
+
+def sorted_successors(counts):
+    """Order a counts dictionary by decreasing count (ties keep their order).
+
+    Args:
+        counts (dict[str, int]): Successor counts.
+
+    Returns:
+        tuple[tuple, tuple]: Keys and counts, most frequent first.
+    """
+    items = sorted(counts.items(), key=lambda kv: -kv[1])
+    return tuple(k for k, _ in items), tuple(c for _, c in items)
+
+
+def shaped_sampler(keys, counts, temperature=1.0, top_k=None, top_p=1.0):
+    """Compile sorted counts into a sampler with temperature, top-k and top-p applied.
+
+    Weights are (count / max count) ** (1 / temperature), the same as a
+    softmax of log-counts divided by the temperature, without overflow for
+    small temperatures. top-k keeps the k most frequent keys; top-p then
+    keeps the shortest run of most likely keys whose probability reaches p.
+
+    Args:
+        keys (tuple): Keys, most frequent first (see `sorted_successors`).
+        counts (tuple[int]): Their counts.
+        temperature, top_k, top_p: As validated by `check_shape`.
+
+    Returns:
+        CumulativeSampler: Sampler over the kept keys.
+    """
+    if top_k is not None:
+        keys, counts = keys[:top_k], counts[:top_k]
+    if not counts or counts[0] <= 0:
+        return CumulativeSampler((), ())
+    top = counts[0]
+    inv_t = 1.0 / temperature
+    weights = [(c / top) ** inv_t for c in counts if c > 0]
+    keys = keys[:len(weights)]
+    if top_p < 1.0:
+        limit = top_p * sum(weights)
+        acc = 0.0
+        for i, w in enumerate(weights):
+            acc += w
+            if acc >= limit:
+                keys, weights = keys[:i + 1], weights[:i + 1]
+                break
+    cumulative, acc = [], 0.0
+    for w in weights:
+        acc += w
+        cumulative.append(acc)
+    return CumulativeSampler(keys, cumulative)
+
+
+class ShapedSamplers:
+    """Samplers of one model under one (temperature, top_k, top_p) setting.
+
+    Samplers are compiled on first use per key (a context, or None for the
+    start distribution) from the model-wide sorted successor tables, which
+    are shared by every setting.
+
+    Attributes:
+        setting (tuple): (temperature, top_k, top_p).
+        samplers (dict): Compiled samplers by key.
+    """
+
+    def __init__(self, model, setting):
+        self.setting = setting
+        self.samplers = {}
+        self._sorted = model.derived("sorted_successors", lambda m: {})
+
+    def sampler(self, key, counts):
+        """Return the shaped sampler for `key`, compiling it from `counts` once.
+
+        Args:
+            key (Hashable): Identifies `counts` within the model.
+            counts (dict[str, int]): Successor (or start) counts for `key`.
+
+        Returns:
+            CumulativeSampler: Shaped sampler.
+        """
+        sampler = self.samplers.get(key)
+        if sampler is None:
+            table = self._sorted.get(key)
+            if table is None:
+                table = self._sorted[key] = sorted_successors(counts)
+            sampler = self.samplers[key] = shaped_sampler(*table, *self.setting)
+        return sampler
+
+
+def shaped_samplers(model, temperature=1.0, top_k=None, top_p=1.0):
+    """Return the cached `ShapedSamplers` of a model for one setting.
+
+    Settings are kept in a small LRU (`SHAPE_CACHE_SIZE` entries) stored with
+    the model's derived structures, so retraining the model drops them.
+
+    Args:
+        model (NGramTrie): Trained model.
+        temperature, top_k, top_p: Sampling settings (see `check_shape`).
+
+    Returns:
+        ShapedSamplers or None: None for the identity setting (temperature 1,
+        no top-k, top-p 1), which samples raw counts as before.
+
+    Raises:
+        ValueError: If a setting is out of range.
+    """
+    if temperature == 1.0 and not top_k and top_p == 1.0:
+        return None
+    # Generation threads share the model, so lookups, reordering and
+    # eviction happen under one lock. Hits skip validation.
+    cache, lock = model.derived("shaped", lambda m: (OrderedDict(), threading.Lock()))
+    key = (temperature, top_k or None, top_p)
+    with lock:
+        shaped = cache.get(key)
+        if shaped is not None:
+            cache.move_to_end(key)
+            return shaped
+        shaped = cache[key] = ShapedSamplers(model, check_shape(temperature, top_k, top_p))
+        while len(cache) > SHAPE_CACHE_SIZE:
+            cache.popitem(last=False)
+    return shaped
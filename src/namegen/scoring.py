@@ -0,0 +1,276 @@
+"""Log-likelihood scoring of strings under a trained model.
+
+A name is scored along the walk generation would take to spell it:
+
+    order 1       every character is drawn from the root's unigram counts
+    order n > 1   the first n-1 characters are drawn together as a start
+                  context from `start_counts`, and every later character
+                  from the successor counts of the context before it (or,
+                  for backoff models, of the node generation backs off to)
+
+The start context is split into per-character terms by the chain rule over
+its prefixes, so every character gets its own surprisal and the surprisals
+of a name add up to minus its log-probability. Where the name stops is not
+scored: ending depends on the generation settings (stop_prob, lengths), not
+on the model. All values are natural logarithms (nats); a string the model
+cannot produce scores -inf.
+
+`ScoreTables` compiles the model into integer-keyed tables over an interned
+alphabet so `score_many` can score large batches with a few vectorized
+lookups per character position:
+
+    prefix_logp   every prefix of a start context (order > 1) -> log of the
+                  probability of its last character given the ones before
+    ctx_row       every node generation samples from -> row number
+    pair_logp     (row, character) -> log of the successor probability
+
+Each table is a dense array indexed by key when the key space is small
+(`DENSE_LIMIT`), otherwise sorted keys searched with `searchsorted`.
+
+A string over the alphabet is keyed in base len(alphabet) + 2 with digits
+1..len(alphabet), so strings of different lengths never share a key and the
+key of a suffix of length L is the full key modulo base**L.
+"""
+import math
+
+import numpy as np
+
+# Largest context key that fits in int64 arithmetic.
+_KEY_LIMIT = 1 << 62
+# Largest key space (in cells) looked up through a dense array instead of
+# sorted keys.
+DENSE_LIMIT = 1 << 22
+
+
+def score_name(model, name):
+    """Score one string by walking the model's dict tables.
+
+    Args:
+        model (NGramTrie): Trained model.
+        name (str): String to score (normalized like the training names).
+
+    Returns:
+        tuple[float, list[float]]: Log-probability and per-character surprisal.
+    """
+    name = model.norm(name)
+    k = model.order - 1
+    surprisal = []
+    if k:
+        starts = model.derived("start_prefixes", _start_prefixes)
+        for j in range(min(k, len(name))):
+            surprisal.append(-starts.get(name[:j + 1], -math.inf))
+    for i in range(len(surprisal), len(name)):
+        ctx = name[i - k:i]
+        node = model.contexts.get(ctx)
+        if (node is None or not node.next_counts) and model.backoff:
+            node = model.backoff_node(ctx)
+        counts = node.next_counts if node is not None else {}
+        c = counts.get(name[i], 0)
+        surprisal.append(math.log(sum(counts.values()) / c) if c else math.inf)
+    total = sum(surprisal)
+    return -total, surprisal
+
+
+def _start_prefixes(model):
+    """Map every prefix of a start context to the log-probability of its last character."""
+    totals = {"": 0}
+    for ctx, c in model.start_counts.items():
+        for j in range(len(ctx) + 1):
+            totals[ctx[:j]] = totals.get(ctx[:j], 0) + c
+    return {p: math.log(c / totals[p[:-1]]) for p, c in totals.items() if p and c > 0}
+
+
+def _sources(model):
+    """Yield (context, counts) for every node generation can sample successors from."""
+    k = model.order - 1
+    stack = [("", model.root)]
+    while stack:
+        path, node = stack.pop()
+        if len(path) == k or model.backoff:
+            counts = node.next_counts
+            if counts:
+                yield path, counts
+        if len(path) < k:
+            stack.extend((path + ch, child) for ch, child in node.children.items())
+
+
+class _KeyTable:
+    """Integer key -> value lookup: a dense array when the key space is small, else sorted keys."""
+
+    def __init__(self, keys, values, missing, space):
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=type(missing))
+        self.missing = missing
+        if space <= DENSE_LIMIT:
+            self.dense = np.full(space, missing, dtype=values.dtype)
+            self.dense[keys] = values
+        else:
+            self.dense = None
+            order = np.argsort(keys)
+            self.keys = keys[order]
+            self.values = values[order]
+
+    def __call__(self, query):
+        if self.dense is not None:
+            return self.dense[query]
+        out = np.full(len(query), self.missing, dtype=self.values.dtype)
+        if len(self.keys):
+            pos = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+            hit = self.keys[pos] == query
+            out[hit] = self.values[pos[hit]]
+        return out
+
+
+class ScoreTables:
+    """Integer array form of a trained model for vectorized scoring.
+
+    Attributes:
+        order (int): n-gram order of the source model.
+        alphabet (str): Characters indexed by character id - 1.
+        base (int): Radix of the string keys (len(alphabet) + 2; the top
+            digit stands for characters outside the alphabet).
+        backoff (bool): Whether missing contexts back off to shorter ones.
+        vectorized (bool): False if context keys would overflow int64 (very
+            high orders over large alphabets); `score_many` then scores
+            string by string.
+    """
+
+    def __init__(self, model):
+        self.order = model.order
+        self.backoff = bool(model.backoff)
+        k = model.order - 1
+        sources = list(_sources(model))
+        chars = set()
+        for ctx, counts in sources:
+            chars.update(ctx)
+            chars.update(counts)
+        for ctx in model.start_counts:
+            chars.update(ctx)
+        self.alphabet = "".join(sorted(chars))
+        self.base = B = len(self.alphabet) + 2
+        self.vectorized = B ** k < _KEY_LIMIT
+        if not self.vectorized:
+            return
+        index = {ch: i + 1 for i, ch in enumerate(self.alphabet)}
+        # Code point -> character id; anything past the table is unknown.
+        top = ord(self.alphabet[-1]) + 1 if self.alphabet else 0
+        self._ids = np.full(top + 1, B - 1, dtype=np.int64)
+        self._ids[[ord(ch) for ch in self.alphabet]] = np.arange(1, B - 1)
+
+        def key(s):
+            v = 0
+            for ch in s:
+                v = v * B + index[ch]
+            return v
+
+        prefixes = _start_prefixes(model) if k else {}
+        self.prefix_logp = _KeyTable([key(p) for p in prefixes], list(prefixes.values()), -math.inf, B ** k)
+        self.ctx_row = _KeyTable([key(ctx) for ctx, _ in sources], range(len(sources)), -1, B ** k)
+        # Row -1 (no context) reads the extra last row, which is all -inf.
+        rows, cols, logp = [], [], []
+        for row, (_, counts) in enumerate(sources):
+            total = sum(counts.values())
+            for ch, c in counts.items():
+                if c > 0:
+                    rows.append(row)
+                    cols.append(index[ch])
+                    logp.append(math.log(c / total))
+        self.pair_logp = _KeyTable(np.asarray(rows, dtype=np.int64) * B + np.asarray(cols, dtype=np.int64),
+                                   logp, -math.inf, (len(sources) + 1) * B)
+        self._last_row = len(sources)
+
+    def encode(self, names):
+        """Turn normalized strings into a padded matrix of character ids.
+
+        Args:
+            names (list[str]): Strings to encode.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (N, max length) int64 ids (0 as
+            padding, base - 1 for characters outside the alphabet) and the
+            lengths.
+        """
+        lengths = np.fromiter((len(s) for s in names), dtype=np.int64, count=len(names))
+        width = int(lengths.max()) if len(names) else 0
+        ids = np.zeros((len(names), width), dtype=np.int64)
+        if width:
+            codes = np.frombuffer("".join(names).encode("utf-32-le"), dtype=np.uint32)
+            # Row-major boolean assignment fills each row's first `length` cells in order.
+            ids[np.arange(width) < lengths[:, None]] = self._ids[np.minimum(codes, len(self._ids) - 1)]
+        return ids, lengths
+
+    def surprisal(self, ids, lengths):
+        """Per-character surprisal of encoded strings.
+
+        Args:
+            ids (np.ndarray): Output of `encode`.
+            lengths (np.ndarray): String lengths.
+
+        Returns:
+            np.ndarray: (N, max length) surprisal in nats, NaN past each
+            string's end.
+        """
+        n, width = ids.shape
+        B = self.base
+        k = self.order - 1
+        # Work position by position on contiguous columns.
+        cols = np.ascontiguousarray(ids.T)
+        out = np.empty((width, n))
+        # Start context, one prefix length at a time (padding is masked below).
+        key = np.zeros(n, dtype=np.int64)
+        for j in range(min(k, width)):
+            key = key * B + cols[j]
+            out[j] = -self.prefix_logp(key)
+        # Rolling key of the k characters before position i. A context
+        # holding an unknown character has no row, but its suffixes may,
+        # exactly as in NGramTrie.backoff_node.
+        ctx = key
+        for i in range(k, width):
+            row = self._resolve(ctx)
+            out[i] = -self.pair_logp(np.where(row < 0, self._last_row, row) * B + cols[i])
+            if k:
+                ctx = (ctx % (B ** (k - 1))) * B + cols[i]
+        out = out.T
+        out[np.arange(width) >= lengths[:, None]] = np.nan
+        return out
+
+    def _resolve(self, ctx):
+        """Row each context samples from (with backoff), or -1."""
+        row = self.ctx_row(ctx)
+        if not self.backoff:
+            return row
+        B = self.base
+        # Longest proper suffix with successors, as in NGramTrie.backoff_node.
+        for length in range(self.order - 2, -1, -1):
+            miss = row < 0
+            if not miss.any():
+                break
+            row[miss] = self.ctx_row(ctx[miss] % (B ** length))
+        return row
+
+
+def score_many(model, names, surprisal=False):
+    """Score many strings with vectorized table lookups.
+
+    Args:
+        model (NGramTrie): Trained model.
+        names (Iterable[str]): Strings to score.
+        surprisal (bool): Also return the per-character surprisal matrix.
+
+    Returns:
+        np.ndarray or tuple[np.ndarray, np.ndarray]: Log-probability per
+        string; with surprisal=True also an (N, max length) matrix of
+        per-character surprisal, NaN past each string's end.
+    """
+    tables = model.derived("score", ScoreTables)
+    names = [model.norm(s) for s in names]
+    if tables.vectorized:
+        per_char = tables.surprisal(*tables.encode(names))
+    else:
+        per_char = np.full((len(names), max(map(len, names), default=0)), np.nan)
+        for i, name in enumerate(names):
+            per_char[i, :len(name)] = score_name(model, name)[1]
+    log_probs = -np.nansum(per_char, axis=1)
+    if surprisal:
+        return log_probs, per_char
+    return log_probs
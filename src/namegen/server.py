@@ -0,0 +1,370 @@
+"""Local HTTP service for bulk name generation.
+
+Runs on the standard library only: a threading HTTP/1.1 server (one thread
+per connection, keep-alive) in front of a cache of trained models. Models
+stay warm between requests, and `--preload` trains chosen ones at start-up.
+
+Endpoints:
+    GET  /health    {"status": "ok", "models": <cached models>}
+    GET  /datasets  {"datasets": ["female", "male", ...]}
+    POST /generate  JSON request body, NDJSON response
+
+A /generate body names a dataset (a file stem in the data directory, or
+several joined with "+", e.g. "female+male") and optionally order, count,
+target_len, min_len, max_len, stop_prob, retries, seed, capitalize,
+normalize, backoff, guided, timeout, prefix, suffix, pattern (see
+`namegen.constraints`), temperature, top_k and top_p. The response is chunked and written while the batch
+is produced: one ``{"name": ...}`` line per requested name (null when no
+name was found within the retries), then a final ``{"done": true, ...}``
+line. If the request runs out of time the last line is
+``{"done": false, "error": "timed out", ...}`` instead.
+
+Usage:
+    python -m namegen.server [--host 127.0.0.1] [--port 8000] [--data-dir data]
+                             [--preload male:3 pokemon:2] [--timeout 60]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .cache import ModelCache
+from .constraints import make_constraint
+from .datasets import load_many
+from .generator import NGramGenerator, _check_lengths
+from .pool import CancelToken, Cancelled
+from .sampling import check_shape
+from .trie import NGramTrie
+
+# The data/ folder of a source checkout; installed packages need --data-dir
+# or NAMEGEN_DATA_DIR.
+DEFAULT_DATA_DIR = Path(os.environ.get("NAMEGEN_DATA_DIR", Path(__file__).resolve().parents[2] / "data"))
+MAX_COUNT = 100_000
+MAX_BODY_BYTES = 64 * 1024
+# A chunk is sent once this much output is buffered or this long has passed
+# since the last one, whichever comes first.
+FLUSH_BYTES = 16 * 1024
+FLUSH_SECONDS = 0.05
+
+# field -> (type, default); None defaults mean "not set".
+_FIELDS = {
+    "dataset": (str, None),
+    "order": (int, 3),
+    "count": (int, 10),
+    "target_len": (int, None),
+    "min_len": (int, 1),
+    "max_len": (int, 20),
+    "stop_prob": (float, 0.20),
+    "retries": (int, 500),
+    "seed": (int, None),
+    "capitalize": (bool, True),
+    "normalize": (bool, True),
+    "backoff": (bool, False),
+    "guided": (bool, True),
+    "timeout": (float, None),
+    "prefix": (str, None),
+    "suffix": (str, None),
+    "pattern": (str, None),
+    "temperature": (float, 1.0),
+    "top_k": (int, None),
+    "top_p": (float, 1.0),
+}
+
+
+class ModelStore:
+    """Trained models for the datasets in one directory, cached by file and options."""
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, maxsize=16):
+        """Create a store.
+
+        Args:
+            data_dir (str or Path): Directory of ``<dataset>.txt`` files.
+            maxsize (int): Models kept in memory. Default 16.
+
+        Raises:
+            ValueError: If data_dir is not a directory.
+        """
+        self.data_dir = Path(data_dir)
+        if not self.data_dir.is_dir():
+            raise ValueError(f"data directory {self.data_dir} does not exist; "
+                             "pass --data-dir or set NAMEGEN_DATA_DIR")
+        self.cache = ModelCache(maxsize=maxsize)
+
+    def datasets(self):
+        """Return the dataset names available in the data directory."""
+        return sorted(p.stem for p in self.data_dir.glob("*.txt"))
+
+    def files(self, dataset):
+        """Resolve a dataset name ("male" or "female+male") to its files.
+
+        Raises:
+            ValueError: If a part does not name a file in the data directory.
+        """
+        available = set(self.datasets())
+        parts = dataset.split("+")
+        unknown = [p for p in parts if p not in available]
+        if unknown:
+            raise ValueError(f"unknown dataset(s): {', '.join(unknown)}")
+        return [self.data_dir / f"{p}.txt" for p in parts]
+
+    def get(self, dataset, order=3, normalize_case=True, backoff=False):
+        """Return the frozen model for a dataset, training it on a cache miss.
+
+        A combined dataset ("female+male") is composed from the cached
+        models of its files (`NGramTrie.combine`) rather than retrained.
+
+        Args:
+            dataset (str): Dataset name, see `files`.
+            order (int): n-gram order.
+            normalize_case (bool): Lowercase names before training.
+            backoff (bool): Train with backoff to shorter contexts.
+
+        Returns:
+            NGramTrie: Frozen model.
+
+        Raises:
+            ValueError: If the dataset is unknown or the options are invalid.
+        """
+        files = self.files(dataset)
+        key = (ModelCache.key_for(files, order, normalize_case), bool(backoff))
+        if len(files) > 1:
+            return self.cache.get_or_build(key, lambda: NGramTrie.combine(
+                [self.get(p.stem, order, normalize_case, backoff) for p in files]).freeze())
+        return self.cache.get_or_build(key, lambda: NGramTrie(
+            load_many(files), order=order, normalize_case=normalize_case, backoff=backoff).freeze())
+
+
+def parse_request(body):
+    """Validate a /generate request body.
+
+    Args:
+        body (bytes or str): JSON object.
+
+    Returns:
+        dict: Every field of the request, with defaults filled in.
+
+    Raises:
+        ValueError: If the body is not a JSON object, has unknown or mistyped
+            fields, or asks for impossible lengths.
+    """
+    try:
+        data = json.loads(body or b"{}")
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e.msg}") from None
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+    unknown = sorted(set(data) - set(_FIELDS))
+    if unknown:
+        raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+
+    req = {}
+    for field, (kind, default) in _FIELDS.items():
+        value = data.get(field, default)
+        if value is not None:
+            if kind is float and isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+            if not isinstance(value, kind) or (kind is not bool and isinstance(value, bool)):
+                raise ValueError(f"{field} must be of type {kind.__name__}")
+        req[field] = value
+
+    if req["dataset"] is None:
+        raise ValueError("dataset is required")
+    if req["order"] < 1:
+        raise ValueError("order must be >= 1")
+    if not 1 <= req["count"] <= MAX_COUNT:
+        raise ValueError(f"count must be between 1 and {MAX_COUNT}")
+    if req["retries"] < 1:
+        raise ValueError("retries must be >= 1")
+    if not 0.0 <= req["stop_prob"] <= 1.0:
+        raise ValueError("stop_prob must be between 0 and 1")
+    if req["timeout"] is not None and req["timeout"] <= 0:
+        raise ValueError("timeout must be > 0")
+    if req["target_len"] is not None:
+        req["min_len"] = min(req["min_len"], req["target_len"])
+    _check_lengths(req["target_len"], req["max_len"], req["min_len"])
+    make_constraint(req["prefix"], req["suffix"], req["pattern"])
+    check_shape(req["temperature"], req["top_k"], req["top_p"])
+    return req
+
+
+def generate_lines(model, req, token):
+    """Yield the NDJSON lines of a /generate response.
+
+    Args:
+        model (NGramTrie): Trained model.
+        req (dict): Output of `parse_request`.
+        token (CancelToken): Checked between names.
+
+    Yields:
+        str: One JSON document per line, newline included.
+    """
+    gen = NGramGenerator(model, rng=random.Random(req["seed"]) if req["seed"] is not None else None)
+    t0 = time.perf_counter()
+    failed = 0
+    for i in range(req["count"]):
+        try:
+            token.check()
+        except Cancelled:
+            yield json.dumps({"done": False, "error": "timed out", "count": i, "failed": failed}) + "\n"
+            return
+        name = gen.generate(target_len=req["target_len"], max_len=req["max_len"], min_len=req["min_len"],
+                            stop_prob=req["stop_prob"], retries=req["retries"],
+                            capitalize=req["capitalize"], guided=req["guided"],
+                            prefix=req["prefix"], suffix=req["suffix"], pattern=req["pattern"],
+                            temperature=req["temperature"], top_k=req["top_k"], top_p=req["top_p"])
+        failed += name is None
+        yield json.dumps({"name": name}) + "\n"
+    yield json.dumps({"done": True, "count": req["count"], "failed": failed,
+                      "seconds": round(time.perf_counter() - t0, 6)}) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "namegen/0.1"
+    # Idle keep-alive connections are closed after this many seconds.
+    timeout = 30
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": len(self.server.store.cache)})
+        elif self.path == "/datasets":
+            self._send_json(200, {"datasets": self.server.store.datasets()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_json(411, {"error": "Content-Length required"})
+            return
+        if not length.isdigit():
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return
+        if int(length) > MAX_BODY_BYTES:
+            self._send_json(413, {"error": "request body too large"})
+            return
+        body = self.rfile.read(int(length))
+        try:
+            req = parse_request(body)
+            model = self.server.store.get(req["dataset"], req["order"], req["normalize"], req["backoff"])
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        timeout = req["timeout"] if req["timeout"] is not None else self.server.request_timeout
+        self._stream(generate_lines(model, req, CancelToken(timeout)))
+
+    def _send_json(self, status, obj):
+        data = (json.dumps(obj) + "\n").encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, lines):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        buf, size, last = [], 0, time.monotonic()
+        try:
+            for line in lines:
+                buf.append(line)
+                size += len(line)
+                if size >= FLUSH_BYTES or time.monotonic() - last >= FLUSH_SECONDS:
+                    self._write_chunk("".join(buf))
+                    buf, size, last = [], 0, time.monotonic()
+            if buf:
+                self._write_chunk("".join(buf))
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; stop generating for it.
+            self.close_connection = True
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class NameServer(ThreadingHTTPServer):
+    """HTTP server for the /generate service.
+
+    Attributes:
+        store (ModelStore): Models shared by all connections.
+        request_timeout (float or None): Default time limit per /generate
+            request in seconds.
+        verbose (bool): Log every request to stderr.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, store=None, request_timeout=60.0, verbose=False):
+        """Bind the server.
+
+        Args:
+            address (tuple[str, int]): Host and port; port 0 picks a free one.
+            store (ModelStore or None): Model store. Default serves the
+                repository's data directory.
+            request_timeout (float or None): Default per-request time limit.
+            verbose (bool): Log requests. Default False.
+        """
+        self.store = store if store is not None else ModelStore()
+        self.request_timeout = request_timeout
+        self.verbose = verbose
+        super().__init__(address, _Handler)
+
+
+def _parse_preload(text):
+    dataset, _, order = text.partition(":")
+    if not dataset or (order and not order.isdigit()):
+        raise argparse.ArgumentTypeError("expected DATASET or DATASET:ORDER")
+    return dataset, int(order or 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--preload", type=_parse_preload, nargs="*", default=[], metavar="DATASET[:ORDER]",
+                        help="train these models before accepting requests")
+    parser.add_argument("--cache-size", type=int, default=16, help="models kept in memory")
+    parser.add_argument("--timeout", type=float, default=60.0, help="default time limit per request (s)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    try:
+        store = ModelStore(args.data_dir, maxsize=args.cache_size)
+    except ValueError as e:
+        parser.error(str(e))
+    for dataset, order in args.preload:
+        t0 = time.perf_counter()
+        try:
+            store.get(dataset, order)
+        except (OSError, ValueError) as e:
+            parser.error(f"--preload {dataset}: {e}")
+        print(f"loaded {dataset} (order {order}) in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    with NameServer((args.host, args.port), store, args.timeout, args.verbose) as server:
+        host, port = server.server_address[:2]
+        print(f"serving on http://{host}:{port}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Opt-in counters for name generation.
+
+Attach a `GenerationStats` to an `NGramGenerator` (``gen.stats =
+GenerationStats()``) to see where the time of a batch goes: how many attempts
+each name took, why attempts ended early (dead ends) or were thrown away
+(rejections), how many characters were sampled, and how long each `generate`
+call took. With no stats object attached the generator skips all of this.
+"""
+import math
+
+
+class GenerationStats:
+    """Counters and a latency histogram for `NGramGenerator.generate` calls.
+
+    Latencies go into power-of-two buckets: bucket 0 holds calls under 1 µs
+    and bucket i holds calls in [2**(i-1), 2**i) µs. Not thread-safe; use one
+    object per generator.
+
+    Attributes:
+        calls (int): `generate` calls.
+        accepted (int): Calls that returned a name.
+        failed (int): Calls that returned None.
+        attempts (int): Candidate walks started.
+        chars (int): Characters in all candidates, accepted or not.
+        dead_ends_missing (int): Walks that stopped at a context missing from
+            the model.
+        dead_ends_empty (int): Walks that stopped at a context without
+            successors.
+        backoffs (int): Steps sampled from a shorter context (backoff models).
+        rejected_empty (int): Walks that produced no characters.
+        rejected_training (int): Candidates equal to a training name.
+        rejected_length (int): Candidates of the wrong length.
+        latency_buckets (list[int]): Call counts per latency bucket.
+        total_seconds (float): Time spent in `generate` calls.
+    """
+
+    _COUNTERS = ("calls", "accepted", "failed", "attempts", "chars", "dead_ends_missing",
+                 "dead_ends_empty", "backoffs", "rejected_empty", "rejected_training",
+                 "rejected_length")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Set every counter back to zero."""
+        for name in self._COUNTERS:
+            setattr(self, name, 0)
+        self.latency_buckets = []
+        self.total_seconds = 0.0
+
+    def record_call(self, result, seconds):
+        """Record one finished `generate` call.
+
+        Args:
+            result (str or None): What the call returned.
+            seconds (float): Wall time of the call.
+        """
+        self.calls += 1
+        if result is None:
+            self.failed += 1
+        else:
+            self.accepted += 1
+        self.total_seconds += seconds
+        bucket = math.ceil(seconds * 1e6).bit_length()
+        if bucket >= len(self.latency_buckets):
+            self.latency_buckets.extend([0] * (bucket + 1 - len(self.latency_buckets)))
+        self.latency_buckets[bucket] += 1
+
+    def latency_percentile(self, q):
+        """Upper bound (in seconds) of the bucket holding the q-th percentile call.
+
+        Args:
+            q (float): Percentile in [0, 100].
+
+        Returns:
+            float: Bucket upper bound, or 0.0 if nothing was recorded.
+        """
+        total = sum(self.latency_buckets)
+        if not total:
+            return 0.0
+        rank = max(1, math.ceil(total * q / 100))
+        seen = 0
+        for i, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= rank:
+                return (2 ** i) / 1e6
+        return (2 ** (len(self.latency_buckets) - 1)) / 1e6
+
+    def as_dict(self):
+        """Return all counters and the latency histogram as a plain dict."""
+        out = {name: getattr(self, name) for name in self._COUNTERS}
+        out["latency_buckets"] = list(self.latency_buckets)
+        out["total_seconds"] = self.total_seconds
+        return out
+
+    def summary(self):
+        """Format the counters as a short multi-line report.
+
+        Returns:
+            str: Human-readable summary.
+        """
+        per_name = self.attempts / self.accepted if self.accepted else float("nan")
+        mean_ms = 1000 * self.total_seconds / self.calls if self.calls else 0.0
+        lines = [
+            f"Names: {self.accepted} accepted / {self.calls} requested ({self.failed} failed)",
+            f"Attempts: {self.attempts} ({per_name:.1f} per accepted name), {self.chars} chars sampled",
+            f"Dead ends: {self.dead_ends_missing} missing context, {self.dead_ends_empty} no successors"
+            + (f"; {self.backoffs} backoff steps" if self.backoffs else ""),
+            f"Rejected: {self.rejected_training} training names, {self.rejected_length} wrong length, "
+            f"{self.rejected_empty} empty",
+            f"Latency: mean {mean_ms:.3f} ms, p50 <= {1000 * self.latency_percentile(50):.3f} ms, "
+            f"p95 <= {1000 * self.latency_percentile(95):.3f} ms",
+        ]
+        return "\n".join(lines)
@@ -1,13 +1,73 @@
+from collections.abc import Set
+
+from .sampling import CumulativeSampler
+
+
 class Node:
     """A node in the prefix trie.
 
     Attributes:
         children (dict[str, Node]): Child nodes keyed by character.
         next_counts (dict[str, int]): Successor character counts for n-gram generation.
+        sampler (CumulativeSampler or None): Compiled form of `next_counts`,
+            set by `NGramTrie.freeze()` on context nodes.
+        terminal (bool): True if the path to this node spells a training name.
     """
+    __slots__ = ("children", "next_counts", "sampler", "terminal")
+
     def __init__(self):
         self.children = {}
         self.next_counts = {}
+        self.sampler = None
+        self.terminal = False
+
+
+class TrieNameSet(Set):
+    """Set of training names answered from the trie's terminal markers.
+
+    Used instead of a separate set of strings when a model is built with
+    keep_names=False.
+    """
+
+    __slots__ = ("_model",)
+
+    def __init__(self, model):
+        self._model = model
+
+    def __contains__(self, name):
+        if not isinstance(name, str):
+            return False
+        node = self._model.get_node_chars(name)
+        return node is not None and node.terminal
+
+    def __iter__(self):
+        stack = [("", self._model.root)]
+        while stack:
+            prefix, node = stack.pop()
+            if node.terminal:
+                yield prefix
+            stack.extend((prefix + ch, child) for ch, child in node.children.items())
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+def _copy_subtree(src, weight=1):
+    """Copy a (dict- or flat-backed) subtree into new `Node`s, scaling its counts."""
+    root = Node()
+    stack = [(root, src)]
+    while stack:
+        dst, node = stack.pop()
+        dst.terminal = bool(node.terminal)
+        if weight == 1:
+            dst.next_counts = dict(node.next_counts)
+        else:
+            dst.next_counts = {ch: c * weight for ch, c in node.next_counts.items()}
+        children = dst.children
+        for ch, child in node.children.items():
+            copy = children[ch] = Node()
+            stack.append((copy, child))
+    return root
+
 
 class NGramTrie:
     """An n-gram model implemented on top of a prefix trie.
@@ -18,11 +78,20 @@ class NGramTrie:
     Attributes:
         root (Node): Root node of the trie.
         order (int): Order of the n-gram model (e.g., 2 for bigram).
-        names (set[str]): Training names.
+        names (set[str]): Training names (a `TrieNameSet` view when built
+            with keep_names=False).
         start_counts (dict[str, int]): Frequencies of starting contexts of length order-1.
+        contexts (dict[str, Node]): Context index mapping every (order-1)-gram
+            context to its node ("" to the root for order 1), built by `fit`.
+        frozen (bool): True once `freeze()` has compiled the sampling tables.
+        start_sampler (CumulativeSampler or None): Compiled form of `start_counts`.
+        storage (FlatTables or None): Backing arrays for the compact backend
+            (`compact()` or `load(..., mmap=True)`); None for the dict-backed trie.
+        backoff (bool): True if the model also stores the counts of every
+            lower order, so generation can back off to shorter contexts.
     """
 
-    def __init__(self, names=None, order=2, normalize_case=True) :
+    def __init__(self, names=None, order=2, normalize_case=True, keep_names=True, backoff=False):
         """Set up a new n-gram trie.
 
         Args:
@@ -32,6 +101,15 @@ class NGramTrie:
                 Must be at least 1. Default is 2.
             normalize_case (bool): If True, normalize all inputs using casefold()
                 so mixed-case datasets are handled uniformly. Default True.
+            keep_names (bool): If False, `names` is answered from the terminal
+                markers in the trie instead of a separate set of strings,
+                saving memory. Default True.
+            backoff (bool): If True, `fit` also records the counts of every
+                order below `order` (unigram counts on the root, and the
+                successors of every shorter prefix), and generation falls back
+                to the longest suffix of a missing or exhausted context that
+                has successors (stupid backoff) instead of stopping. Default
+                False.
 
         Raises:
             ValueError: If order is less than 1.
@@ -42,7 +120,14 @@ class NGramTrie:
         self.order = order
         self.names = set()
         self.start_counts = {}
+        self.contexts = {"": self.root} if order == 1 else {}
         self.normalize_case = normalize_case
+        self.keep_names = keep_names
+        self.backoff = backoff
+        self.frozen = False
+        self.start_sampler = None
+        self.storage = None
+        self._derived = {}
         if names:
             self.fit(names)
 
@@ -57,7 +142,7 @@ class NGramTrie:
         """
         return s.casefold() if (self.normalize_case and isinstance(s, str)) else s
     
-    def fit(self, names):
+    def fit(self, names, workers=1):
         """Build the trie and n-gram statistics from training names.
         
          This method  validates the order against the data, resets the trie, and for each name:
@@ -68,32 +153,263 @@ class NGramTrie:
             and, for each position i >= order-1, increments the count of
             `chars[i]` in `nodes_path[i].next_counts`.
 
+        With workers > 1 the names are split into contiguous shards that are
+        counted in a process pool and merged in shard order (see `merge`).
+        The resulting model is identical to a serial fit.
+
         Args:
             names (iterable[str]): Collection of training names.
+            workers (int or None): Number of training processes. None uses
+                os.cpu_count(). Default is 1 (train in this process).
 
         Raises:
             ValueError:If no names are provided or if `order` exceeds the longest
             training name length.
         """
-        names_norm = [self.norm(n) for n in names]
-        self.names = set(names_norm)
+        # Deduplicate in first-seen order so count tables (and therefore seeded
+        # sampling) do not depend on set iteration order or PYTHONHASHSEED.
+        names_norm = list(dict.fromkeys(self.norm(n) for n in names))
 
-        if not self.names:
+        if not names_norm:
             raise ValueError("No training names provided.")
-        
 
+        self._check_order(max(len(n) for n in names_norm))
+
+        self._reset()
+        if workers == 1:
+            self._insert(names_norm)
+        else:
+            from .parallel import fit_shards
+            self._absorb(fit_shards(self.order, names_norm, workers, backoff=self.backoff))
+        self.names = set(names_norm) if self.keep_names else TrieNameSet(self)
+        self._trained()
 
-        max_len = max(len(n) for n in self.names)
+    def _check_order(self, max_len):
         if self.order > max_len:
             raise ValueError(
                 f"order ({self.order}) cannot exceed the longest name length ({max_len})"
             )
 
+    @classmethod
+    def merge(cls, a, b):
+        """Combine two models trained with the same settings into a new one.
+
+        The result is the model a serial `fit` would build on the names of
+        `a` followed by the names of `b`: counts are added, and the
+        contributions of names present in both models are counted once.
+        Shards trained separately (on other machines, or on different days)
+        can therefore be combined without retraining. Neither input is
+        modified; compact or memory-mapped models are accepted.
+
+        Args:
+            a (NGramTrie): First model.
+            b (NGramTrie): Second model.
+
+        Returns:
+            NGramTrie: New dict-backed, unfrozen model.
+
+        Raises:
+            ValueError: If the models differ in order, case normalization or
+                backoff.
+        """
+        return cls.combine([a, b])
+
+    @classmethod
+    def combine(cls, models, weights=None):
+        """Compose one model from several trained models without retraining.
+
+        Without weights the result is the model a serial `fit` would build
+        on the names of each model in turn, exactly as with `merge`. With
+        weights, every model's successor and start counts are multiplied by
+        its weight before they are added (a name in several models then
+        counts once per model), which mixes datasets in chosen proportions.
+        `names` is the union of the models' names. The work is proportional
+        to the size of the models, not of the corpora they were trained on.
+        Neither input is modified; compact or memory-mapped models are
+        accepted.
+
+        Args:
+            models (Iterable[NGramTrie]): Models trained with the same order,
+                case normalization and backoff setting.
+            weights (Iterable[float] or None): One positive weight per model.
+                Non-integer weights give fractional counts, which cannot be
+                compacted or saved.
+
+        Returns:
+            NGramTrie: New dict-backed, unfrozen model.
+
+        Raises:
+            ValueError: If no models are given, the models are incompatible,
+                or the weights do not match the models or are not positive.
+        """
+        models = list(models)
+        if not models:
+            raise ValueError("no models to combine")
+        first = models[0]
+        for m in models[1:]:
+            if m.order != first.order:
+                raise ValueError(f"cannot merge models of order {first.order} and {m.order}")
+            if m.normalize_case != first.normalize_case:
+                raise ValueError("cannot merge models with different normalize_case settings")
+            if m.backoff != first.backoff:
+                raise ValueError("cannot merge a backoff model with a plain one")
+        if weights is not None:
+            weights = [int(w) if isinstance(w, float) and w.is_integer() else w for w in weights]
+            if len(weights) != len(models):
+                raise ValueError(f"expected {len(models)} weights, got {len(weights)}")
+            if any(not w > 0 for w in weights):
+                raise ValueError("weights must be > 0")
+
+        combined = cls._empty(first, keep_names=all(m.keep_names for m in models))
+        for i, m in enumerate(models):
+            combined._absorb_model(m, 1 if weights is None else weights[i])
+        names = set(first.names)
+        for m in models[1:]:
+            if weights is None:
+                shared = [n for n in m.names if n in names]
+                if shared:
+                    combined._insert(shared, -1)
+            names.update(m.names)
+        combined.names = names if combined.keep_names else TrieNameSet(combined)
+        combined._trained()
+        return combined
+
+    @classmethod
+    def _empty(cls, like, keep_names):
+        """Untrained model with the settings of `like`, used by `combine`."""
+        return cls(order=like.order, normalize_case=like.normalize_case, keep_names=keep_names,
+                   backoff=like.backoff)
+
+    def partial_fit(self, names):
+        """Add training names to the model without retraining it.
+
+        Only the paths of the new names are touched: their trie nodes,
+        successor counts and start contexts are updated in place, new contexts
+        are added to the context index, and if the model is frozen only the
+        samplers of the affected contexts (and the start sampler) are
+        recompiled. Names already in the model are ignored, so the counts
+        equal those of a full `fit` on the old and new names together.
+        Derived structures (reachability, NumPy tables) are dropped.
+
+        A compact or memory-mapped model is first rebuilt as a dict-backed
+        trie.
+
+        Args:
+            names (iterable[str]): Names to add.
+
+        Returns:
+            NGramTrie: The model itself, to allow chaining.
+        """
+        self._make_mutable()
+        new = [n for n in dict.fromkeys(self.norm(n) for n in names) if n not in self.names]
+        if not new:
+            return self
+        self._insert(new)
+        if isinstance(self.names, set):
+            self.names.update(new)
+
+        k = self.order - 1
+        touched = {}
+        for name in new:
+            path = self._path(name)
+            if len(name) >= k:
+                self.contexts.setdefault(name[:k], path[k])
+            for node in self._sampled(path):
+                touched[id(node)] = node
+        self._refresh(touched.values())
+        return self
+
+    def forget(self, names):
+        """Remove training names from the model without retraining it.
+
+        The counts contributed by each name are decremented, entries that
+        drop to zero are deleted, and trie nodes left without children,
+        counts or a name ending there are pruned (removing their contexts
+        from the index). Samplers and derived structures are updated as in
+        `partial_fit`. Names not in the model are ignored.
+
+        Args:
+            names (iterable[str]): Names to remove.
+
+        Returns:
+            NGramTrie: The model itself, to allow chaining.
+        """
+        self._make_mutable()
+        gone = [n for n in dict.fromkeys(self.norm(n) for n in names) if n in self.names]
+        if not gone:
+            return self
+
+        k = self.order - 1
+        touched = {}
+        for name in gone:
+            path = self._path(name)
+            path[-1].terminal = False
+            counts = []
+            if self.order == 1 or self.backoff:
+                counts = [(self.root.next_counts, ch) for ch in name]
+            if self.order > 1:
+                first = 1 if self.backoff else k
+                counts += [(path[i].next_counts, name[i]) for i in range(first, len(name))]
+                if len(name) >= k:
+                    counts.append((self.start_counts, name[:k]))
+            for table, key in counts:
+                table[key] -= 1
+                if not table[key]:
+                    del table[key]
+            for node in self._sampled(path):
+                touched[id(node)] = node
+
+            for depth in range(len(name), 0, -1):
+                node = path[depth]
+                if node.children or node.next_counts or node.terminal:
+                    break
+                del path[depth - 1].children[name[depth - 1]]
+                if depth == k:
+                    del self.contexts[name[:k]]
+                    touched.pop(id(node), None)
+        if isinstance(self.names, set):
+            self.names.difference_update(gone)
+        self._refresh(touched.values())
+        return self
+
+    def _path(self, name):
+        """Return the nodes from the root to the end of `name` (which must exist)."""
+        path = [self.root]
+        for ch in name:
+            path.append(path[-1].children[ch])
+        return path
+
+    def _sampled(self, path):
+        """Nodes on `path` whose samplers depend on the counts of its name."""
+        k = self.order - 1
+        depths = range(k + 1) if self.backoff else [k]
+        return [path[d] for d in depths if d < len(path) - 1]
+
+    def _make_mutable(self):
+        """Rebuild dict-backed nodes if the model reads from flat storage."""
+        if self.storage is not None:
+            from . import flat
+            flat.inflate(self, self.storage)
+            self.freeze()
+
+    def _refresh(self, nodes):
+        """Recompile the samplers of `nodes` after an incremental update."""
+        self._derived = {}
+        if self.frozen:
+            self.start_sampler = CumulativeSampler.from_counts(self.start_counts)
+            for node in nodes:
+                node.sampler = CumulativeSampler.from_counts(node.next_counts)
+
+    def _reset(self):
         self.root = Node()
+        self.names = set()
         self.start_counts = {}
+        self.storage = None
+        self._derived = {}
 
-        
-        for name in self.names:
+    def _insert(self, names, weight=1):
+        """Add (or, with weight=-1, remove) the counts of already normalized names."""
+        for name in names:
             if not name:
                 continue
 
@@ -106,21 +422,311 @@ class NGramTrie:
                     node.children[ch] = Node()
                 node = node.children[ch]
                 nodes_path.append(node)
+            if weight > 0:
+                node.terminal = True
 
-            if self.order == 1:
+            if self.order == 1 or self.backoff:
                 for ch in chars:
-                    self.root.next_counts[ch] = self.root.next_counts.get(ch, 0) + 1
-                continue
+                    self.root.next_counts[ch] = self.root.next_counts.get(ch, 0) + weight
+                if self.order == 1:
+                    continue
 
             
             if len(chars) >= self.order - 1:
                 start_ctx = "".join(chars[: self.order - 1])
-                self.start_counts[start_ctx] = self.start_counts.get(start_ctx, 0) + 1
+                self.start_counts[start_ctx] = self.start_counts.get(start_ctx, 0) + weight
 
-            for i in range(self.order - 1, len(chars)):
+            for i in range(1 if self.backoff else self.order - 1, len(chars)):
                 ctx_node = nodes_path[i]
                 nxt = chars[i]
-                ctx_node.next_counts[nxt] = ctx_node.next_counts.get(nxt, 0) + 1
+                ctx_node.next_counts[nxt] = ctx_node.next_counts.get(nxt, 0) + weight
+
+    def _count_table(self):
+        """Export the trie as a picklable count table.
+
+        Returns:
+            tuple[dict, dict]: {prefix: (terminal, next_counts)} in breadth-first
+            order with children in insertion order, and the start counts.
+        """
+        table = {}
+        queue = [("", self.root)]
+        i = 0
+        while i < len(queue):
+            prefix, node = queue[i]
+            i += 1
+            table[prefix] = (node.terminal, node.next_counts)
+            queue.extend((prefix + ch, child) for ch, child in node.children.items())
+        return table, dict(self.start_counts)
+
+    def _absorb(self, parts):
+        """Add count tables from `_count_table` to this (freshly reset) model.
+
+        Tables are added in order. New children and count keys are appended
+        after the existing ones, so dict order matches a serial fit over the
+        names of each part in turn.
+        """
+        nodes = {"": self.root}
+        for table, start_counts in parts:
+            for s, c in start_counts.items():
+                self.start_counts[s] = self.start_counts.get(s, 0) + c
+            for prefix, (terminal, counts) in table.items():
+                node = nodes.get(prefix)
+                if node is None:
+                    node = nodes[prefix] = Node()
+                    nodes[prefix[:-1]].children[prefix[-1]] = node
+                node.terminal = node.terminal or terminal
+                for ch, c in counts.items():
+                    node.next_counts[ch] = node.next_counts.get(ch, 0) + c
+
+    def _absorb_model(self, model, weight=1):
+        """Add the counts of another model's trie to this one, node by node.
+
+        Walks both tries together instead of going through `_count_table`,
+        so no prefix strings are built; subtrees only the other model has
+        are copied without merging. Children and count keys are appended in
+        the same order as `_absorb` would add them.
+        """
+        stack = [(self.root, model.root)]
+        while stack:
+            dst, src = stack.pop()
+            if src.terminal:
+                dst.terminal = True
+            counts = dst.next_counts
+            for ch, c in src.next_counts.items():
+                counts[ch] = counts.get(ch, 0) + c * weight
+            children = dst.children
+            for ch, child in src.children.items():
+                node = children.get(ch)
+                if node is None:
+                    children[ch] = _copy_subtree(child, weight)
+                else:
+                    stack.append((node, child))
+        for s, c in model.start_counts.items():
+            self.start_counts[s] = self.start_counts.get(s, 0) + c * weight
+
+    def _trained(self):
+        self.contexts = self.index_contexts()
+        if self.frozen:
+            self.freeze()
+
+    def freeze(self):
+        """Compile successor counts into sampling tables.
+
+        Every context node (depth order-1, or the root for order 1) gets a
+        `CumulativeSampler` built from its `next_counts`, and `start_counts`
+        is compiled into `start_sampler`. Generation then samples in O(log k)
+        instead of re-summing the counts at every step. The model stays frozen
+        across later calls to `fit`.
+
+        Returns:
+            NGramTrie: The model itself, to allow chaining.
+        """
+        if self.storage is not None:
+            return self
+        self.start_sampler = CumulativeSampler.from_counts(self.start_counts)
+        for node in self.context_nodes():
+            node.sampler = CumulativeSampler.from_counts(node.next_counts)
+        self.frozen = True
+        return self
+
+    def derived(self, key, build):
+        """Return a structure derived from the trained counts, building it once.
+
+        Derived structures (e.g. the NumPy tables used by batch generation)
+        are dropped whenever the model is retrained.
+
+        Args:
+            key (Hashable): Name of the structure.
+            build (Callable[[NGramTrie], Any]): Builds it from the model.
+
+        Returns:
+            Any: The cached structure.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = build(self)
+            return value
+
+    def compact(self):
+        """Switch the trained model to the compact array-backed representation.
+
+        The per-node `children` and `next_counts` dicts are replaced by CSR
+        arrays over an interned alphabet (the same layout `save` writes), and
+        nodes become lightweight `FlatNode` views. `get_node`, `successors`,
+        `start_counts` and generation behave exactly as before, but the model
+        is frozen and read-only until `fit` is called again.
+
+        Returns:
+            NGramTrie: The model itself, to allow chaining.
+        """
+        from . import flat
+        if self.storage is None:
+            flat.attach(self, flat.FlatTables.from_model(self))
+        return self
+
+    def memory_report(self):
+        """Estimate the memory held by the trained model.
+
+        Returns:
+            dict: backend ("dict" or "compact"), nodes, bytes and bytes_per_node.
+        """
+        from . import flat
+        return flat.memory_report(self)
+
+    def save(self, path):
+        """Write the trained model to a versioned flat binary file.
+
+        Args:
+            path (str or Path): Destination file.
+        """
+        from . import flat
+        flat.save(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a model written by `save`.
+
+        With mmap=True the file is memory-mapped and the model reads its
+        arrays in place: nothing is rebuilt, so loading takes milliseconds and
+        processes loading the same file share its pages. Such a model is
+        frozen and read-only until `fit` is called again. With mmap=False the
+        usual dict-backed trie is rebuilt from the file.
+
+        Args:
+            path (str or Path): File written by `save`.
+            mmap (bool): Memory-map the file instead of rebuilding the trie.
+                Default True.
+
+        Returns:
+            NGramTrie: The loaded model.
+
+        Raises:
+            ValueError: If the file is not a valid model file.
+        """
+        from . import flat
+        tables = flat.FlatTables.read(path, mmap=mmap)
+        model = cls(order=tables.order, normalize_case=tables.normalize_case)
+        if mmap:
+            return flat.attach(model, tables)
+        return flat.inflate(model, tables)
+
+    def index_contexts(self):
+        """Build the context index from the trie.
+
+        Returns:
+            dict[str, Node]: Every context of length order-1 mapped to its node.
+        """
+        depth = self.order - 1
+        index = {}
+        stack = [("", self.root)]
+        while stack:
+            ctx, node = stack.pop()
+            if len(ctx) == depth:
+                index[ctx] = node
+                continue
+            stack.extend((ctx + ch, child) for ch, child in node.children.items())
+        return index
+
+    def backoff_node(self, ctx):
+        """Return the node to sample from when context `ctx` has no successors.
+
+        Stupid backoff: the longest proper suffix of `ctx` whose node has
+        successor counts, ending at the root's unigram counts. Lookups are
+        memoized until the model is retrained.
+
+        Args:
+            ctx (str): Context that is missing or has no successors.
+
+        Returns:
+            Node or None: Backoff node, or None if the model has no backoff
+            counts (or no counts at all).
+        """
+        memo = self.derived("backoff", lambda m: {})
+        try:
+            return memo[ctx]
+        except KeyError:
+            pass
+        node = None
+        if self.backoff:
+            for j in range(1, len(ctx) + 1):
+                cand = self.get_node_chars(ctx[j:])
+                if cand is not None and cand.next_counts:
+                    node = cand
+                    break
+        memo[ctx] = node
+        return node
+
+    def score(self, name):
+        """Return the log-probability of `name` and its per-character surprisal.
+
+        The string is scored along the walk generation takes to spell it:
+        the start context from `start_counts` (split into one term per
+        character), then each character from the successor counts of the
+        context before it, backing off like generation does. Where the name
+        ends is not scored. Values are natural logarithms; a string the
+        model cannot produce scores -inf. See `namegen.scoring`.
+
+        Args:
+            name (str): String to score.
+
+        Returns:
+            tuple[float, list[float]]: Log-probability, and one surprisal
+            (minus the log-probability of that character) per character.
+        """
+        from .scoring import score_name
+        return score_name(self, name)
+
+    def score_many(self, names, surprisal=False):
+        """Score many strings at once with vectorized NumPy lookups.
+
+        Gives the same values as `score`, but encodes all strings into one
+        integer matrix and looks every character position up in compiled
+        tables (built once and kept until the model is retrained), so
+        hundreds of thousands of candidates can be ranked in one call.
+
+        Args:
+            names (Iterable[str]): Strings to score.
+            surprisal (bool): Also return per-character surprisal. Default False.
+
+        Returns:
+            np.ndarray or tuple[np.ndarray, np.ndarray]: Log-probability per
+            string; with surprisal=True also an (N, longest string) matrix
+            of per-character surprisal, NaN past each string's end.
+        """
+        from .scoring import score_many
+        return score_many(self, names, surprisal)
+
+    def is_name(self, s):
+        """Return True if `s` is a training name, using the trie's terminal markers.
+
+        Args:
+            s (str): Candidate string.
+
+        Returns:
+            bool: Whether `s` (after normalization) was in the training data.
+        """
+        node = self.get_node(s)
+        return node is not None and bool(node.terminal)
+
+    def context_nodes(self):
+        """Yield the nodes that generation reads successor counts from.
+
+        Yields:
+            Node: The root for order 1, otherwise every node at depth order-1.
+            With backoff, every node down to depth order-1 (the root holding
+            the unigram counts).
+        """
+        depth = self.order - 1
+        stack = [(self.root, 0)]
+        while stack:
+            node, d = stack.pop()
+            if d == depth:
+                yield node
+                continue
+            if self.backoff:
+                yield node
+            stack.extend((child, d + 1) for child in node.children.values())
 
 
     def successors(self, s):
@@ -132,9 +738,9 @@ class NGramTrie:
         Returns:
             dict[str, int]: Mapping of successor characters to counts.
         """
-        s = self.norm(s) 
+        s = self.norm(s)
         ctx = s[-(self.order - 1):] if self.order > 1 else ""
-        node = self.get_node(ctx)
+        node = self.contexts.get(ctx)
         return dict(node.next_counts) if node else {}
 
 
@@ -164,4 +770,254 @@ class NGramTrie:
             node = node.children.get(ch)
             if node is None:
                 return None
-        return node
\ No newline at end of file
+        return node
+
+class MultiOrderTrie(NGramTrie):
+    """An n-gram model that serves every order up to `order` from one trie.
+
+    The successor counts stored on a prefix node do not depend on the order:
+    an order-n model only reads the nodes at depth n-1 (and, with backoff,
+    the shallower ones). Training this class records the counts at every
+    depth, as backoff training does, and the start-context counts of every
+    order in the same pass over the names. `view(n)` then returns an order-n
+    model that shares the trie, its counts and its compiled samplers, so
+    switching orders costs an index of the depth n-1 nodes instead of a
+    `fit`. The model itself is an order-`order` model with backoff.
+
+    Attributes:
+        start_counts_by_order (dict[int, dict[str, int]]): `start_counts` of
+            every order from 2 to `order` (the last one is `start_counts`).
+        longest (int): Length of the longest training name; orders above it
+            have no views.
+    """
+
+    def __init__(self, names=None, order=10, normalize_case=True, keep_names=True):
+        """Set up a new multi-order trie.
+
+        Args:
+            names (iterable[str] or None): Training names. If None, the trie
+                starts empty.
+            order (int): Highest order collected. Must be at least 1; it may
+                exceed the longest name, so models trained with the same cap
+                on different files can be combined. Default 10.
+            normalize_case (bool): As in `NGramTrie`. Default True.
+            keep_names (bool): As in `NGramTrie`. Default True.
+
+        Raises:
+            ValueError: If order is less than 1.
+        """
+        super().__init__(order=order, normalize_case=normalize_case, keep_names=keep_names, backoff=True)
+        self._views = {}
+        self._reset()
+        if names:
+            self.fit(names)
+
+    @classmethod
+    def _empty(cls, like, keep_names):
+        return cls(order=like.order, normalize_case=like.normalize_case, keep_names=keep_names)
+
+    @classmethod
+    def combine(cls, models, weights=None):
+        """`NGramTrie.combine` for multi-order models; start counts of every order are combined too.
+
+        Raises:
+            ValueError: As in `NGramTrie.combine`, or if a model is not a
+                `MultiOrderTrie` of the same order.
+        """
+        models = list(models)
+        if any(not isinstance(m, MultiOrderTrie) for m in models):
+            raise ValueError("multi-order models can only be combined with each other")
+        return super().combine(models, weights)
+
+    def fit(self, names, workers=1):
+        """Build the trie and the counts of every order in one pass over `names`.
+
+        Args:
+            names (iterable[str]): Collection of training names.
+            workers (int): Must be 1; the start counts of every order are
+                recorded in name order, which sharded training would not keep.
+
+        Raises:
+            ValueError: If no names are provided or workers is not 1.
+        """
+        if workers != 1:
+            raise ValueError("MultiOrderTrie trains in a single process (workers=1)")
+        super().fit(names)
+
+    def partial_fit(self, names):
+        new = [n for n in dict.fromkeys(self.norm(n) for n in names) if n not in self.names]
+        if not new:
+            return self
+        super().partial_fit(new)
+        for view in self._views.values():
+            view._sync(new)
+        return self
+
+    partial_fit.__doc__ = NGramTrie.partial_fit.__doc__
+
+    def forget(self, names):
+        gone = [n for n in dict.fromkeys(self.norm(n) for n in names) if n in self.names]
+        if not gone:
+            return self
+        super().forget(gone)
+        for name in gone:
+            for n in range(2, min(self.order, len(name) + 2)):
+                table = self.start_counts_by_order[n]
+                table[name[:n - 1]] -= 1
+                if not table[name[:n - 1]]:
+                    del table[name[:n - 1]]
+        if any(len(name) == self.longest for name in gone):
+            self.longest = max(map(len, self.names), default=0)
+        for view in self._views.values():
+            view._sync(gone)
+        return self
+
+    forget.__doc__ = NGramTrie.forget.__doc__
+
+    def compact(self):
+        """Not supported: flat storage has no room for the per-order start counts.
+
+        Raises:
+            ValueError: Always; save a `view` and load it instead.
+        """
+        raise ValueError("a MultiOrderTrie cannot be compacted or saved; save view(order) instead")
+
+    def save(self, path):
+        """Not supported, see `compact`.
+
+        Raises:
+            ValueError: Always; save a `view` instead.
+        """
+        self.compact()
+
+    def _check_order(self, max_len):
+        pass
+
+    def _trained(self):
+        super()._trained()
+        for view in self._views.values():
+            view._sync()
+
+    def _reset(self):
+        super()._reset()
+        self.longest = 0
+        self.start_counts_by_order = {n: {} for n in range(2, self.order)}
+        if self.order > 1:
+            self.start_counts_by_order[self.order] = self.start_counts
+
+    def _insert(self, names, weight=1):
+        names = [n for n in names if n]
+        super()._insert(names, weight)
+        by_order = self.start_counts_by_order
+        for name in names:
+            if len(name) > self.longest and weight > 0:
+                self.longest = len(name)
+            for n in range(2, min(self.order, len(name) + 2)):
+                table = by_order[n]
+                ctx = name[:n - 1]
+                table[ctx] = table.get(ctx, 0) + weight
+
+    def _absorb_model(self, model, weight=1):
+        super()._absorb_model(model, weight)
+        self.longest = max(self.longest, model.longest)
+        for n, counts in model.start_counts_by_order.items():
+            if n == self.order:
+                continue
+            table = self.start_counts_by_order[n]
+            for ctx, c in counts.items():
+                table[ctx] = table.get(ctx, 0) + c * weight
+
+    def view(self, order, backoff=False):
+        """Return an order-`order` model that reads this model's trie.
+
+        The view behaves exactly like `NGramTrie(names, order=order,
+        backoff=backoff)` trained on the same names, including seeded
+        output, but shares the nodes, counts and compiled samplers. Views
+        are cached, and kept in step when the model is retrained or updated.
+
+        Args:
+            order (int): n-gram order, from 1 to `self.order`.
+            backoff (bool): Back off to shorter contexts. Default False.
+
+        Returns:
+            OrderView: Read-only model of that order.
+
+        Raises:
+            ValueError: If order is not between 1 and `self.order`, or exceeds
+                the longest training name.
+        """
+        if not 1 <= order <= self.order:
+            raise ValueError(f"order must be between 1 and {self.order}")
+        if order > self.longest:
+            raise ValueError(f"order ({order}) cannot exceed the longest name length ({self.longest})")
+        key = (int(order), bool(backoff))
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = OrderView(self, *key)
+        return view
+
+
+class OrderView(NGramTrie):
+    """Read-only order-n model over the trie of a `MultiOrderTrie`.
+
+    Created by `MultiOrderTrie.view`. Generation, scoring, constraints and
+    the NumPy tables work as on a trained `NGramTrie`, and `save` writes a
+    standalone order-n model file. `partial_fit`, `forget` and `compact` are
+    refused because the trie belongs to `base` and views are shared by every
+    caller of `view`.
+
+    Attributes:
+        base (MultiOrderTrie): The model whose trie is shared.
+    """
+
+    def __init__(self, base, order, backoff=False):
+        super().__init__(order=order, normalize_case=base.normalize_case, keep_names=base.keep_names,
+                         backoff=backoff)
+        self.base = base
+        self._sync()
+        if base.frozen:
+            # The base compiled a sampler on every node down to its own
+            # context depth, which covers every view's contexts.
+            self.start_sampler = CumulativeSampler.from_counts(self.start_counts)
+            self.frozen = True
+
+    def freeze(self):
+        if not self.frozen:
+            self.base.freeze()
+            self.start_sampler = CumulativeSampler.from_counts(self.start_counts)
+            self.frozen = True
+        return self
+
+    def _sync(self, names=None):
+        """Catch up with the base after it was trained (names=None) or had `names` added or removed."""
+        base = self.base
+        if names is None:
+            self.root = base.root
+            self.names = base.names
+            self.start_counts = base.start_counts_by_order.get(self.order, {})
+            self.contexts = self.index_contexts()
+        elif self.order > 1:
+            k = self.order - 1
+            for ctx in dict.fromkeys(name[:k] for name in names if len(name) >= k):
+                node = self.get_node_chars(ctx)
+                if node is None:
+                    self.contexts.pop(ctx, None)
+                else:
+                    self.contexts[ctx] = node
+        self._derived = {}
+        if self.frozen:
+            self.start_sampler = CumulativeSampler.from_counts(self.start_counts)
+
+    def partial_fit(self, names):
+        raise ValueError("an OrderView is read-only; update its base MultiOrderTrie instead")
+
+    forget = partial_fit
+
+    def compact(self):
+        """Not supported: the trie is shared with the base model and its other views.
+
+        Raises:
+            ValueError: Always; `save` the view and `load` the file for a
+                compact standalone model.
+        """
+        raise ValueError("an OrderView shares its base's trie; save() it and load() the file to get a compact model")
@@ -0,0 +1,317 @@
+"""NumPy kernels for bulk generation.
+
+`ArrayTables` compiles a trained `NGramTrie` into integer arrays over an
+interned alphabet:
+
+    contexts      every (order-1)-gram context, numbered 0..C-1; for backoff
+                  models, every trie path up to order-1 characters that has
+                  successor counts (a context stands for its longest suffix
+                  among them, the node generation samples from)
+    row_ptr       CSR row pointers into the successor arrays, one row per context
+    succ_char     successor character id
+    succ_next     id of the context reached after emitting the successor, or -1
+    succ_cum      running total of the successor counts over *all* rows, so a
+                  whole batch is sampled with one `searchsorted` call
+    row_cum       the same totals as a dense (contexts x max successors)
+                  matrix of per-row cumulative probabilities, used instead
+                  of `searchsorted` when it is small enough
+    trie_keys/trie_child/terminal
+                  the prefix trie as a sorted (node * A + char) -> child table,
+                  used to tell whether a walker's prefix is a training name
+
+`generate_batch` advances many candidate walkers in lockstep over these arrays,
+applying the same stop, backoff and acceptance rules as
+`NGramGenerator.generate`.
+"""
+import numpy as np
+
+# Largest dense cumulative-probability matrix (in cells) built for sampling.
+DENSE_LIMIT = 1 << 24
+
+
+class ArrayTables:
+    """Integer array form of a trained model for vectorized generation.
+
+    Attributes:
+        order (int): n-gram order of the source model.
+        alphabet (str): Characters indexed by character id.
+        contexts (list[str]): Context strings indexed by context id.
+        backoff_row (np.ndarray or None): For backoff models, True for rows
+            that stand for a missing or empty context (a backoff point).
+    """
+
+    def __init__(self, model):
+        self.order = model.order
+        k = model.order - 1
+        backoff = bool(model.backoff) and k > 0
+        sources = _backoff_sources(model.root, k) if backoff else {
+            ctx: node.next_counts for ctx, node in model.contexts.items()}
+        contexts = list(sources)
+        ctx_id = {ctx: i for i, ctx in enumerate(contexts)}
+
+        def resolve(ctx):
+            i = ctx_id.get(ctx, -1)
+            if i < 0 and backoff:
+                i = next((ctx_id[ctx[j:]] for j in range(1, len(ctx) + 1) if ctx[j:] in ctx_id), -1)
+            return i
+
+        chars = set()
+        for ctx in contexts:
+            chars.update(ctx)
+            chars.update(sources[ctx])
+        for name in model.names:
+            chars.update(name)
+        self.alphabet = "".join(sorted(chars))
+        index = {ch: i for i, ch in enumerate(self.alphabet)}
+        self.contexts = contexts
+        self.backoff_row = np.asarray([len(ctx) < k for ctx in contexts], dtype=bool) if backoff else None
+
+        row_ptr, succ_char, succ_next, counts = [0], [], [], []
+        for ctx in contexts:
+            for ch, c in sources[ctx].items():
+                succ_char.append(index[ch])
+                succ_next.append(resolve((ctx + ch)[-k:] if k else ""))
+                counts.append(c)
+            row_ptr.append(len(succ_char))
+        self.row_ptr = np.asarray(row_ptr, dtype=np.int64)
+        self.succ_char = np.asarray(succ_char, dtype=np.int32)
+        self.succ_next = np.asarray(succ_next, dtype=np.int32)
+        self.succ_cum = np.cumsum(np.asarray(counts, dtype=np.float64))
+        self.row_cum = None
+        degree = np.diff(self.row_ptr)
+        width = int(degree.max()) if len(degree) else 0
+        if 0 < width and len(contexts) * width <= DENSE_LIMIT:
+            row_cum = np.ones((len(contexts), width), dtype=np.float64)
+            for r in np.flatnonzero(degree):
+                lo, hi = self.row_ptr[r], self.row_ptr[r + 1]
+                c = np.cumsum(counts[lo:hi], dtype=np.float64)
+                row_cum[r, : hi - lo] = c / c[-1] if c[-1] > 0 else 1.0
+            self.row_cum = row_cum
+
+        # Prefix trie, breadth-first, with terminal flags for training names.
+        A = len(self.alphabet)
+        keys, child, terminal = [], [], [False]
+        node_id = {"": 0}
+        queue = [("", model.root)]
+        i = 0
+        while i < len(queue):
+            prefix, node = queue[i]
+            parent = node_id[prefix]
+            i += 1
+            for ch, sub in node.children.items():
+                p = prefix + ch
+                node_id[p] = len(terminal)
+                terminal.append(bool(sub.terminal))
+                keys.append(parent * A + index[ch])
+                child.append(node_id[p])
+                queue.append((p, sub))
+        order_ = np.argsort(np.asarray(keys, dtype=np.int64), kind="stable")
+        self.trie_keys = np.asarray(keys, dtype=np.int64)[order_]
+        self.trie_child = np.asarray(child, dtype=np.int32)[order_]
+        self.terminal = np.asarray(terminal, dtype=bool)
+
+        # Start distribution: start contexts (order > 1) or first characters (order 1).
+        if k:
+            starts = list(model.start_counts.items())
+            self.start_chars = np.asarray([[index[ch] for ch in s] for s, _ in starts],
+                                          dtype=np.int32).reshape(len(starts), k)
+            self.start_ctx = np.asarray([resolve(s) for s, _ in starts], dtype=np.int32)
+            self.start_node = np.asarray([node_id.get(s, -1) for s, _ in starts], dtype=np.int32)
+            start_counts = [c for _, c in starts]
+        else:
+            first = list(model.root.next_counts.items())
+            self.start_chars = np.asarray([[index[ch]] for ch, _ in first], dtype=np.int32).reshape(len(first), 1)
+            self.start_ctx = np.zeros(len(first), dtype=np.int32)
+            self.start_node = np.asarray([node_id.get(ch, -1) for ch, _ in first], dtype=np.int32)
+            start_counts = [c for _, c in first]
+        self.start_cum = np.cumsum(np.asarray(start_counts, dtype=np.float64))
+        self._letters = np.array(list(self.alphabet) or [""], dtype="<U1")
+
+    def sample_rows(self, rows, u):
+        """Sample one successor index per context row.
+
+        Args:
+            rows (np.ndarray): Context ids with at least one successor.
+            u (np.ndarray): Uniform draws in [0, 1), one per row.
+
+        Returns:
+            np.ndarray: Indices into the successor arrays.
+        """
+        lo = self.row_ptr[rows]
+        hi = self.row_ptr[rows + 1]
+        if self.row_cum is not None:
+            j = lo + (self.row_cum[rows] < u[:, None]).sum(axis=1)
+            return np.minimum(j, hi - 1)
+        cum = self.succ_cum
+        base = np.where(lo > 0, cum[np.maximum(lo - 1, 0)], 0.0)
+        target = base + u * (cum[hi - 1] - base)
+        j = np.searchsorted(cum, target, side="left")
+        return np.clip(j, lo, hi - 1)
+
+    def sample_starts(self, u):
+        """Sample start indices for uniform draws `u`."""
+        total = self.start_cum[-1]
+        j = np.searchsorted(self.start_cum, u * total, side="left")
+        return np.minimum(j, len(self.start_cum) - 1)
+
+    def step_trie(self, nodes, chars):
+        """Advance prefix-trie positions; walkers that leave the trie get -1."""
+        out = np.full(len(nodes), -1, dtype=np.int32)
+        on = nodes >= 0
+        if on.any() and len(self.trie_keys):
+            keys = nodes[on].astype(np.int64) * len(self.alphabet) + chars[on]
+            pos = np.searchsorted(self.trie_keys, keys)
+            pos_c = np.minimum(pos, len(self.trie_keys) - 1)
+            hit = self.trie_keys[pos_c] == keys
+            out[np.flatnonzero(on)[hit]] = self.trie_child[pos_c[hit]]
+        return out
+
+    def decode(self, chars, lengths):
+        """Turn rows of character ids into strings."""
+        if len(chars) == 0:
+            return []
+        width = chars.shape[1]
+        letters = self._letters[chars]
+        letters[np.arange(width)[None, :] >= lengths[:, None]] = ""
+        return np.ascontiguousarray(letters).view(f"<U{width}").ravel().tolist()
+
+
+def _backoff_sources(root, k):
+    """Successor counts of every trie path up to length k that has any."""
+    sources = {}
+    stack = [("", root)]
+    while stack:
+        path, node = stack.pop()
+        if node.next_counts:
+            sources[path] = node.next_counts
+        if len(path) < k:
+            stack.extend((path + ch, child) for ch, child in node.children.items())
+    return sources
+
+
+def generate_batch(tables, n, rng, target_len=None, max_len=20, min_len=1, stop_prob=0.20,
+                   retries=500, unique=False, walkers=None):
+    """Generate up to `n` names by advancing many walkers in lockstep.
+
+    Each walker is one `generate_once` attempt, numbered in the order it was
+    started. Finished walkers, whether accepted or rejected (wrong length,
+    training name), are refilled with fresh attempts until enough names have
+    been accepted or `n * retries` attempts have been started. The walkers
+    still running are then drained, and the first `n` accepted attempts in
+    start order are returned. Short attempts finish first, so taking
+    accepted names in completion order would bias the batch towards short
+    names; start order gives the same distribution as calling `generate`
+    repeatedly.
+
+    Args:
+        tables (ArrayTables): Compiled model.
+        n (int): Number of names wanted.
+        rng (np.random.Generator): Source of randomness.
+        target_len, max_len, min_len, stop_prob, retries: As in
+            `NGramGenerator.generate`.
+        unique (bool): Reject names already produced by this batch.
+        walkers (int or None): Number of concurrent walkers. Default scales with n.
+
+    Returns:
+        list[str]: Accepted names (at most n).
+    """
+    if n <= 0 or len(tables.start_cum) == 0 or tables.start_cum[-1] <= 0:
+        return []
+    W = walkers or min(max(2 * n, 64), 1 << 16)
+    k = tables.start_chars.shape[1]
+    width = max(max_len, k)
+    budget = n * retries
+
+    chars = np.zeros((W, width), dtype=np.int32)
+    length = np.zeros(W, dtype=np.int32)
+    ctx = np.zeros(W, dtype=np.int32)
+    node = np.zeros(W, dtype=np.int32)
+    attempt = np.zeros(W, dtype=np.int64)
+    active = np.zeros(W, dtype=bool)
+    accepted_ids, accepted_names = [], []
+    distinct = set()
+    started = 0
+
+    def refill(idx):
+        nonlocal started
+        wanted = len(distinct) if unique else len(accepted_names)
+        if wanted >= n:
+            return
+        idx = idx[: max(0, budget - started)]
+        if len(idx) == 0:
+            return
+        attempt[idx] = np.arange(started, started + len(idx))
+        started += len(idx)
+        s = tables.sample_starts(rng.random(len(idx)))
+        chars[idx, :k] = tables.start_chars[s]
+        length[idx] = k
+        ctx[idx] = tables.start_ctx[s]
+        node[idx] = tables.start_node[s]
+        active[idx] = True
+
+    refill(np.arange(W))
+    while active.any():
+        idx = np.flatnonzero(active)
+        L = length[idx]
+        done = L >= max_len
+        if target_len is not None:
+            done |= L >= target_len
+        else:
+            p = node[idx]
+            named = (L >= min_len) & (p >= 0)
+            named[named] = tables.terminal[p[named]]
+            if named.any():
+                done[named] = rng.random(int(named.sum())) < stop_prob
+
+        go = idx[~done]
+        if tables.backoff_row is not None and target_len is None:
+            # As in `generate`, a backoff point is a possible end, taken with stop_prob.
+            at = go[(length[go] >= min_len) & (ctx[go] >= 0)]
+            at = at[tables.backoff_row[ctx[at]]]
+            if len(at):
+                end = rng.random(len(at)) < stop_prob
+                if end.any():
+                    done[np.isin(idx, at[end])] = True
+                    go = idx[~done]
+        rows = ctx[go]
+        alive = rows >= 0
+        alive[alive] = tables.row_ptr[rows[alive] + 1] > tables.row_ptr[rows[alive]]
+        stuck = go[~alive]
+        go = go[alive]
+        if len(go):
+            j = tables.sample_rows(ctx[go], rng.random(len(go)))
+            c = tables.succ_char[j]
+            chars[go, length[go]] = c
+            length[go] += 1
+            ctx[go] = tables.succ_next[j]
+            node[go] = tables.step_trie(node[go], c)
+
+        finished = np.concatenate([idx[done], stuck])
+        if len(finished) == 0:
+            continue
+        L = length[finished]
+        ok = (L == target_len) if target_len is not None else (L >= min_len)
+        p = node[finished]
+        on = p >= 0
+        is_name = np.zeros(len(finished), dtype=bool)
+        is_name[on] = tables.terminal[p[on]]
+        ok &= ~is_name
+        names = tables.decode(chars[finished[ok]], L[ok])
+        accepted_ids.extend(attempt[finished[ok]].tolist())
+        accepted_names.extend(names)
+        if unique:
+            distinct.update(names)
+        active[finished] = False
+        refill(finished)
+
+    results, seen = [], set()
+    for i in np.argsort(np.asarray(accepted_ids, dtype=np.int64), kind="stable"):
+        name = accepted_names[i]
+        if unique:
+            if name in seen:
+                continue
+            seen.add(name)
+        results.append(name)
+        if len(results) >= n:
+            break
+    return results
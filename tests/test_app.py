@@ -0,0 +1,46 @@
+# tests/test_app.py
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import app
+from namegen.pool import CancelToken
+
+def test_imports_do_not_load_gradio_or_numpy():
+    code = ("import sys, namegen, namegen.cli, namegen.server, app; "
+            "print(sorted(m for m in ('gradio', 'numpy') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+def test_prewarm_choices():
+    assert app.prewarm_choices("none") == []
+    assert app.prewarm_choices("default") == [app.DEFAULT_DATASET]
+    assert app.prewarm_choices("all")[0] == app.DEFAULT_DATASET
+    assert app.prewarm_choices(f"Male (male.txt), {app.DEFAULT_DATASET}") == [app.DEFAULT_DATASET, "Male (male.txt)"]
+    with pytest.raises(ValueError, match="unknown dataset"):
+        app.prewarm_choices("male")
+
+def test_prewarm_fills_the_cache_in_the_background():
+    warm = app.Prewarmer(["Male (male.txt)", "Both (female + male)"])
+    assert not warm.ready and "not started" in warm.status()
+    assert warm.start() is warm.start()
+    statuses = list(warm.watch(interval=0.01))
+    assert warm.ready and statuses[-1].startswith("✅") and not warm.failed
+    misses = app.MODEL_CACHE.stats()["misses"]
+    model, names, _ = app.get_model("Both (female + male)", app.DEFAULT_ORDER, True)
+    assert app.MODEL_CACHE.stats()["misses"] == misses
+    assert model.order == app.DEFAULT_ORDER and not model.backoff and len(names) > 7000
+
+def test_prewarm_reports_failures():
+    warm = app.Prewarmer([app.CUSTOM_MIX]).start()
+    assert warm.wait(10) and warm.done == 1
+    assert len(warm.failed) == 1 and "Failed" in warm.status()
+    assert app.Prewarmer([]).status() == "Models are trained on first use."
+
+def test_run_generation_steers_to_the_exact_length_when_guided():
+    args = (app.DEFAULT_DATASET, 3, 6, 12, 1, 0.2, 10, 50, True, True)
+    out = app.run_generation(CancelToken(), *args, guided=True)[1]
+    assert [len(n) for n in out.split("\n")] == [6] * 10
@@ -0,0 +1,52 @@
+"""
+Regression checks of the benchmark suite in benchmarks/suite.py.
+
+The comparison logic is tested on every run. The suite itself is marked
+`benchmark` and deselected by default:
+
+    pytest -m benchmark
+
+Set NAMEGEN_BENCH_OUT to keep the JSON results and NAMEGEN_BENCH_BASELINE to
+fail on regressions against an earlier results file.
+"""
+import importlib.util
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+SUITE_PATH = Path(__file__).resolve().parents[1] / "benchmarks" / "suite.py"
+
+
+def _load_suite():
+    spec = importlib.util.spec_from_file_location("namegen_benchmark_suite", SUITE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _report(**metrics):
+    return {"results": [{"dataset": "d.txt", "order": 3, "case": "fit", **metrics}]}
+
+def test_compare_flags_only_changes_beyond_threshold():
+    suite = _load_suite()
+    base = _report(fit_s=1.0, names_per_s=1000.0, attempts_per_name=2.0)
+    assert suite.compare(base, _report(fit_s=1.2, names_per_s=800.0, attempts_per_name=2.1)) == []
+    problems = suite.compare(base, _report(fit_s=1.5, names_per_s=700.0, attempts_per_name=None))
+    assert len(problems) == 3
+    assert suite.compare(base, _report(fit_s=1.5, names_per_s=1000.0, attempts_per_name=2.0),
+                         {"fit_s": 0.6}) == []
+
+@pytest.mark.benchmark
+def test_benchmark_suite():
+    suite = _load_suite()
+    report = suite.run_suite(orders=[1, 2, 3, 5, 8], names=100)
+    assert report["results"]
+    out = os.environ.get("NAMEGEN_BENCH_OUT")
+    if out:
+        Path(out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    baseline = os.environ.get("NAMEGEN_BENCH_BASELINE")
+    if baseline:
+        problems = suite.compare(json.loads(Path(baseline).read_text(encoding="utf-8")), report)
+        assert not problems, "\n".join(problems)
@@ -0,0 +1,61 @@
+# tests/test_cache.py
+import os
+import threading
+import time
+import pytest
+from namegen import ModelCache, NGramTrie
+
+def test_cache_hits_skip_build_and_count():
+    cache = ModelCache(maxsize=2)
+    calls = []
+    def build():
+        calls.append(1)
+        return NGramTrie(["anna", "anne"], order=2)
+    m1 = cache.get_or_build("k", build)
+    m2 = cache.get_or_build("k", build)
+    assert m1 is m2
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+def test_cache_evicts_least_recently_used():
+    cache = ModelCache(maxsize=2)
+    cache.get_or_build("a", lambda: 1)
+    cache.get_or_build("b", lambda: 2)
+    cache.get_or_build("a", lambda: 1)
+    cache.get_or_build("c", lambda: 3)
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+def test_cache_does_not_store_failed_builds():
+    cache = ModelCache()
+    def bad():
+        raise ValueError("boom")
+    with pytest.raises(ValueError):
+        cache.get_or_build("k", bad)
+    assert "k" not in cache
+    assert cache.get_or_build("k", lambda: 5) == 5
+
+def test_cache_key_tracks_file_mtime(tmp_path):
+    p = tmp_path / "names.txt"
+    p.write_text("anna\n", encoding="utf-8")
+    k1 = ModelCache.key_for([p], 3, True)
+    assert k1 == ModelCache.key_for([p], 3, True)
+    assert k1 != ModelCache.key_for([p], 2, True)
+    stat = p.stat()
+    os.utime(p, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert k1 != ModelCache.key_for([p], 3, True)
+
+def test_cache_coalesces_concurrent_builds():
+    cache = ModelCache()
+    calls = []
+    def slow_build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_build("k", slow_build))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
@@ -0,0 +1,57 @@
+# tests/test_cli.py
+from pathlib import Path
+import pytest
+from namegen.cli import main
+
+MALE = Path(__file__).resolve().parents[1] / "data" / "male.txt"
+
+NAMES = ["anna", "annika", "bob", "bella", "carl", "carla", "diana", "dina", "erik", "erika"]
+
+@pytest.fixture
+def names_file(tmp_path):
+    p = tmp_path / "names.txt"
+    p.write_text("\n".join(NAMES), encoding="utf-8")
+    return p
+
+def _run(tmp_path, *args):
+    out = tmp_path / "out.txt"
+    code = main([*map(str, args), "-o", str(out), "--quiet"])
+    return code, out.read_text(encoding="utf-8").splitlines()
+
+def test_writes_count_names_reproducibly(tmp_path, names_file):
+    code, a = _run(tmp_path, "--train", names_file, "--order", 2, "-n", 50, "--seed", 3, "--chunk-size", 16)
+    assert code == 0 and len(a) == 50
+    assert all(name and name.lower() not in NAMES for name in a)
+    _, b = _run(tmp_path, "--train", names_file, "--order", 2, "-n", 50, "--seed", 3, "--chunk-size", 16)
+    assert a == b
+
+def test_unique_never_repeats_and_stops_when_exhausted(tmp_path, names_file):
+    code, out = _run(tmp_path, "--train", MALE, "-n", 100000, "--unique", "--target-len", 3,
+                     "--chunk-size", 500, "--seed", 0)
+    assert code == 2
+    assert 0 < len(out) == len(set(out)) < 100000
+
+def test_saved_model_gives_the_same_names(tmp_path, names_file):
+    model = tmp_path / "m.ngm"
+    _, trained = _run(tmp_path, "--train", names_file, "--order", 2, "--save", model, "-n", 20, "--seed", 1)
+    _, loaded = _run(tmp_path, "--model", model, "-n", 20, "--seed", 1)
+    assert loaded == trained
+
+def test_invalid_options_exit_with_usage_error(names_file):
+    with pytest.raises(SystemExit):
+        main(["--train", str(names_file), "--min-len", "5", "--max-len", "3"])
+    assert main(["--train", "missing.txt", "--quiet"]) == 1
+
+def test_constraints_are_applied_and_rejected_with_batch(tmp_path):
+    code, out = _run(tmp_path, "--train", MALE, "-n", 30, "--suffix", "er", "--seed", 2)
+    assert code == 0 and len(out) == 30 and all(s.endswith("er") for s in out)
+    with pytest.raises(SystemExit):
+        main(["--train", str(MALE), "--suffix", "er", "--batch"])
+
+def test_sampling_shape_options(tmp_path):
+    code, out = _run(tmp_path, "--train", MALE, "-n", 20, "--top-k", 2, "--temperature", 0.5, "--seed", 1)
+    assert code == 0 and len(out) == 20
+    with pytest.raises(SystemExit):
+        main(["--train", str(MALE), "--temperature", "0"])
+    with pytest.raises(SystemExit):
+        main(["--train", str(MALE), "--top-p", "0.5", "--batch"])
@@ -0,0 +1,78 @@
+# tests/test_constraints.py
+import itertools
+import random
+import re
+from pathlib import Path
+import pytest
+from namegen import NGramTrie, NGramGenerator
+from namegen.constraints import DFA, Constraint, constraint_table, make_constraint, parse_pattern
+from namegen.datasets import load_names
+
+MALE = Path(__file__).resolve().parents[1] / "data" / "male.txt"
+
+NAMES = ["anna", "annika", "alina", "bob", "bella", "carl", "carla", "carina", "diana", "dina",
+         "erik", "erika", "nina", "lina", "marina", "karin", "kalle", "kelly", "ella", "linda"]
+
+@pytest.mark.parametrize("pattern", ["a(b|c)*", "[^a]+b?", "(ab){1,2}c{2,}", "a.c|b", "[a-c]?\\.", "^ab*$"])
+def test_pattern_dfa_agrees_with_re(pattern):
+    dfa = DFA.from_tree(parse_pattern(pattern), "abc.")
+    for n in range(6):
+        for chars in itertools.product("abc.", repeat=n):
+            s = "".join(chars)
+            q = dfa.run(s)
+            assert (q is not None and q in dfa.accepting) == bool(re.fullmatch(pattern, s)), s
+
+@pytest.mark.parametrize("pattern", ["(ab", "a)", "*a", "[ab", "a{3,1}", "a\\"])
+def test_malformed_patterns_raise_value_error(pattern):
+    with pytest.raises(ValueError):
+        Constraint(pattern=pattern)
+
+@pytest.mark.parametrize("kw", [
+    dict(prefix="ka"),
+    dict(suffix="er"),
+    dict(prefix="c", suffix="a"),
+    dict(pattern="[^e]*l+[aeiouy]"),
+    dict(prefix="Ma", pattern="ma.*", target_len=6),
+])
+def test_constrained_names_satisfy_the_constraint(kw):
+    m = NGramTrie(load_names(MALE), order=3).freeze()
+    gen = NGramGenerator(m, rng=random.Random(0))
+    out = [gen.generate(max_len=10, min_len=3, capitalize=False, **kw) for _ in range(50)]
+    assert all(out)
+    for s in out:
+        assert s not in m.names and 3 <= len(s) <= 10
+        assert s.startswith(kw.get("prefix", "").lower()) and s.endswith(kw.get("suffix", ""))
+        if "pattern" in kw:
+            assert re.fullmatch(kw["pattern"].lower(), s)
+        if "target_len" in kw:
+            assert len(s) == kw["target_len"]
+
+def test_impossible_constraint_returns_none_without_retrying():
+    m = NGramTrie(NAMES, order=2)
+    gen = NGramGenerator(m, rng=random.Random(0))
+    assert gen.generate(suffix="qq", retries=10**9) is None
+    assert gen.generate(prefix="ann", target_len=2, retries=10**9) is None
+
+def test_constraint_table_is_cached_per_constraint_and_dropped_on_refit():
+    m = NGramTrie(NAMES, order=3)
+    c = Constraint(suffix="na")
+    table = constraint_table(m, c)
+    assert constraint_table(m, Constraint(suffix="na")) is table
+    assert constraint_table(m, Constraint(suffix="la")) is not table
+    m.fit(NAMES)
+    assert constraint_table(m, c) is not table
+
+def test_backoff_model_supports_constraints():
+    m = NGramTrie(load_names(MALE), order=4, backoff=True)
+    gen = NGramGenerator(m, rng=random.Random(3))
+    out = [gen.generate(max_len=12, suffix="ina", capitalize=False) for _ in range(30)]
+    assert all(s and s.endswith("ina") for s in out)
+
+def test_constraints_are_casefolded_like_the_model():
+    m = NGramTrie(["Straße", "Strauss", "Grüße", "Maßen", "Masse", "Gasse", "Tasse"], order=2, backoff=True)
+    assert make_constraint("STRA", "ße", None, True) == Constraint("stra", "sse").casefold()
+    gen = NGramGenerator(m, rng=random.Random(0))
+    out = [gen.generate(max_len=10, prefix="STRAß", pattern="[A-Z]*ß[^ß]+", capitalize=False) for _ in range(20)]
+    assert all(s and s.startswith("strass") and len(s) > 6 for s in out)
+    dfa = Constraint(pattern="ma[ßx]e").casefold().dfa("masxe")
+    assert dfa.run("masse") in dfa.accepting and dfa.run("maxe") in dfa.accepting
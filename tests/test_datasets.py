@@ -0,0 +1,36 @@
+# tests/test_datasets.py
+import os
+import pytest
+from namegen import ModelCache
+from namegen import datasets
+
+@pytest.mark.parametrize("threshold", [0, 1 << 20])
+def test_read_names_strips_dedups_and_skips_blank_lines(tmp_path, monkeypatch, threshold):
+    monkeypatch.setattr(datasets, "MMAP_THRESHOLD", threshold)
+    p = tmp_path / "n.txt"
+    p.write_bytes(b"Anna\r\n  Bob \n\n\xffCarl\nAnna\n")
+    assert datasets.read_names(p) == ("Anna", "Bob", "Carl")
+
+def test_load_names_is_cached_until_the_file_changes(tmp_path):
+    cache = ModelCache()
+    p = tmp_path / "n.txt"
+    p.write_text("anna\nbob\n", encoding="utf-8")
+    assert datasets.load_names(p, cache) == ("anna", "bob")
+    assert datasets.load_names(p, cache) == ("anna", "bob")
+    assert cache.stats()["hits"] == 1
+
+    p.write_text("anna\nbob\ncarl\n", encoding="utf-8")
+    os.utime(p, ns=(1, 1))
+    assert datasets.load_names(p, cache) == ("anna", "bob", "carl")
+    assert cache.stats()["misses"] == 2
+
+def test_load_many_merges_cached_files_in_order(tmp_path):
+    cache = ModelCache()
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("anna\nbob\n", encoding="utf-8")
+    b.write_text("bob\ncarl\n", encoding="utf-8")
+    assert datasets.load_many([a, b], cache) == ["anna", "bob", "carl"]
+    assert datasets.load_many([b], cache) == ["bob", "carl"]
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 2, "maxsize": 16}
+    with pytest.raises(OSError):
+        datasets.load_many([tmp_path / "missing.txt"], cache)
@@ -0,0 +1,106 @@
+# tests/test_flat.py
+import random
+import pytest
+from namegen import NGramTrie, NGramGenerator
+
+WORDS = ["to", "tea", "ted", "ten", "i", "in", "inn"]
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_save_load_roundtrip_preserves_model(tmp_path, names_mixed, order, mmap):
+    m = NGramTrie(names_mixed, order=order)
+    path = tmp_path / "model.ngt"
+    m.save(path)
+    loaded = NGramTrie.load(path, mmap=mmap)
+
+    assert loaded.order == order and loaded.normalize_case
+    assert set(loaded.names) == m.names
+    assert dict(loaded.start_counts) == m.start_counts
+    for ctx in ["a", "an", "ma", "ann", "zz", ""]:
+        assert loaded.successors(ctx) == m.successors(ctx)
+
+    g1 = NGramGenerator(m, rng=random.Random(5))
+    g2 = NGramGenerator(loaded, rng=random.Random(5))
+    out1 = [g1.generate(max_len=8, capitalize=False) for _ in range(30)]
+    out2 = [g2.generate(max_len=8, capitalize=False) for _ in range(30)]
+    assert out1 == out2
+
+def test_mmap_load_exposes_trie_shape_and_names(tmp_path):
+    m = NGramTrie(WORDS, order=3)
+    m.save(tmp_path / "m.ngt")
+    t = NGramTrie.load(tmp_path / "m.ngt")
+    assert t.frozen and t.storage is not None
+    assert set(t.root.children) == {"i", "t"}
+    assert set(t.root.children["t"].children["e"].children) == {"a", "d", "n"}
+    assert t.get_node("xy") is None
+    assert "inn" in t.names and "tex" not in t.names and len(t.names) == len(WORDS)
+    assert t.successors("te") == {"a": 1, "d": 1, "n": 1}
+
+def test_loaded_model_can_be_refit(tmp_path):
+    NGramTrie(WORDS, order=2).save(tmp_path / "m.ngt")
+    t = NGramTrie.load(tmp_path / "m.ngt")
+    t.fit(["anna", "anne"])
+    assert t.storage is None
+    assert t.successors("a") == {"n": 2}
+    assert t.get_node("a").sampler is not None
+
+def test_load_rejects_foreign_files(tmp_path):
+    bad = tmp_path / "bad.ngt"
+    bad.write_bytes(b"not a model at all, just some bytes padding it out")
+    with pytest.raises(ValueError):
+        NGramTrie.load(bad)
+
+@pytest.mark.parametrize("order", [1, 3])
+def test_compact_backend_matches_dict_backend(names_mixed, order):
+    m = NGramTrie(names_mixed, order=order)
+    c = NGramTrie(names_mixed, order=order).compact()
+    assert c.storage is not None
+    assert c.successors("an") == m.successors("an")
+    assert dict(c.start_counts) == m.start_counts
+    g1 = NGramGenerator(m, rng=random.Random(9))
+    g2 = NGramGenerator(c, rng=random.Random(9))
+    assert [g1.generate(capitalize=False) for _ in range(20)] == [g2.generate(capitalize=False) for _ in range(20)]
+
+def test_compact_node_samplers_are_built_once(names_mixed):
+    c = NGramTrie(names_mixed, order=3).compact()
+    sampler = c.get_node("an").sampler
+    assert sampler is c.contexts["an"].sampler and sampler.total == sum(c.successors("an").values())
+    assert c.get_node("anna").sampler is None
+
+def test_memory_report_shrinks_with_compact_backend(names_mixed):
+    m = NGramTrie(names_mixed, order=2)
+    before = m.memory_report()
+    after = m.compact().memory_report()
+    assert before["backend"] == "dict" and after["backend"] == "compact"
+    assert before["nodes"] == after["nodes"]
+    assert after["bytes"] < before["bytes"]
+
+def test_flat_context_index_resolves_on_demand(tmp_path):
+    NGramTrie(WORDS, order=3).save(tmp_path / "m.ngt")
+    t = NGramTrie.load(tmp_path / "m.ngt")
+    assert set(t.contexts) == {"to", "te", "in"}
+    assert t.contexts.get("te") == t.get_node("te")
+    assert t.contexts.get("zz") is None and "t" not in t.contexts
+
+def test_terminal_markers_survive_save_and_load(tmp_path):
+    NGramTrie(WORDS, order=2).save(tmp_path / "m.ngt")
+    t = NGramTrie.load(tmp_path / "m.ngt")
+    assert t.get_node("inn").terminal and not t.get_node("te").terminal
+    assert NGramTrie.load(tmp_path / "m.ngt", mmap=False).get_node("ted").terminal
+
+def test_load_reads_version_one_files(tmp_path):
+    m = NGramTrie(WORDS, order=2)
+    m.save(tmp_path / "m.ngt")
+    data = bytearray((tmp_path / "m.ngt").read_bytes())
+    n_nodes = m.memory_report()["nodes"]
+    data[8:10] = (1).to_bytes(2, "little")
+    (tmp_path / "v1.ngt").write_bytes(bytes(data[:-n_nodes]))
+    t = NGramTrie.load(tmp_path / "v1.ngt")
+    assert t.get_node("inn").terminal and not t.get_node("te").terminal
+    assert t.successors("t") == m.successors("t")
+
+def test_backoff_setting_survives_save_and_load(tmp_path):
+    NGramTrie(WORDS, order=3, backoff=True).save(tmp_path / "m.ngt")
+    t = NGramTrie.load(tmp_path / "m.ngt")
+    assert t.backoff and t.backoff_node("xe") == t.root and t.backoff_node("xte") == t.get_node("te")
+    assert t.root.next_counts["n"] == 4
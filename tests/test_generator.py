@@ -104,3 +104,85 @@ def test_generate_min_len_validations():
     with pytest.raises(ValueError):
         g.generate(target_len=4, max_len=10, min_len=5)
 
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_frozen_model_reproduces_unfrozen_output(names_mixed, order):
+    plain = NGramTrie(names_mixed, order=order)
+    frozen = NGramTrie(names_mixed, order=order).freeze()
+    assert frozen.frozen and frozen.start_sampler is not None
+    g1 = NGramGenerator(plain, rng=random.Random(3))
+    g2 = NGramGenerator(frozen, rng=random.Random(3))
+    out1 = [g1.generate(max_len=8, stop_prob=0.3, capitalize=False) for _ in range(30)]
+    out2 = [g2.generate(max_len=8, stop_prob=0.3, capitalize=False) for _ in range(30)]
+    assert out1 == out2
+
+def test_frozen_model_recompiles_on_refit():
+    m = NGramTrie(["anna", "anne"], order=2).freeze()
+    m.fit(["bob", "bea"])
+    assert set(m.get_node("b").sampler.keys) == {"o", "e"}
+
+def test_iter_names_yields_unique_names_up_to_limit(names_mixed):
+    g = NGramGenerator(NGramTrie(names_mixed, order=1), rng=random.Random(0))
+    stream = g.iter_names(limit=15, max_len=8, capitalize=False)
+    out = list(stream)
+    assert len(out) == 15 and len(set(out)) == 15
+    assert not stream.exhausted
+
+def test_iter_names_reports_exhaustion():
+    g = NGramGenerator(NGramTrie(["ab", "abb"], order=2), rng=random.Random(0))
+    stream = g.iter_names(max_len=4, patience=5, capitalize=False)
+    out = list(stream)
+    assert stream.exhausted
+    assert out == [] and stream.attempts == 5
+    assert next(stream, None) is None
+
+def test_reachability_survival_on_tiny_model():
+    from namegen.reach import ReachabilityTable
+    m = NGramTrie(["ab", "abc", "ac"], order=2)
+    reach = ReachabilityTable(m)
+    assert reach.survival("a", 0) == 1.0
+    assert reach.survival("a", 1) == 1.0
+    assert reach.survival("a", 2) == 0.0
+    assert reach.survival(None, 0) == 1.0 and reach.survival(None, 1) == 0.0
+
+@pytest.mark.parametrize("order", [1, 2])
+def test_guided_generation_hits_exact_length_in_few_attempts(names_mixed, order):
+    m = NGramTrie(names_mixed, order=order)
+    g = NGramGenerator(m, rng=random.Random(1))
+    for _ in range(20):
+        s = g.generate(target_len=6, max_len=10, retries=20, guided=True, capitalize=False)
+        assert s is not None and len(s) == 6 and s not in m.names
+
+def test_guided_generation_respects_min_len(names_mixed):
+    g = NGramGenerator(NGramTrie(names_mixed, order=1), rng=random.Random(2))
+    for _ in range(20):
+        s = g.generate(min_len=7, max_len=9, stop_prob=0.9, retries=5, guided=True)
+        assert s is not None and 7 <= len(s) <= 9
+
+def test_guided_generation_gives_up_when_length_unreachable():
+    g = NGramGenerator(NGramTrie(["ab", "abc", "ac"], order=2), rng=random.Random(0))
+    assert g.generate(target_len=5, max_len=10, guided=True) is None
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_generation_is_unchanged_without_a_names_set(names_mixed, order):
+    g1 = NGramGenerator(NGramTrie(names_mixed, order=order), rng=random.Random(4))
+    g2 = NGramGenerator(NGramTrie(names_mixed, order=order, keep_names=False), rng=random.Random(4))
+    assert [g1.generate(capitalize=False) for _ in range(30)] == [g2.generate(capitalize=False) for _ in range(30)]
+
+def test_backoff_generation_reaches_lengths_a_plain_model_cannot(names_mixed):
+    plain = NGramGenerator(NGramTrie(names_mixed, order=4), rng=random.Random(0))
+    backoff = NGramGenerator(NGramTrie(names_mixed, order=4, backoff=True), rng=random.Random(0))
+    assert plain.generate(target_len=12, retries=50) is None
+    out = [backoff.generate(target_len=12, retries=50, capitalize=False) for _ in range(10)]
+    assert all(s is not None and len(s) == 12 for s in out)
+
+def test_guided_generation_follows_backoff(names_mixed):
+    from namegen.reach import ReachabilityTable
+    m = NGramTrie(names_mixed, order=4, backoff=True).freeze()
+    reach = ReachabilityTable(m)
+    # "and" is a context; "zan" backs off to the path "an", "xyz" to the root.
+    assert reach.state("and") == "and" and reach.state("zan") == "an" and reach.state("xyz") == ""
+    assert reach.survival("xyz", 30) > 0
+    g = NGramGenerator(m, rng=random.Random(0))
+    out = [g.generate(target_len=12, max_len=20, retries=5, guided=True, capitalize=False) for _ in range(10)]
+    assert all(s is not None and len(s) == 12 for s in out)
@@ -0,0 +1,60 @@
+# tests/test_parallel.py
+import random
+import pytest
+from namegen import NGramTrie, NGramGenerator
+from namegen.parallel import generate_chunks, worker_seed
+
+PARAMS = dict(max_len=8, min_len=3, stop_prob=0.3, capitalize=False)
+
+def test_parallel_same_seed_and_workers_is_reproducible(names_mixed):
+    g = NGramGenerator(NGramTrie(names_mixed, order=2))
+    a = g.generate_parallel(40, workers=2, seed=11, **PARAMS)
+    b = g.generate_parallel(40, workers=2, seed=11, **PARAMS)
+    assert a == b and len(a) == 40
+    assert a != g.generate_parallel(40, workers=2, seed=12, **PARAMS)
+
+def test_parallel_output_respects_generate_rules(names_mixed):
+    m = NGramTrie(names_mixed, order=2)
+    out = NGramGenerator(m).generate_parallel(60, workers=3, seed=0, **PARAMS)
+    for s in out:
+        assert s is None or (3 <= len(s) <= 8 and s not in m.names)
+
+def test_single_worker_matches_seeded_generator(names_mixed):
+    m = NGramTrie(names_mixed, order=2)
+    out = NGramGenerator(m).generate_parallel(10, workers=1, seed=5, **PARAMS)
+    ref = NGramGenerator(m, rng=random.Random(worker_seed(5, 0)))
+    assert out == [ref.generate(**PARAMS) for _ in range(10)]
+
+def test_parallel_unique_deduplicates_across_workers(names_mixed):
+    g = NGramGenerator(NGramTrie(names_mixed, order=2))
+    out = g.generate_parallel(30, workers=2, seed=3, unique=True, **PARAMS)
+    got = [s for s in out if s is not None]
+    assert len(got) == len(set(got))
+
+def test_fit_is_independent_of_hash_order():
+    a = NGramTrie(["anna", "bob", "anne", "bea"], order=2)
+    assert list(a.start_counts) == ["a", "b"]
+    assert list(a.get_node("a").next_counts) == ["n"]
+
+def test_parallel_rejects_bad_worker_count(names_mixed):
+    g = NGramGenerator(NGramTrie(names_mixed, order=2))
+    with pytest.raises(ValueError):
+        g.generate_parallel(5, workers=-1, seed=0)
+
+@pytest.mark.parametrize("order", [1, 3])
+def test_sharded_fit_matches_serial_fit(names_mixed, order):
+    serial = NGramTrie(names_mixed * 2, order=order)
+    sharded = NGramTrie(order=order)
+    sharded.fit(names_mixed * 2, workers=3)
+    g1 = NGramGenerator(serial, rng=random.Random(2))
+    g2 = NGramGenerator(sharded, rng=random.Random(2))
+    assert sharded.names == serial.names and sharded.start_counts == serial.start_counts
+    assert list(sharded.contexts) == list(serial.contexts)
+    assert [g1.generate(**PARAMS) for _ in range(30)] == [g2.generate(**PARAMS) for _ in range(30)]
+
+def test_generate_chunks_does_not_depend_on_worker_count(names_mixed):
+    m = NGramTrie(names_mixed, order=2)
+    one = list(generate_chunks(m, 7, workers=1, seed=4, limit=30, **PARAMS))
+    two = list(generate_chunks(m, 7, workers=2, seed=4, limit=30, **PARAMS))
+    assert one == two
+    assert [len(c) for c in one] == [7, 7, 7, 7, 2]
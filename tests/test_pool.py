@@ -0,0 +1,100 @@
+# tests/test_pool.py
+import asyncio
+import threading
+import time
+import pytest
+from namegen.pool import Cancelled, CancelToken, PoolBusy, RequestPool
+
+def _blocking_job(started, release):
+    def job(token):
+        started.set()
+        while not release.wait(0.01):
+            token.check()
+        return "done"
+    return job
+
+def test_cancel_token_check_raises_after_cancel_or_deadline():
+    token = CancelToken()
+    token.check()
+    assert token.remaining() is None
+    token.cancel()
+    with pytest.raises(Cancelled):
+        token.check()
+    assert CancelToken(0).cancelled
+
+def test_identical_requests_share_one_job():
+    pool = RequestPool(max_workers=2)
+    started, release = threading.Event(), threading.Event()
+    job = _blocking_job(started, release)
+    jobs = [pool.submit("k", job) for _ in range(3)]
+    assert started.wait(2)
+    release.set()
+    assert [j.future.result(2) for j in jobs] == ["done"] * 3
+    for j in jobs:
+        pool.release(j)
+    stats = pool.stats()
+    assert stats["submitted"] == 1 and stats["coalesced"] == 2 and stats["pending"] == 0
+    pool.shutdown()
+
+def test_timeout_cancels_the_running_job():
+    pool = RequestPool(max_workers=1)
+    seen = []
+
+    def job(token):
+        while True:
+            try:
+                token.check()
+            except Cancelled:
+                seen.append(token.expired)
+                raise
+            time.sleep(0.005)
+
+    with pytest.raises(TimeoutError):
+        pool.run("slow", job, timeout=0.05)
+    pool.shutdown()
+    assert seen == [True]
+    assert pool.stats()["timeouts"] == 1
+
+def test_full_pool_rejects_new_work():
+    pool = RequestPool(max_workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+    held = pool.submit("a", _blocking_job(started, release))
+    with pytest.raises(PoolBusy):
+        pool.submit("b", lambda token: None)
+    # Joining the running job does not need a new slot.
+    joined = pool.submit("a", lambda token: None)
+    release.set()
+    assert held.future.result(2) == "done" and joined is held
+    pool.release(held)
+    pool.release(joined)
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+def test_last_release_cancels_an_abandoned_job():
+    pool = RequestPool(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    job = pool.submit("a", _blocking_job(started, release))
+    assert started.wait(2)
+    pool.release(job)
+    with pytest.raises(Cancelled):
+        job.future.result(2)
+    # A new request with the same key starts fresh instead of joining the cancelled job.
+    assert pool.run("a", lambda token: 42) == 42
+    pool.shutdown()
+
+def test_run_async_returns_result_and_releases_on_cancel():
+    pool = RequestPool(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    async def main():
+        assert await pool.run_async(None, lambda token, x: x * 2, 21) == 42
+        task = asyncio.ensure_future(pool.run_async("slow", _blocking_job(started, release)))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    pool.shutdown()
+    assert pool.stats()["pending"] == 0
@@ -1,6 +1,10 @@
 # tests/test_sampling.py
 import random
-from namegen import sample_weighted
+import threading
+import pytest
+from namegen import sampling
+from namegen import sample_weighted, CumulativeSampler, NGramTrie, NGramGenerator
+from namegen.sampling import SHAPE_CACHE_SIZE, check_shape, shaped_sampler, shaped_samplers, sorted_successors
 
 def test_sample_weighted_empty_and_zeroes():
     rng = random.Random(0)
@@ -23,4 +27,75 @@ def test_sample_weighted_cdf_boundaries_are_respected():
     assert sample_weighted(w, rng) == "c"
 
 def test_sample_weighted_default_rng_returns_key():
-    assert sample_weighted({"a": 1, "b": 1}) in {"a", "b"}
\ No newline at end of file
+    assert sample_weighted({"a": 1, "b": 1}) in {"a", "b"}
+
+def test_cumulative_sampler_matches_sample_weighted():
+    w = {"a": 1, "b": 0, "c": 3, "d": 6}
+    sampler = CumulativeSampler.from_counts(w)
+    rng1, rng2 = random.Random(7), random.Random(7)
+    for _ in range(200):
+        assert sampler.sample(rng1) == sample_weighted(w, rng2)
+
+def test_cumulative_sampler_empty_and_zeroes():
+    rng = random.Random(0)
+    assert CumulativeSampler.from_counts({}).sample(rng) is None
+    assert CumulativeSampler.from_counts({"a": 0, "b": 0}).sample(rng) is None
+
+def test_sorted_successors_orders_by_count_keeping_ties():
+    assert sorted_successors({"a": 1, "b": 5, "c": 1, "d": 3}) == (("b", "d", "a", "c"), (5, 3, 1, 1))
+
+def test_shaped_sampler_top_k_top_p_and_temperature():
+    keys, counts = sorted_successors({"a": 6, "b": 3, "c": 1, "z": 0})
+    assert shaped_sampler(keys, counts, top_k=2).keys == ("a", "b")
+    assert shaped_sampler(keys, counts, top_p=0.6).keys == ("a",)
+    assert shaped_sampler(keys, counts, top_p=0.9).keys == ("a", "b")
+    flat = shaped_sampler(keys, counts)
+    assert flat.keys == ("a", "b", "c") and flat.cumulative == pytest.approx([0.6 * 10 / 6, 1.5, 10 / 6])
+    cold = shaped_sampler(keys, counts, temperature=0.5)
+    assert cold.cumulative == pytest.approx([1.0, 1.25, 1.25 + 1 / 36])
+    frozen = shaped_sampler(keys, counts, temperature=0.01)
+    assert frozen.cumulative[0] / frozen.total > 0.999
+
+@pytest.mark.parametrize("kw", [dict(temperature=0), dict(top_k=-1), dict(top_p=0), dict(top_p=1.5)])
+def test_check_shape_rejects_out_of_range(kw):
+    with pytest.raises(ValueError):
+        check_shape(**kw)
+
+def test_shaped_samplers_identity_is_none_and_cache_is_bounded(names_mixed):
+    m = NGramTrie(names_mixed, order=2)
+    assert shaped_samplers(m, 1.0, 0, 1.0) is None
+    first = shaped_samplers(m, 0.5)
+    assert shaped_samplers(m, 0.5) is first
+    for i in range(SHAPE_CACHE_SIZE + 3):
+        shaped_samplers(m, 2.0 + i / 10)
+    assert len(m.derived("shaped", dict)[0]) == SHAPE_CACHE_SIZE
+    assert shaped_samplers(m, 0.5) is not first
+
+def test_shaped_samplers_survive_concurrent_eviction(names_mixed, monkeypatch):
+    monkeypatch.setattr(sampling, "SHAPE_CACHE_SIZE", 1)
+    m = NGramTrie(names_mixed, order=2).freeze()
+    errors = []
+    def churn(offset):
+        try:
+            for i in range(200):
+                assert shaped_samplers(m, 1.5 + (offset + i) % 7 / 10) is not None
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=churn, args=(k,)) for k in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors == []
+    assert len(m.derived("shaped", dict)[0]) == 1
+
+def test_generate_with_top_k_one_is_greedy(names_mixed):
+    m = NGramTrie(names_mixed, order=2).freeze()
+    gen = NGramGenerator(m, rng=random.Random(0))
+    outs = {gen.generate(max_len=10, stop_prob=0.0, retries=1, capitalize=False, top_k=1) for _ in range(20)}
+    assert len(outs) == 1 and None not in outs
+
+def test_default_settings_keep_seeded_output(names_mixed):
+    m = NGramTrie(names_mixed, order=2).freeze()
+    a = NGramGenerator(m, rng=random.Random(4))
+    b = NGramGenerator(m, rng=random.Random(4))
+    assert [a.generate(max_len=8) for _ in range(20)] == \
+        [b.generate(max_len=8, temperature=1.0, top_k=0, top_p=1.0) for _ in range(20)]
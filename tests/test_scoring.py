@@ -0,0 +1,50 @@
+# tests/test_scoring.py
+import math
+import random
+import numpy as np
+import pytest
+from namegen import NGramTrie, NGramGenerator
+import namegen.scoring as scoring
+
+NAMES = ["anna", "annika", "alina", "bob", "bella", "carl", "carla", "carina", "diana", "dina",
+         "erik", "erika", "nina", "lina", "marina", "karin", "kalle", "kelly", "ella", "linda"]
+
+def test_order_one_scores_unigram_frequencies():
+    m = NGramTrie(["ab", "a"], order=1)
+    lp, surprisal = m.score("Ba")
+    assert surprisal == pytest.approx([math.log(3 / 1), math.log(3 / 2)])
+    assert lp == pytest.approx(-sum(surprisal))
+
+def test_start_context_is_split_per_character():
+    m = NGramTrie(["anna", "anne", "amy", "bob"], order=3)
+    lp, surprisal = m.score("Amy")
+    # P(start "am") = 1/4 = P(a) * P(m | a) = 3/4 * 1/3; then "y" always follows "am".
+    assert surprisal == pytest.approx([math.log(4 / 3), math.log(3), 0.0])
+    assert lp == pytest.approx(math.log(1 / 4))
+    # Contexts are read as generation reads them: "nn" never starts a name, so "anna" cannot be spelled.
+    assert m.score("ann")[0] == pytest.approx(math.log(2 / 4))
+    assert m.score("anna")[1][-1] == math.inf
+    assert m.score("zz")[0] == -math.inf and m.score("ax")[0] == -math.inf
+
+@pytest.mark.parametrize("dense", [True, False])
+@pytest.mark.parametrize("order,backoff", [(1, False), (2, False), (3, False), (3, True), (4, True)])
+def test_score_many_matches_score(order, backoff, dense, monkeypatch):
+    if not dense:
+        monkeypatch.setattr(scoring, "DENSE_LIMIT", 0)
+    m = NGramTrie(NAMES, order=order, backoff=backoff).freeze()
+    gen = NGramGenerator(m, rng=random.Random(3))
+    cands = [gen.generate(max_len=10) or "" for _ in range(50)] + ["", "a", "Nina", "xq", "an?na", "bellarina"]
+    lp, per_char = m.score_many(cands, surprisal=True)
+    assert per_char.shape == (len(cands), max(map(len, cands)))
+    for i, c in enumerate(cands):
+        want, chars = m.score(c)
+        assert lp[i] == pytest.approx(want) or lp[i] == want
+        np.testing.assert_allclose(per_char[i, :len(c)], chars)
+        assert np.isnan(per_char[i, len(c):]).all()
+
+def test_score_many_ranks_and_follows_retraining():
+    m = NGramTrie(NAMES, order=2, backoff=True).freeze()
+    lp = m.score_many(["li", "qqqq", "lin"])
+    assert lp[0] > lp[2] > lp[1] == -np.inf
+    m.partial_fit(["qqqq"])
+    assert np.isfinite(m.score_many(["qqqq"])[0])
@@ -0,0 +1,113 @@
+# tests/test_server.py
+import http.client
+import json
+import random
+import threading
+import pytest
+from namegen import NGramTrie, NGramGenerator
+from namegen.server import ModelStore, NameServer, main, parse_request
+
+NAMES = ["anna", "annika", "bob", "bella", "carl", "carla", "diana", "dina", "erik", "erika"]
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "small.txt").write_text("\n".join(NAMES), encoding="utf-8")
+    (tmp_path / "extra.txt").write_text("frida\ngustav\n", encoding="utf-8")
+    srv = NameServer(("127.0.0.1", 0), ModelStore(tmp_path))
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+def _post(conn, body):
+    conn.request("POST", "/generate", body=json.dumps(body), headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp, resp.read().decode("utf-8")
+
+def test_generate_streams_ndjson_matching_the_library(server):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    resp, text = _post(conn, {"dataset": "small", "order": 2, "count": 25, "seed": 7, "max_len": 10})
+    assert resp.status == 200
+    assert resp.getheader("Transfer-Encoding") == "chunked"
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert lines[-1]["done"] is True and lines[-1]["count"] == 25
+
+    gen = NGramGenerator(NGramTrie(NAMES, order=2), rng=random.Random(7))
+    expected = [gen.generate(max_len=10, guided=True) for _ in range(25)]
+    assert [line["name"] for line in lines[:-1]] == expected
+
+def test_keep_alive_serves_several_requests_on_one_connection(server):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    first, _ = _post(conn, {"dataset": "small", "count": 3, "seed": 1})
+    sock = conn.sock
+    second, text = _post(conn, {"dataset": "small+extra", "count": 3, "seed": 1})
+    assert first.status == second.status == 200
+    assert conn.sock is sock
+    conn.request("GET", "/health")
+    health = json.loads(conn.getresponse().read())
+    # small, extra and the combined small+extra
+    assert health == {"status": "ok", "models": 3}
+
+def test_bad_requests_get_400_with_a_message(server):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    for body, message in [({"dataset": "nope"}, "unknown dataset"),
+                          ({"dataset": "small", "colour": 1}, "unknown field"),
+                          ({"dataset": "small", "count": "5"}, "count must be"),
+                          ({"dataset": "small", "target_len": 30, "max_len": 20}, "target_len")]:
+        resp, text = _post(conn, body)
+        assert resp.status == 400
+        assert message in json.loads(text)["error"]
+    conn.request("GET", "/datasets")
+    assert json.loads(conn.getresponse().read()) == {"datasets": ["extra", "small"]}
+
+def test_timeout_ends_the_stream_with_an_error_line(server):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    resp, text = _post(conn, {"dataset": "small", "count": 100000, "timeout": 0.01})
+    last = json.loads(text.splitlines()[-1])
+    assert resp.status == 200
+    assert last["done"] is False and last["error"] == "timed out" and last["count"] < 100000
+
+def test_parse_request_fills_defaults_and_accepts_int_floats():
+    req = parse_request(b'{"dataset": "small", "stop_prob": 0}')
+    assert req["order"] == 3 and req["count"] == 10 and req["stop_prob"] == 0.0
+    with pytest.raises(ValueError):
+        parse_request(b"[]")
+
+def test_generate_applies_constraints_and_rejects_bad_patterns(server):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    resp, text = _post(conn, {"dataset": "small", "order": 1, "count": 10, "seed": 2, "prefix": "Er",
+                              "target_len": 5})
+    names = [json.loads(line)["name"] for line in text.splitlines()[:-1]]
+    assert resp.status == 200 and all(n.startswith("Er") and len(n) == 5 for n in names)
+    resp, text = _post(conn, {"dataset": "small", "pattern": "(ab"})
+    assert resp.status == 400 and "pattern" in json.loads(text)["error"]
+
+def test_parse_request_checks_sampling_shape():
+    req = parse_request(b'{"dataset": "small", "temperature": 1, "top_k": 3}')
+    assert req["temperature"] == 1.0 and req["top_k"] == 3 and req["top_p"] == 1.0
+    with pytest.raises(ValueError, match="top_p"):
+        parse_request(b'{"dataset": "small", "top_p": 0}')
+
+def test_combined_dataset_is_composed_from_cached_file_models(tmp_path):
+    (tmp_path / "small.txt").write_text("\n".join(NAMES), encoding="utf-8")
+    (tmp_path / "extra.txt").write_text("frida\ngustav\nanna\n", encoding="utf-8")
+    store = ModelStore(tmp_path)
+    small = store.get("small", order=2)
+    both = store.get("small+extra", order=2)
+    assert store.get("small", order=2) is small and len(store.cache) == 3
+    trained = NGramTrie(NAMES + ["frida", "gustav"], order=2)
+    assert both.start_counts == trained.start_counts and set(both.names) == set(trained.names)
+
+def test_missing_data_dir_asks_for_one(tmp_path, capsys):
+    with pytest.raises(ValueError, match="NAMEGEN_DATA_DIR"):
+        ModelStore(tmp_path / "missing")
+    with pytest.raises(SystemExit):
+        main(["--data-dir", str(tmp_path / "missing")])
+    assert "--data-dir" in capsys.readouterr().err
+
+def test_bad_preload_is_a_usage_error(tmp_path, capsys):
+    (tmp_path / "small.txt").write_text("\n".join(NAMES), encoding="utf-8")
+    with pytest.raises(SystemExit):
+        main(["--data-dir", str(tmp_path), "--preload", "nope:2"])
+    assert "--preload nope:" in capsys.readouterr().err
@@ -0,0 +1,37 @@
+# tests/test_stats.py
+import random
+from namegen import NGramTrie, NGramGenerator, GenerationStats
+
+def test_stats_account_for_every_attempt(names_mixed):
+    stats = GenerationStats()
+    gen = NGramGenerator(NGramTrie(names_mixed, order=3), rng=random.Random(0), stats=stats)
+    out = [gen.generate(target_len=5, retries=50) for _ in range(20)]
+
+    assert stats.calls == 20
+    assert stats.accepted == sum(s is not None for s in out) and stats.failed == 20 - stats.accepted
+    rejected = stats.rejected_empty + stats.rejected_training + stats.rejected_length
+    assert stats.attempts == stats.accepted + rejected
+    assert stats.dead_ends_missing + stats.dead_ends_empty > 0
+    assert sum(stats.latency_buckets) == 20 and stats.latency_percentile(95) > 0
+    assert "accepted" in stats.summary()
+
+def test_stats_count_training_name_rejections():
+    stats = GenerationStats()
+    gen = NGramGenerator(NGramTrie(["ab"], order=1), rng=random.Random(1), stats=stats)
+    gen.generate(target_len=2, max_len=2, retries=30)
+    assert stats.rejected_training > 0 and stats.chars == 2 * stats.attempts
+
+def test_step_hook_sees_every_sampled_character(names_mixed):
+    steps = []
+    gen = NGramGenerator(NGramTrie(names_mixed, order=2), rng=random.Random(3),
+                         step_hook=lambda ctx, ch: steps.append((ctx, ch)))
+    name = gen.generate_once(target_len=None, max_len=8, min_len=1, stop_prob=0.3)
+    assert steps[0][0] is None and "".join(ch for _, ch in steps) == name
+    assert all(ctx == name[i] for i, (ctx, _) in enumerate(steps[1:]))
+
+def test_stats_do_not_change_seeded_output(names_mixed):
+    plain = NGramGenerator(NGramTrie(names_mixed, order=2), rng=random.Random(5))
+    timed = NGramGenerator(NGramTrie(names_mixed, order=2), rng=random.Random(5), stats=GenerationStats())
+    assert [plain.generate() for _ in range(20)] == [timed.generate() for _ in range(20)]
+    timed.stats.reset()
+    assert timed.stats.calls == 0 and timed.stats.latency_buckets == []
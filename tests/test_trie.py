@@ -1,6 +1,7 @@
 # tests/test_trie.py
+import random
 import pytest
-from namegen import NGramTrie
+from namegen import NGramTrie, MultiOrderTrie, NGramGenerator
 
 def test_rejects_invalid_order():
     with pytest.raises(ValueError):
@@ -102,4 +103,209 @@ def test_trie_dump_for_visual_comparison():
 
     text = "\n".join(lines)
     assert "+- t" in text and "+- i" in text
-    assert "+- e" in text and "+- o" in text and "+- n" in text
\ No newline at end of file
+    assert "+- e" in text and "+- o" in text and "+- n" in text
+def test_context_index_maps_every_context_to_its_node():
+    words = ["to", "tea", "ted", "ten", "i", "in", "inn"]
+    t3 = NGramTrie(names=words, order=3)
+    assert set(t3.contexts) == {"to", "te", "in"}
+    assert t3.contexts["te"] is t3.get_node("te")
+    t1 = NGramTrie(names=words, order=1)
+    assert t1.contexts == {"": t1.root}
+
+def test_context_index_is_rebuilt_on_refit():
+    t = NGramTrie(["anna"], order=2)
+    t.fit(["bob"])
+    assert set(t.contexts) == {"b"}
+    assert t.successors("xb") == {"o": 1}
+
+def test_fit_marks_terminal_nodes_for_training_names():
+    t = NGramTrie(["to", "tea", "ted", "Ten", "i", "in", "inn"], order=2)
+    assert t.get_node("ten").terminal and t.get_node("in").terminal
+    assert not t.get_node("te").terminal and not t.root.terminal
+    assert t.is_name("TEA") and not t.is_name("te") and not t.is_name("xyz")
+
+def test_names_can_be_served_from_terminal_markers():
+    words = ["to", "tea", "ted", "ten", "i", "in", "inn"]
+    t = NGramTrie(words, order=2, keep_names=False)
+    assert not isinstance(t.names, set)
+    assert "inn" in t.names and "te" not in t.names and 3 not in t.names
+    assert set(t.names) == set(words) and len(t.names) == len(words)
+
+def _snapshot(t):
+    out, queue = [], [("", t.root)]
+    for prefix, node in queue:
+        out.append((prefix, node.terminal, list(node.next_counts.items())))
+        queue.extend((prefix + ch, child) for ch, child in node.children.items())
+    return out, list(t.start_counts.items()), list(t.contexts), set(t.names)
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_merge_matches_serial_fit_with_overlapping_names(order):
+    words = ["to", "tea", "ted", "ten", "i", "in", "inn", "anna", "anne", "tedd"]
+    a = NGramTrie(words[:6], order=order)
+    b = NGramTrie(words[4:], order=order).compact()
+    merged = NGramTrie.merge(a, b)
+    assert _snapshot(merged) == _snapshot(NGramTrie(words, order=order))
+    assert _snapshot(a) == _snapshot(NGramTrie(words[:6], order=order))
+
+def test_merge_rejects_incompatible_models():
+    with pytest.raises(ValueError):
+        NGramTrie.merge(NGramTrie(["anna"], order=2), NGramTrie(["anna"], order=3))
+    with pytest.raises(ValueError):
+        NGramTrie.merge(NGramTrie(["anna"]), NGramTrie(["anna"], normalize_case=False))
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_combine_without_weights_matches_serial_fit(order):
+    parts = [["to", "tea", "ted"], ["ten", "i", "to"], ["inn", "anna", "tea", "tedd"]]
+    models = [NGramTrie(p, order=order) for p in parts]
+    combined = NGramTrie.combine(models)
+    assert _snapshot(combined) == _snapshot(NGramTrie([n for p in parts for n in p], order=order))
+
+def test_combine_scales_counts_by_weight():
+    a = NGramTrie(["anna", "anne"], order=2)
+    b = NGramTrie(["anna", "bob"], order=2).compact()
+    mix = NGramTrie.combine([a, b], weights=[3, 0.5]).freeze()
+    assert mix.start_counts == {"a": 3 * 2 + 0.5, "b": 0.5}
+    assert mix.get_node("an").next_counts == {"n": 3 * 2 + 0.5}
+    assert set(mix.names) == {"anna", "anne", "bob"}
+    assert mix.start_sampler.total == pytest.approx(7)
+    with pytest.raises(ValueError, match="integer counts"):
+        mix.compact()
+    assert NGramTrie.combine([a, b], weights=[2, 1.0]).compact().start_counts == {"a": 5, "b": 1}
+
+def test_combine_rejects_bad_weights():
+    a, b = NGramTrie(["anna"]), NGramTrie(["bob"])
+    for weights in ([1], [1, 0], [1, -2]):
+        with pytest.raises(ValueError):
+            NGramTrie.combine([a, b], weights=weights)
+    with pytest.raises(ValueError):
+        NGramTrie.combine([])
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_partial_fit_matches_full_fit(names_mixed, order):
+    full = NGramTrie(names_mixed, order=order).freeze()
+    part = NGramTrie(names_mixed[:5], order=order).freeze()
+    part.partial_fit(names_mixed[3:])
+    assert _snapshot(part)[:2] == _snapshot(full)[:2]
+    assert part.names == full.names and set(part.contexts) == set(full.contexts)
+    for ctx, node in part.contexts.items():
+        assert node.sampler.keys == full.contexts[ctx].sampler.keys
+    assert part.start_sampler.cumulative == full.start_sampler.cumulative
+
+@pytest.mark.parametrize("order", [1, 3])
+def test_forget_matches_fit_on_remaining_names_and_prunes(order):
+    words = ["to", "tea", "ted", "ten", "i", "in", "inn", "anna", "annika"]
+    t = NGramTrie(words, order=order).freeze()
+    t.derived("probe", lambda m: object())
+    t.forget(["annika", "ANNA", "inn", "nobody"])
+    rest = NGramTrie(["to", "tea", "ted", "ten", "i", "in"], order=order)
+    assert t.names == rest.names and t.start_counts == rest.start_counts
+    assert t.get_node("an") is None and t.get_node("in").children == {}
+    assert set(t.contexts) == set(rest.contexts)
+    for ctx, node in t.contexts.items():
+        assert node.next_counts == rest.contexts[ctx].next_counts
+        assert sorted(node.sampler.keys) == sorted(rest.contexts[ctx].next_counts)
+    assert t._derived == {}
+
+def test_partial_fit_on_compact_model_rebuilds_dict_nodes():
+    t = NGramTrie(["anna", "anne"], order=2).compact()
+    t.partial_fit(["annika"])
+    assert t.storage is None and t.frozen
+    assert t.successors("a") == {"n": 3} and "annika" in t.names
+
+def test_backoff_records_counts_for_every_lower_order():
+    t = NGramTrie(["anna", "anne"], order=3, backoff=True)
+    assert t.root.next_counts == {"a": 3, "n": 4, "e": 1}
+    assert t.get_node("a").next_counts == {"n": 2} and t.successors("an") == {"n": 2}
+    assert t.backoff_node("xa") is t.get_node("a")
+    assert t.backoff_node("zz") is t.root
+    assert NGramTrie(["anna"], order=3).backoff_node("xn") is None
+
+def test_backoff_partial_fit_and_forget_match_fit():
+    words = ["to", "tea", "ted", "ten", "inn", "anna"]
+    t = NGramTrie(words[:3], order=3, backoff=True).freeze()
+    t.partial_fit(words[3:])
+    assert _snapshot(t)[:2] == _snapshot(NGramTrie(words, order=3, backoff=True))[:2]
+    assert t.root.sampler.total == sum(len(w) for w in words)
+    t.forget(["anna", "inn"])
+    rest = NGramTrie(words[:4], order=3, backoff=True)
+    assert t.root.next_counts == rest.root.next_counts
+    assert t.successors("t") == rest.successors("t") and t.get_node("a") is None
+
+WORDS = ["anna", "to", "tea", "tedd", "ted", "ten", "i", "in", "inn", "anne", "annika", "teddy"]
+
+@pytest.mark.parametrize("backoff", [False, True])
+def test_multi_order_views_match_separate_models(backoff):
+    multi = MultiOrderTrie(WORDS, order=5).freeze()
+    for order in range(1, 6):
+        view = multi.view(order, backoff)
+        ref = NGramTrie(WORDS, order=order, backoff=backoff).freeze()
+        assert view.root is multi.root and multi.view(order, backoff) is view
+        assert list(view.start_counts.items()) == list(ref.start_counts.items())
+        assert list(view.contexts) == list(ref.contexts)
+        a = NGramGenerator(view, rng=random.Random(order))
+        b = NGramGenerator(ref, rng=random.Random(order))
+        assert [a.generate(max_len=8) for _ in range(20)] == [b.generate(max_len=8) for _ in range(20)]
+    with pytest.raises(ValueError):
+        multi.view(6)
+    capped = MultiOrderTrie(WORDS, order=8)
+    assert capped.longest == 6 and capped.view(6).start_counts == NGramTrie(WORDS, order=6).start_counts
+    with pytest.raises(ValueError, match="longest name"):
+        capped.view(7)
+
+def test_multi_order_updates_keep_every_order_and_refresh_views():
+    def start_counts(m):
+        return {n: list(c.items()) for n, c in m.start_counts_by_order.items()}
+    full = MultiOrderTrie(WORDS, order=4)
+    part = MultiOrderTrie(WORDS[:7], order=4).freeze()
+    old = part.view(3)
+    part.partial_fit(WORDS[5:])
+    assert start_counts(part) == start_counts(full) and part.view(3) is old
+    assert start_counts(part.forget(WORDS[7:])) == start_counts(MultiOrderTrie(WORDS[:7], order=4))
+    combined = MultiOrderTrie.combine([MultiOrderTrie(WORDS[:7], order=4), MultiOrderTrie(WORDS[5:], order=4)])
+    assert start_counts(combined) == start_counts(full)
+
+@pytest.mark.parametrize("backoff", [False, True])
+def test_multi_order_views_follow_updates_of_the_base(backoff):
+    multi = MultiOrderTrie(WORDS[:7], order=5).freeze()
+    view = multi.view(3, backoff)
+    assert NGramGenerator(view, rng=random.Random(0)).generate(max_len=8) is not None
+    multi.partial_fit(WORDS[7:] + ["zoe", "zola"])
+    ref = NGramTrie(WORDS + ["zoe", "zola"], order=3, backoff=backoff).freeze()
+    assert list(view.start_counts.items()) == list(ref.start_counts.items())
+    assert set(view.contexts) == set(ref.contexts) and view.start_sampler.total == sum(ref.start_counts.values())
+    a = NGramGenerator(view, rng=random.Random(1))
+    b = NGramGenerator(ref, rng=random.Random(1))
+    assert [a.generate(max_len=8) for _ in range(50)] == [b.generate(max_len=8) for _ in range(50)]
+    multi.forget(["zoe", "zola"])
+    assert "zo" not in view.contexts and "zo" not in view.start_counts
+    multi.fit(["bo", "bob", "bobby"])
+    assert view.root is multi.root and set(view.contexts) == {"bo"}
+
+def test_multi_order_views_are_read_only():
+    multi = MultiOrderTrie(WORDS, order=3)
+    with pytest.raises(ValueError):
+        multi.view(2).partial_fit(["tom"])
+    with pytest.raises(ValueError):
+        multi.save("x.ngm")
+    with pytest.raises(ValueError):
+        MultiOrderTrie.combine([multi, NGramTrie(WORDS, order=3, backoff=True)])
+    with pytest.raises(ValueError, match="save"):
+        multi.view(2).compact()
+    assert multi.view(2).storage is None
+
+def test_multi_order_view_saves_a_standalone_model(tmp_path):
+    multi = MultiOrderTrie(WORDS, order=5).freeze()
+    multi.view(3, backoff=True).save(tmp_path / "v3.ngm")
+    loaded = NGramTrie.load(tmp_path / "v3.ngm")
+    ref = NGramTrie(WORDS, order=3, backoff=True).freeze()
+    a = NGramGenerator(loaded, rng=random.Random(2))
+    b = NGramGenerator(ref, rng=random.Random(2))
+    assert [a.generate(max_len=8) for _ in range(20)] == [b.generate(max_len=8) for _ in range(20)]
+
+def test_multi_order_forget_updates_longest():
+    multi = MultiOrderTrie(WORDS, order=8)
+    assert multi.longest == 6 and multi.view(6)
+    multi.forget(["annika"])
+    assert multi.longest == 5
+    with pytest.raises(ValueError, match="longest name"):
+        multi.view(6)
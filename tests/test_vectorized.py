@@ -0,0 +1,60 @@
+# tests/test_vectorized.py
+import random
+import pytest
+from namegen import NGramTrie, NGramGenerator
+
+pytest.importorskip("numpy")
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_batch_respects_length_and_novelty(names_mixed, order):
+    m = NGramTrie(names_mixed, order=order)
+    g = NGramGenerator(m, rng=random.Random(0))
+    out = g.generate_batch(200, max_len=8, min_len=3, stop_prob=0.3, capitalize=False)
+    assert len(out) == 200
+    for s in out:
+        assert s is None or (3 <= len(s) <= 8 and s not in m.names)
+
+def test_batch_exact_length_and_unique(names_mixed):
+    m = NGramTrie(names_mixed, order=2)
+    g = NGramGenerator(m, rng=random.Random(0))
+    out = g.generate_batch(30, target_len=5, max_len=10, unique=True, capitalize=False)
+    got = [s for s in out if s is not None]
+    assert got and all(len(s) == 5 for s in got)
+    assert len(set(got)) == len(got)
+
+def test_batch_is_reproducible_for_a_seed(names_mixed):
+    m = NGramTrie(names_mixed, order=3)
+    g = NGramGenerator(m)
+    assert g.generate_batch(50, seed=1) == g.generate_batch(50, seed=1)
+    g1 = NGramGenerator(m, rng=random.Random(4))
+    g2 = NGramGenerator(m, rng=random.Random(4))
+    assert g1.generate_batch(50) == g2.generate_batch(50)
+
+def test_batch_returns_none_when_length_unreachable():
+    m = NGramTrie(["anna", "anne"], order=3)
+    g = NGramGenerator(m, rng=random.Random(0))
+    assert g.generate_batch(3, target_len=1, max_len=5, retries=5) == [None, None, None]
+
+def test_batch_only_uses_observed_ngrams():
+    order = 2
+    m = NGramTrie(["abababababababa", "abba"], order=order)
+    observed = {n[i:i + order] for n in m.names for i in range(len(n) - order + 1)}
+    g = NGramGenerator(m, rng=random.Random(0))
+    for s in g.generate_batch(100, max_len=12, capitalize=False):
+        if s:
+            assert all(s[i:i + order] in observed for i in range(len(s) - order + 1))
+
+def test_batch_validates_lengths(names_mixed):
+    g = NGramGenerator(NGramTrie(names_mixed, order=2))
+    with pytest.raises(ValueError):
+        g.generate_batch(5, target_len=12, max_len=10)
+
+def test_batch_follows_backoff(names_mixed):
+    plain = NGramGenerator(NGramTrie(names_mixed, order=4), rng=random.Random(0))
+    backoff = NGramGenerator(NGramTrie(names_mixed, order=4, backoff=True), rng=random.Random(0))
+    assert plain.generate_batch(5, target_len=12, max_len=20, retries=20) == [None] * 5
+    out = backoff.generate_batch(50, target_len=12, max_len=20, retries=20, capitalize=False)
+    assert all(s is not None and len(s) == 12 for s in out)
+    # Backoff points are possible ends in variable mode, as in generate().
+    short = backoff.generate_batch(200, max_len=20, min_len=2, stop_prob=1.0, capitalize=False)
+    assert all(s is not None and len(s) <= 4 for s in short)